@@ -2,11 +2,8 @@
 -- Auto Start Game Mod - Super Simple with Lovely Logs
 --
 -- STARTUP OPTION CONFIGURATION:
--- This mod reads a JSON file from /tmp/balatro_auto_start.json to start a game
--- with specific configuration. The available options are:
---
--- MAIN OPTIONS:
--- • auto_start (boolean): If true, automatically starts the game
+-- The API sends an "auto_start" command over the command channel (see below)
+-- to start a game with specific configuration. The available options are:
 --
 -- GAME CONFIGURATION OPTIONS:
 -- • deck (string): The deck to use. Valid values include:
@@ -42,66 +39,839 @@
 --   - Any text works as a seed
 --   - "random" or null/undefined = random seed
 --   - Using the same seed will produce the same sequence of cards/events
+--
+-- GAME STATE EXPORT:
+-- While the game runs, a compact snapshot of the run (state, money, hands,
+-- jokers, shop, hand and focused element) is pushed to the connected API
+-- clients and written atomically to $BALATRO_STATE_FILE (default
+-- /tmp/balatro_game_state.json) whenever it changes. The API serves it at /game_state.
+--
+-- COMMAND CHANNEL:
+-- The mod listens on 127.0.0.1:$BALATRO_MOD_PORT (default 12346) and polls the
+-- socket without blocking from love.update. Messages are JSON objects, one per line:
+--   request:  {"id": 1, "cmd": "auto_start", "args": {"deck": "b_red", "stake": 1}}
+--   response: {"id": 1, "ok": true, "result": {...}} or {"id": 1, "ok": false, "error": "..."}
+--   pushed:   {"event": "status", "status": "ready"} and {"event": "state", "seq": 3, "snapshot": {...}}
+--
+-- UI GEOMETRY:
+-- The "ui_elements" command returns the screen pixel box of every card in the
+-- hand, joker, consumable, shop and pack areas and of every enabled button of
+-- the visible UI boxes, as laid out in the current frame. The API serves it at /ui_elements.
+--
+-- GAME ACTIONS:
+-- The "action" command runs one of a whitelisted set of game actions (see
+-- ACTIONS below) by calling the same G.FUNCS the UI buttons call, after the
+-- same checks that enable those buttons. The API serves it at /game/action.
+--
+-- LOCKSTEP:
+-- The mod counts the game updates it runs (frame counter). With lockstep
+-- enabled, love.update only advances the game while the API has granted it a
+-- frame budget ("step" and "step_until_idle" commands), using a fixed dt, so
+-- the game waits for the agent instead of running at wall-clock speed.
+-- Lockstep ends when the last API client disconnects, so a crashed agent never
+-- leaves the game frozen.
+--
+-- INPUT ACKNOWLEDGEMENT:
+-- Every gamepad button, trigger and mouse button event Love delivers is pushed
+-- as {"event": "input", "kind": "gamepad_pressed", "button": "a", "frame": 120},
+-- where frame is the game update that consumes it, so the API can return as
+-- soon as the game has seen an injected input.
 
--- Parse JSON and extract config
-local function read_config()
-    local file = io.open("/tmp/balatro_auto_start.json", "r")
-    if file then
-        local content = file:read("*all")
-        file:close()
-        
-        os.remove("/tmp/balatro_auto_start.json")
-        
-        -- Parse JSON values
-        local config = {}
-        config.auto_start = content:find('"auto_start"%s*:%s*true') ~= nil
-        config.deck = content:match('"deck"%s*:%s*"([^"]*)"')
-        config.stake = tonumber(content:match('"stake"%s*:%s*(%d+)'))
-        config.seed = content:match('"seed"%s*:%s*"([^"]*)"')
-        
-        return config
+-- Sends a line to every connected API client, defined with the command channel below
+local broadcast
+
+-- Game updates run so far, counted by the main loop
+local frame_count = 0
+
+-- ---------------------------------------------------------------------------
+-- Game state export
+-- ---------------------------------------------------------------------------
+
+local STATE_FILE = os.getenv("BALATRO_STATE_FILE") or "/tmp/balatro_game_state.json"
+local STATE_INTERVAL = 0.1  -- Seconds between snapshots
+
+local ARRAY = {}  -- Metatable marking tables encoded as JSON arrays, even when empty
+
+local function array(t)
+    return setmetatable(t or {}, ARRAY)
+end
+
+local function json_string(s)
+    return '"' .. s:gsub('[%c"\\]', function(c)
+        if c == '"' then return '\\"' end
+        if c == '\\' then return '\\\\' end
+        if c == '\n' then return '\\n' end
+        return string.format('\\u%04x', c:byte())
+    end) .. '"'
+end
+
+local function json_encode(value)
+    local kind = type(value)
+    if value == nil then
+        return "null"
+    elseif kind == "boolean" then
+        return value and "true" or "false"
+    elseif kind == "number" then
+        if value ~= value or value == math.huge or value == -math.huge then return "null" end
+        if value == math.floor(value) and math.abs(value) < 1e15 then return string.format("%d", value) end
+        return string.format("%.6g", value)
+    elseif kind == "string" then
+        return json_string(value)
+    elseif kind == "table" then
+        local parts = {}
+        if getmetatable(value) == ARRAY or #value > 0 then
+            for i = 1, #value do parts[i] = json_encode(value[i]) end
+            return "[" .. table.concat(parts, ",") .. "]"
+        end
+        local keys = {}
+        for k in pairs(value) do keys[#keys + 1] = tostring(k) end
+        -- Sorted keys, so unchanged state encodes to the same string
+        table.sort(keys)
+        for i, k in ipairs(keys) do parts[i] = json_string(k) .. ":" .. json_encode(value[k]) end
+        return "{" .. table.concat(parts, ",") .. "}"
+    end
+    -- Big numbers from other mods and anything else
+    return json_string(tostring(value))
+end
+
+local function number(value)
+    if type(value) == "number" then return value end
+    return tonumber(tostring(value))
+end
+
+local function state_name()
+    if not (G and G.STATES) then return nil end
+    for name, id in pairs(G.STATES) do
+        if id == G.STATE then return name end
+    end
+    return tostring(G.STATE)
+end
+
+local function card_info(card)
+    local info = {
+        name = card.ability and card.ability.name,
+        key = card.config and card.config.center and card.config.center.key,
+        set = card.ability and card.ability.set,
+        edition = card.edition and card.edition.type or nil,
+    }
+    if card.base and card.base.value and card.ability and card.ability.set ~= "Joker" then
+        info.rank = card.base.value
+        info.suit = card.base.suit
+        info.enhancement = card.ability.name ~= "Default Base" and card.ability.name or nil
+        info.seal = card.seal
+    end
+    return info
+end
+
+local function area_cards(area, with_cost)
+    local cards = array()
+    if area and area.cards then
+        for _, card in ipairs(area.cards) do
+            local info = card_info(card)
+            if with_cost then info.cost = card.cost end
+            info.highlighted = card.highlighted or nil
+            cards[#cards + 1] = info
+        end
+    end
+    return cards
+end
+
+local function run_info()
+    local game = G.GAME
+    if not (game and game.current_round and game.round_resets) then return nil end
+    return {
+        hands = game.current_round.hands_left,
+        discards = game.current_round.discards_left,
+        money = number(game.dollars),
+        ante = game.round_resets.ante,
+        round = game.round,
+        blind = game.blind and game.blind.name or nil,
+        score = number(game.chips),
+        objective = game.blind and number(game.blind.chips) or nil,
+    }
+end
+
+local function poker_hand_info()
+    if not (G.hand and G.hand.highlighted and #G.hand.highlighted > 0 and G.FUNCS.get_poker_hand_info) then
+        return nil
+    end
+    local text = G.FUNCS.get_poker_hand_info(G.hand.highlighted)
+    local hand = text and G.GAME.hands and G.GAME.hands[text]
+    if not hand then return nil end
+    return { name = text, level = number(hand.level), chips = number(hand.chips), mult = number(hand.mult) }
+end
+
+local function focus_info()
+    local controller = G.CONTROLLER
+    if not controller then return nil end
+    local node = (controller.focused and controller.focused.target) or (controller.hovering and controller.hovering.target)
+    if not node then return nil end
+
+    if node.ability then
+        local info = card_info(node)
+        local area = node.area
+        info.area = (area == G.hand and "hand") or (area == G.jokers and "jokers") or (area == G.consumeables and "consumables")
+            or ((area == G.shop_jokers or area == G.shop_vouchers or area == G.shop_booster) and "shop") or "other"
+        return info
+    end
+    if node.config then
+        local text = node.config.text
+        return { button = node.config.button, text = type(text) == "string" and text or nil }
     end
     return nil
 end
 
--- Write simple status
-local function write_status(msg)
-    local file = io.open("/tmp/balatro_mod_status.json", "w")
+local function snapshot()
+    local state = {
+        state = state_name(),
+        run = run_info(),
+        jokers = area_cards(G.jokers),
+        consumables = area_cards(G.consumeables),
+        shop = array(),
+        hand = area_cards(G.hand),
+        poker_hand = poker_hand_info(),
+        focused = focus_info(),
+    }
+    for _, area in ipairs({ G.shop_jokers, G.shop_vouchers, G.shop_booster }) do
+        for _, item in ipairs(area_cards(area, true)) do state.shop[#state.shop + 1] = item end
+    end
+    return state
+end
+
+local state_seq = 0
+local state_elapsed = 0
+local last_state = nil
+
+local function export_state(dt)
+    state_elapsed = state_elapsed + dt
+    if state_elapsed < STATE_INTERVAL or not (G and G.GAME) then return end
+    state_elapsed = 0
+
+    local ok, encoded = pcall(function() return json_encode(snapshot()) end)
+    if not ok or encoded == last_state then return end
+    last_state = encoded
+    state_seq = state_seq + 1
+
+    local message = '{"seq":' .. state_seq .. ',"snapshot":' .. encoded .. '}'
+    broadcast('{"event":"state","frame":' .. frame_count .. ',' .. message:sub(2))
+
+    -- Write then rename, so readers never see a partial file
+    local file = io.open(STATE_FILE .. ".tmp", "w")
     if file then
-        file:write('{"status":"' .. msg .. '"}')
+        file:write(message)
         file:close()
+        os.rename(STATE_FILE .. ".tmp", STATE_FILE)
     end
 end
 
--- Main loop - check every frame
-local original_update = love.update
-love.update = function(dt)
-    if original_update then original_update(dt) end
-    
-    -- Check for config
-    local config = read_config()
-    
-    if config and config.auto_start then
-        if G then
-            -- Set deck if specified
-            if config.deck and G.P_CENTERS[config.deck] then
-                G.GAME.viewed_back = G.P_CENTERS[config.deck]
+-- ---------------------------------------------------------------------------
+-- UI geometry
+-- ---------------------------------------------------------------------------
+
+-- Card areas by the names the API uses
+local CARD_AREAS = {
+    { "hand", "hand" },
+    { "jokers", "jokers" },
+    { "consumables", "consumeables" },
+    { "shop_jokers", "shop_jokers" },
+    { "shop_vouchers", "shop_vouchers" },
+    { "shop_booster", "shop_booster" },
+    { "pack", "pack_cards" },
+}
+
+local function round(value)
+    return math.floor(value + 0.5)
+end
+
+-- Screen pixel box of a node from its game-unit transform
+local function screen_box(node, origin_x, origin_y)
+    local T = node.T
+    if not (T and T.x and T.w and T.w > 0 and T.h > 0) then return nil end
+    local scale = G.TILESCALE * G.TILESIZE
+    local x = origin_x + (T.x + G.ROOM.T.x) * scale
+    local y = origin_y + (T.y + G.ROOM.T.y) * scale
+    return {
+        x = round(x),
+        y = round(y),
+        w = round(T.w * scale),
+        h = round(T.h * scale),
+        center_x = round(x + T.w * scale / 2),
+        center_y = round(y + T.h * scale / 2),
+    }
+end
+
+local function node_text(node, parts)
+    local config = node.config or {}
+    if type(config.text) == "string" then
+        parts[#parts + 1] = config.text
+    elseif config.ref_table and config.ref_value and type(config.ref_table[config.ref_value]) == "string" then
+        parts[#parts + 1] = config.ref_table[config.ref_value]
+    end
+    for _, child in ipairs(node.children or {}) do node_text(child, parts) end
+    return parts
+end
+
+local function collect_buttons(node, elements, origin_x, origin_y)
+    if node.states and node.states.visible == false then return end
+    -- Disabled buttons have their button function cleared by the game
+    if node.config and node.config.button then
+        local element = screen_box(node, origin_x, origin_y)
+        if element then
+            local text = table.concat(node_text(node, {}), " ")
+            element.kind = "button"
+            element.button = node.config.button
+            element.id = node.config.id
+            element.name = text ~= "" and text or node.config.button
+            elements[#elements + 1] = element
+        end
+    end
+    for _, child in ipairs(node.children or {}) do collect_buttons(child, elements, origin_x, origin_y) end
+end
+
+local function ui_elements()
+    if not (G and G.ROOM and G.TILESCALE) then error("game not ready", 0) end
+
+    -- The game draws from the window's top-left corner, which may not be the screen's
+    local origin_x, origin_y = 0, 0
+    local ok, window_x, window_y = pcall(love.window.getPosition)
+    if ok and window_x then origin_x, origin_y = window_x, window_y end
+
+    local elements = array()
+    for _, area in ipairs(CARD_AREAS) do
+        local cards = G[area[2]] and G[area[2]].cards
+        for index, card in ipairs(cards or {}) do
+            local element = screen_box(card, origin_x, origin_y)
+            if element and not (card.states and card.states.visible == false) then
+                for key, value in pairs(card_info(card)) do element[key] = value end
+                element.kind = "card"
+                element.area = area[1]
+                element.index = index
+                element.cost = card.cost
+                element.highlighted = card.highlighted or nil
+                elements[#elements + 1] = element
             end
-            
-            if G.FUNCS and G.FUNCS.start_run then
-                -- Prepare arguments
-                local args = {
-                    stake = config.stake or 1,
-                    seed = (config.seed and config.seed ~= "random") and config.seed or nil
-                }
-                
-                G.FUNCS.start_run(nil, args)
-                write_status("started")
+        end
+    end
+
+    for _, box in ipairs(G.I and G.I.UIBOX or {}) do
+        if box.UIRoot and not (box.states and box.states.visible == false) then
+            collect_buttons(box.UIRoot, elements, origin_x, origin_y)
+        end
+    end
+
+    local width, height = love.graphics.getDimensions()
+    return {
+        state = state_name(),
+        window = { x = origin_x, y = origin_y, width = width, height = height },
+        elements = elements,
+    }
+end
+
+-- ---------------------------------------------------------------------------
+-- Game actions
+-- ---------------------------------------------------------------------------
+
+local function area_card(name, index)
+    for _, area in ipairs(CARD_AREAS) do
+        if area[1] == name then
+            local cards = G[area[2]] and G[area[2]].cards
+            local card = cards and cards[tonumber(index)]
+            if not card then error("no card " .. tostring(index) .. " in " .. name, 0) end
+            return card
+        end
+    end
+    error("unknown area: " .. tostring(name), 0)
+end
+
+local function find_button(node, name)
+    if node.states and node.states.visible == false then return nil end
+    if node.config and node.config.button == name then return node end
+    for _, child in ipairs(node.children or {}) do
+        local found = find_button(child, name)
+        if found then return found end
+    end
+    return nil
+end
+
+-- Press an enabled UI button by its function name, as a click on it would
+local function press_button(name)
+    for _, box in ipairs(G.I.UIBOX or {}) do
+        if box.UIRoot and not (box.states and box.states.visible == false) then
+            local node = find_button(box.UIRoot, name)
+            if node then
+                G.FUNCS[name](node)
+                return
+            end
+        end
+    end
+    error(name .. " is not available now", 0)
+end
+
+-- Run a card's button after the check that enables it in the UI, e.g. can_buy before buy_from_shop
+local function card_button(card, check, button)
+    local e = { config = { ref_table = card, button = button }, children = {} }
+    if G.FUNCS[check] then G.FUNCS[check](e) end
+    if not e.config.button then error(check .. " refused " .. tostring(card_info(card).name), 0) end
+    G.FUNCS[e.config.button](e)
+end
+
+-- Shop areas and the UI check and button used to buy from each
+local SHOP_BUTTONS = {
+    shop_jokers = { "can_buy", "buy_from_shop" },
+    shop_vouchers = { "can_redeem", "use_card" },
+    shop_booster = { "can_open", "use_card" },
+}
+
+local ACTIONS = {}
+
+ACTIONS.select_blind = function() press_button("select_blind") end
+ACTIONS.skip_blind = function() press_button("skip_blind") end
+ACTIONS.play = function() press_button("play_cards_from_highlighted") end
+ACTIONS.discard = function() press_button("discard_cards_from_highlighted") end
+ACTIONS.sort_rank = function() press_button("sort_hand_value") end
+ACTIONS.sort_suit = function() press_button("sort_hand_suit") end
+ACTIONS.cash_out = function() press_button("cash_out") end
+ACTIONS.reroll = function() press_button("reroll_shop") end
+ACTIONS.next_round = function() press_button("toggle_shop") end
+ACTIONS.skip_pack = function() press_button("skip_booster") end
+
+-- Highlight exactly the given hand cards (1-based indices)
+ACTIONS.highlight = function(args)
+    local cards = {}
+    for i, index in ipairs(args.indices or {}) do cards[i] = area_card("hand", index) end
+    G.hand:unhighlight_all()
+    for _, card in ipairs(cards) do G.hand:add_to_highlighted(card) end
+end
+
+ACTIONS.buy = function(args)
+    local area = args.area or "shop_jokers"
+    local buttons = SHOP_BUTTONS[area]
+    if not buttons then error("cannot buy from " .. tostring(area), 0) end
+    card_button(area_card(area, args.index), buttons[1], buttons[2])
+end
+
+ACTIONS.sell = function(args)
+    card_button(area_card(args.area or "jokers", args.index), "can_sell_card", "sell_card")
+end
+
+ACTIONS.use = function(args)
+    local area = args.area or "consumables"
+    local card = area_card(area, args.index)
+    -- Jokers and playing cards in packs are selected rather than used
+    local check = (area == "pack" and not card.ability.consumeable) and "can_select_card" or "can_use_consumeable"
+    card_button(card, check, "use_card")
+end
+
+local function run_action(args)
+    local action = ACTIONS[args.action]
+    if not action then error("unknown action: " .. tostring(args.action), 0) end
+    if not (G and G.FUNCS and G.CONTROLLER) then error("game not ready", 0) end
+    -- The UI ignores clicks while animations hold the controller lock
+    if G.CONTROLLER.locked then error("game busy", 0) end
+    action(args)
+    return { action = args.action, state = state_name() }
+end
+
+-- ---------------------------------------------------------------------------
+-- Lockstep
+-- ---------------------------------------------------------------------------
+
+local DEFAULT_STEP_DT = 1 / 60  -- Seconds of game time per stepped frame
+
+local lockstep = false
+local step_dt = DEFAULT_STEP_DT
+local frame_budget = 0    -- Updates the API allowed in lockstep
+local step_waiters = {}   -- Step commands waiting for their frames
+
+-- No queued events and no animation holding the controller
+local function is_idle()
+    if G.CONTROLLER and G.CONTROLLER.locked then return false end
+    for _, queue in pairs(G.E_MANAGER and G.E_MANAGER.queues or {}) do
+        if #queue > 0 then return false end
+    end
+    return true
+end
+
+local function step_result(waiter)
+    return { frame = frame_count, frames = frame_count - waiter.start, idle = is_idle(), state = state_name() }
+end
+
+-- Wait for frames to run, granting them when in lockstep. until_idle ends the wait early once the game is idle.
+local function add_step_waiter(frames, until_idle, client, respond)
+    local waiter = { start = frame_count, target = frame_count + frames, until_idle = until_idle, client = client, respond = respond }
+    step_waiters[#step_waiters + 1] = waiter
+    if lockstep then frame_budget = math.max(frame_budget, frames) end
+end
+
+-- Answer the step commands whose frames ran, called after each update
+local function check_step_waiters()
+    for i = #step_waiters, 1, -1 do
+        local waiter = step_waiters[i]
+        local idle = waiter.until_idle and frame_count > waiter.start and is_idle()
+        if idle or frame_count >= waiter.target then
+            table.remove(step_waiters, i)
+            -- Idle early, the rest of the budget is not needed anymore
+            if idle and #step_waiters == 0 then frame_budget = 0 end
+            waiter.respond(true, step_result(waiter))
+        end
+    end
+end
+
+-- Drop the step commands of a closed client, and run freely again once no client is left
+local function release_client(client, remaining_clients)
+    frame_budget = 0
+    for i = #step_waiters, 1, -1 do
+        local waiter = step_waiters[i]
+        if waiter.client == client then
+            table.remove(step_waiters, i)
+        elseif lockstep then
+            frame_budget = math.max(frame_budget, waiter.target - frame_count)
+        end
+    end
+    if remaining_clients == 0 then lockstep = false end
+end
+
+-- ---------------------------------------------------------------------------
+-- Input acknowledgement
+-- ---------------------------------------------------------------------------
+
+local TRIGGER_THRESHOLD = 0.5  -- Trigger travel that counts as pressed
+
+local input_seq = 0
+local triggers = {}
+
+local function push_input(kind, fields)
+    input_seq = input_seq + 1
+    fields.event = "input"
+    fields.kind = kind
+    fields.seq = input_seq
+    -- Love delivers events right before love.update, so the next game update consumes them
+    fields.frame = frame_count + 1
+    broadcast(json_encode(fields))
+end
+
+-- Report an input callback before passing it on to the game's handler
+local function hook_input(name, handler)
+    local original = love[name]
+    love[name] = function(...)
+        handler(...)
+        if original then return original(...) end
+    end
+end
+
+hook_input("gamepadpressed", function(_, button) push_input("gamepad_pressed", { button = button }) end)
+hook_input("gamepadreleased", function(_, button) push_input("gamepad_released", { button = button }) end)
+hook_input("mousepressed", function(x, y, button) push_input("mouse_pressed", { x = x, y = y, button = button }) end)
+hook_input("mousereleased", function(x, y, button) push_input("mouse_released", { x = x, y = y, button = button }) end)
+
+-- Triggers are axes, reported as buttons when they cross the threshold
+hook_input("gamepadaxis", function(_, axis, value)
+    if axis ~= "triggerleft" and axis ~= "triggerright" then return end
+    local pressed = value > TRIGGER_THRESHOLD
+    if pressed ~= (triggers[axis] or false) then
+        triggers[axis] = pressed
+        push_input(pressed and "gamepad_pressed" or "gamepad_released", { button = axis })
+    end
+end)
+
+-- ---------------------------------------------------------------------------
+-- Command channel
+-- ---------------------------------------------------------------------------
+
+local IPC_HOST = "127.0.0.1"
+local IPC_PORT = tonumber(os.getenv("BALATRO_MOD_PORT") or "") or 12346
+local MAX_LINE = 65536          -- Longest accepted request line
+local MAX_OUTPUT = 4 * 1048576  -- Clients that fall this far behind are dropped
+
+local socket_ok, socket = pcall(require, "socket")
+local server = nil
+local clients = {}
+local mod_status = "loading"
+
+-- Minimal JSON decoder for command messages
+local function json_decode(text)
+    local pos = 1
+    local decode_value
+
+    local function fail(what)
+        error(what .. " at position " .. pos, 0)
+    end
+
+    local function skip()
+        pos = text:find("[^ \t\r\n]", pos) or #text + 1
+    end
+
+    local function decode_string()
+        local parts = {}
+        pos = pos + 1
+        while true do
+            local stop = text:find('["\\]', pos)
+            if not stop then fail("unterminated string") end
+            parts[#parts + 1] = text:sub(pos, stop - 1)
+            pos = stop
+            if text:sub(pos, pos) == '"' then
+                pos = pos + 1
+                return table.concat(parts)
+            end
+            local escape = text:sub(pos + 1, pos + 1)
+            if escape == "u" then
+                local code = tonumber(text:sub(pos + 2, pos + 5), 16) or fail("invalid escape")
+                parts[#parts + 1] = code < 128 and string.char(code) or "?"
+                pos = pos + 6
+            else
+                local escapes = { b = "\b", f = "\f", n = "\n", r = "\r", t = "\t" }
+                parts[#parts + 1] = escapes[escape] or escape
+                pos = pos + 2
+            end
+        end
+    end
+
+    decode_value = function()
+        skip()
+        local c = text:sub(pos, pos)
+        if c == "{" then
+            local object = {}
+            pos = pos + 1
+            skip()
+            if text:sub(pos, pos) == "}" then
+                pos = pos + 1
+                return object
+            end
+            while true do
+                skip()
+                if text:sub(pos, pos) ~= '"' then fail("expected key") end
+                local key = decode_string()
+                skip()
+                if text:sub(pos, pos) ~= ":" then fail("expected ':'") end
+                pos = pos + 1
+                object[key] = decode_value()
+                skip()
+                local delimiter = text:sub(pos, pos)
+                pos = pos + 1
+                if delimiter == "}" then return object end
+                if delimiter ~= "," then fail("expected ',' or '}'") end
+            end
+        elseif c == "[" then
+            local list = array()
+            pos = pos + 1
+            skip()
+            if text:sub(pos, pos) == "]" then
+                pos = pos + 1
+                return list
+            end
+            while true do
+                list[#list + 1] = decode_value()
+                skip()
+                local delimiter = text:sub(pos, pos)
+                pos = pos + 1
+                if delimiter == "]" then return list end
+                if delimiter ~= "," then fail("expected ',' or ']'") end
+            end
+        elseif c == '"' then
+            return decode_string()
+        elseif text:find("^true", pos) then
+            pos = pos + 4
+            return true
+        elseif text:find("^false", pos) then
+            pos = pos + 5
+            return false
+        elseif text:find("^null", pos) then
+            pos = pos + 4
+            return nil
+        end
+        local literal = text:match("^-?%d+%.?%d*[eE]?[-+]?%d*", pos)
+        if not literal then fail("unexpected character") end
+        pos = pos + #literal
+        return tonumber(literal)
+    end
+
+    return decode_value()
+end
+
+local DEFER = {}  -- Returned by commands that answer later through their respond function
+
+local function send(client, message)
+    client.output = client.output .. message .. "\n"
+end
+
+broadcast = function(message)
+    for _, client in ipairs(clients) do send(client, message) end
+end
+
+local function set_status(status)
+    mod_status = status
+    broadcast('{"event":"status","status":' .. json_encode(status) .. '}')
+end
+
+-- Commands the API may send, each returns the result or raises an error
+local COMMANDS = {}
+
+COMMANDS.ping = function()
+    return { pong = true }
+end
+
+COMMANDS.status = function()
+    return { status = mod_status, state = state_name(), frame = frame_count, lockstep = lockstep }
+end
+
+COMMANDS.lockstep = function(args)
+    lockstep = args.enabled and true or false
+    step_dt = number(args.dt) or DEFAULT_STEP_DT
+    frame_budget = 0
+    if not lockstep then
+        -- Free running again, pending steps complete at normal speed
+        for _, waiter in ipairs(step_waiters) do waiter.until_idle = false end
+    end
+    return { lockstep = lockstep, dt = step_dt, frame = frame_count }
+end
+
+COMMANDS.step = function(args, respond, client)
+    local frames = math.floor(number(args.frames) or 1)
+    if frames < 1 then error("frames must be at least 1", 0) end
+    add_step_waiter(frames, false, client, respond)
+    return DEFER
+end
+
+COMMANDS.step_until_idle = function(args, respond, client)
+    if not (G and G.E_MANAGER) then error("game not ready", 0) end
+    local max_frames = math.floor(number(args.max_frames) or 600)
+    if max_frames < 1 then error("max_frames must be at least 1", 0) end
+    add_step_waiter(max_frames, true, client, respond)
+    return DEFER
+end
+
+COMMANDS.game_state = function()
+    return snapshot()
+end
+
+COMMANDS.ui_elements = function()
+    return ui_elements()
+end
+
+COMMANDS.action = function(args)
+    return run_action(args)
+end
+
+COMMANDS.auto_start = function(args)
+    if not (G and G.FUNCS and G.FUNCS.start_run) then
+        set_status("error")
+        error("game not ready", 0)
+    end
+
+    -- Set deck if specified
+    if args.deck and G.P_CENTERS[args.deck] then
+        G.GAME.viewed_back = G.P_CENTERS[args.deck]
+    end
+
+    G.FUNCS.start_run(nil, {
+        stake = args.stake or 1,
+        seed = (args.seed and args.seed ~= "random") and args.seed or nil
+    })
+    set_status("started")
+    return { started = true }
+end
+
+local function handle(client, line)
+    local ok, message = pcall(json_decode, line)
+    if not ok or type(message) ~= "table" then
+        send(client, '{"ok":false,"error":' .. json_encode("invalid message: " .. tostring(message)) .. '}')
+        return
+    end
+
+    local function respond(ok, value)
+        local response = { id = message.id, ok = ok }
+        if ok then response.result = value else response.error = tostring(value) end
+        send(client, json_encode(response))
+    end
+
+    local command = COMMANDS[message.cmd]
+    if not command then
+        respond(false, "unknown command: " .. tostring(message.cmd))
+        return
+    end
+    local success, result = pcall(command, message.args or {}, respond, client)
+    if not (success and result == DEFER) then respond(success, result) end
+end
+
+local function start_server()
+    if not socket_ok then
+        print("[AutoStartGame] luasocket not available, command channel disabled")
+        return
+    end
+    local err
+    server, err = socket.bind(IPC_HOST, IPC_PORT)
+    if not server then
+        print("[AutoStartGame] Cannot listen on " .. IPC_HOST .. ":" .. IPC_PORT .. ": " .. tostring(err))
+        return
+    end
+    server:settimeout(0)
+end
+
+-- Accept clients, run their commands and flush pending output, never blocking the frame
+local function poll_clients()
+    if not server then return end
+
+    while true do
+        local sock = server:accept()
+        if not sock then break end
+        sock:settimeout(0)
+        sock:setoption("tcp-nodelay", true)
+        local client = { sock = sock, buffer = "", output = "" }
+        clients[#clients + 1] = client
+        send(client, '{"event":"status","status":' .. json_encode(mod_status) .. '}')
+    end
+
+    for i = #clients, 1, -1 do
+        local client = clients[i]
+        local closed = false
+
+        while true do
+            local line, err, partial = client.sock:receive("*l")
+            if line then
+                handle(client, client.buffer .. line)
+                client.buffer = ""
             else
-                write_status("error")
+                client.buffer = client.buffer .. (partial or "")
+                closed = err == "closed" or #client.buffer > MAX_LINE
+                break
             end
         end
+
+        if not closed and #client.output > 0 then
+            local sent, err, last = client.sock:send(client.output)
+            client.output = client.output:sub((sent or last or 0) + 1)
+            closed = err == "closed" or #client.output > MAX_OUTPUT
+        end
+
+        if closed then
+            client.sock:close()
+            table.remove(clients, i)
+            release_client(client, #clients)
+        end
+    end
+end
+
+-- Main loop - poll the command channel every frame and run the game unless lockstep holds it
+local original_update = love.update
+love.update = function(dt)
+    poll_clients()
+
+    if lockstep then
+        if frame_budget > 0 then
+            frame_budget = frame_budget - 1
+            dt = step_dt
+        else
+            dt = nil
+        end
+    end
+
+    if dt then
+        if original_update then original_update(dt) end
+        frame_count = frame_count + 1
+        check_step_waiters()
+        export_state(dt)
     end
 end
 
-write_status("ready")
+start_server()
+set_status("ready")
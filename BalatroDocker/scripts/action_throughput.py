@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Measure how many verified actions per second the stack can sustain.
+
+Drives a scripted menu-navigation loop through /act: every step presses one
+button and waits until the screen changes. A step counts as verified when a
+changed frame came back before the timeout. Run it on a screen where the
+buttons move the selection back and forth (e.g. the main menu or a shop),
+so the loop never leaves the screen it started on.
+
+Usage:
+    python action_throughput.py [--url http://localhost:8000] [--buttons "RIGHT LEFT"] [--steps 50]
+"""
+import argparse
+import statistics
+import time
+
+import requests
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of samples."""
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def act(url, button, delay, timeout_ms):
+    """Press one button through /act and wait for the screen to change."""
+    payload = {
+        "gamepad": {"buttons": button, "duration": 0.05, "delay": delay, "wait_mode": "delay"},
+        "settle": "changed",
+        "timeout_ms": timeout_ms,
+        "image": False,
+    }
+    response = requests.post(f"{url}/act", json=payload, timeout=30)
+    response.raise_for_status()
+    return response.json()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--buttons", default="RIGHT LEFT", help="Buttons cycled through, one per step")
+    parser.add_argument("--steps", type=int, default=50)
+    parser.add_argument("--delay", type=float, default=0.0, help="Gamepad delay after each press in seconds")
+    parser.add_argument("--timeout-ms", type=int, default=1000, help="Maximum wait for a changed frame per step")
+    parser.add_argument("--latency", action="store_true", help="Also run /diagnostics/latency before the loop")
+    args = parser.parse_args()
+
+    if args.latency:
+        probe = requests.get(f"{args.url}/diagnostics/latency", params={"buttons": args.buttons}, timeout=300).json()
+        for path, summary in probe["paths"].items():
+            if summary.get("samples"):
+                print(f"{path}: p50={summary['p50_ms']:.1f} ms p95={summary['p95_ms']:.1f} ms "
+                      f"timeouts={summary['timeouts']}/{summary['trials']}")
+            else:
+                print(f"{path}: {summary.get('status')} (no changed frames)")
+
+    buttons = args.buttons.split()
+    round_trips, reactions = [], []
+    verified = 0
+
+    start = time.perf_counter()
+    for step in range(args.steps):
+        step_start = time.perf_counter()
+        result = act(args.url, buttons[step % len(buttons)], args.delay, args.timeout_ms)
+        round_trips.append((time.perf_counter() - step_start) * 1000)
+
+        if result["changed"]:
+            verified += 1
+            reactions.append(result["action_ms"] + result["settle"]["waited_ms"])
+    elapsed = time.perf_counter() - start
+
+    print(f"Steps: {args.steps} in {elapsed:.2f} s, verified: {verified} ({verified / elapsed:.2f} verified actions/s)")
+    print(
+        f"Round trip: p50={percentile(round_trips, 50):.1f} ms "
+        f"p95={percentile(round_trips, 95):.1f} ms "
+        f"mean={statistics.mean(round_trips):.1f} ms"
+    )
+    if reactions:
+        print(
+            f"Press to changed frame: p50={percentile(reactions, 50):.1f} ms "
+            f"p95={percentile(reactions, 95):.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Measure API responsiveness while a long gamepad sequence is running.
+
+Fires a multi-button /gamepad/buttons request in the background and keeps
+polling /health and /screenshot meanwhile. With blocking work kept off the
+event loop, the poll latencies stay flat for the whole sequence instead of
+stalling until the buttons are done.
+
+Usage:
+    python event_loop_lag.py [--url http://localhost:8000] [--buttons "DOWN DOWN DOWN A"]
+"""
+import argparse
+import statistics
+import threading
+import time
+
+import requests
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of samples."""
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def poll(url, samples, stop_event, interval):
+    """Time GET requests against url until stop_event is set."""
+    while not stop_event.is_set():
+        start = time.perf_counter()
+        requests.get(url, timeout=30).raise_for_status()
+        samples.append((time.perf_counter() - start) * 1000)
+        stop_event.wait(interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--buttons", default="DOWN DOWN DOWN DOWN UP UP UP UP")
+    parser.add_argument("--interval", type=float, default=0.05, help="Seconds between polls")
+    args = parser.parse_args()
+
+    stop_event = threading.Event()
+    results = {"/health": [], "/screenshot": []}
+    pollers = [
+        threading.Thread(target=poll, args=(f"{args.url}{path}", samples, stop_event, args.interval))
+        for path, samples in results.items()
+    ]
+    for poller in pollers:
+        poller.start()
+
+    start = time.perf_counter()
+    response = requests.post(f"{args.url}/gamepad/buttons", json={"buttons": args.buttons}, timeout=120)
+    sequence_ms = (time.perf_counter() - start) * 1000
+
+    stop_event.set()
+    for poller in pollers:
+        poller.join()
+
+    print(f"Gamepad sequence '{args.buttons}': {response.status_code} in {sequence_ms:.0f} ms")
+    for path, samples in results.items():
+        if not samples:
+            print(f"{path}: no samples")
+            continue
+        print(
+            f"{path}: n={len(samples)} "
+            f"p50={percentile(samples, 50):.1f} ms "
+            f"p95={percentile(samples, 95):.1f} ms "
+            f"max={max(samples):.1f} ms "
+            f"mean={statistics.mean(samples):.1f} ms"
+        )
+
+    health = requests.get(f"{args.url}/health", timeout=5).json()
+    print(f"Server-side event loop lag: {health.get('event_loop_lag_ms')}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Act-and-observe controller: run one input action, wait for the screen and return the resulting frame.
+"""
+import asyncio
+import base64
+import time
+from typing import Dict, Any, Optional, Tuple
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+
+from api.controllers import gamepad_controller, mouse_controller
+from api.controllers.screenshot_controller import _register_transform, _resolve_capture_region, _resize_and_encode
+from api.models.requests import ActRequest
+from api.utils.change_detection import ScreenWaiter, wait_for_screen
+from api.utils.frame_buffer import Frame, frame_buffer
+from api.utils.image_processing import draw_point, MEDIA_TYPES
+from api.utils.screen_capture import get_pointer_position
+
+# Request field -> controller function performing that action
+ACTIONS = {
+    "gamepad": gamepad_controller.press_gamepad_button,
+    "sequence": gamepad_controller.run_gamepad_sequence,
+    "click": mouse_controller.mouse_click,
+    "move": mouse_controller.mouse_move,
+    "drag": mouse_controller.mouse_drag,
+    "gestures": mouse_controller.mouse_gestures,
+}
+
+
+def _render_frame(
+    frame: Frame,
+    request: ActRequest,
+    region: Optional[Tuple[int, int, int, int]],
+    cursor: Optional[Tuple[int, int]]
+) -> Dict[str, Any]:
+    """Crop, mark the cursor on and encode the observed frame as a data URL."""
+    img = frame.image
+    origin_x, origin_y = region[:2] if region else (0, 0)
+    if region:
+        x, y, width, height = region
+        img = img.crop((x, y, x + width, y + height))
+    if cursor:
+        # Buffered frames are shared between requests, crops are already private copies
+        img = draw_point(img if region else img.copy(), [cursor[0] - origin_x, cursor[1] - origin_y], "green")
+
+    (width, height), img_bytes = _resize_and_encode(img, request.frame)
+    transform = _register_transform(region, img.size, (width, height))
+    media_type = MEDIA_TYPES[request.frame.format]
+    return {
+        "screenshot": f"data:{media_type};base64,{base64.b64encode(img_bytes).decode('utf-8')}",
+        "width": width,
+        "height": height,
+        "format": request.frame.format,
+        "transform": transform.to_dict(),
+    }
+
+
+async def act(request: ActRequest) -> Dict[str, Any]:
+    """Run a gamepad or mouse action, wait according to the settle policy and return the resulting frame."""
+    names = [name for name in ACTIONS if getattr(request, name) is not None]
+    if len(names) != 1:
+        raise HTTPException(status_code=400, detail=f"Exactly one action is required, one of: {', '.join(ACTIONS)}")
+    name = names[0]
+    action = getattr(request, name)
+
+    if name == "gamepad" and not action.wait:
+        raise HTTPException(status_code=400, detail="Queued gamepad actions (wait=false) cannot be observed")
+
+    region = await _resolve_capture_region(request.frame.region)
+
+    try:
+        # A fresh frame, so anything that differs afterwards was caused by the action
+        reference = await run_in_threadpool(frame_buffer.get, 0)
+
+        started = time.perf_counter()
+        result = await ACTIONS[name](action)
+        action_ms = (time.perf_counter() - started) * 1000
+
+        settle_started = time.perf_counter()
+        if request.delay_ms:
+            await asyncio.sleep(request.delay_ms / 1000)
+
+        if request.settle == "delay":
+            waiter = ScreenWaiter(reference, "changed", threshold=request.threshold)
+            frame = await run_in_threadpool(frame_buffer.get, 0)
+            await run_in_threadpool(waiter.update, frame)
+            status = "delay"
+        else:
+            # The stable window starts once the action is done, not at the reference frame
+            waiter = ScreenWaiter(reference, request.settle, request.settle_ms, request.threshold,
+                                  stable_since=time.monotonic())
+            status = await wait_for_screen(frame_buffer, waiter, request.timeout_ms, request.poll_ms)
+        settle_ms = (time.perf_counter() - settle_started) * 1000
+
+        boxes = await run_in_threadpool(waiter.changed_boxes)
+        frame = waiter.last
+
+        response = {
+            "status": "success",
+            "action": name,
+            "result": result,
+            "settle": {"policy": request.settle, "status": status, "waited_ms": round(settle_ms, 2)},
+            "action_ms": round(action_ms, 2),
+            "changed": bool(boxes),
+            "changed_boxes": boxes,
+            "reference_frame_id": reference.frame_id,
+            "frame_id": frame.frame_id,
+            "frame_timestamp": frame.timestamp,
+            "region": region,
+        }
+
+        cursor = None
+        if request.cursor:
+            cursor = await run_in_threadpool(get_pointer_position)
+            response["cursor"] = {"x": cursor[0], "y": cursor[1]}
+
+        if request.image:
+            response.update(await run_in_threadpool(_render_frame, frame, request, region, cursor))
+        return response
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Act error: {e}")
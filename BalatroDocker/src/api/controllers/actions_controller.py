@@ -0,0 +1,17 @@
+"""
+Action journal controller for querying recent input actions.
+"""
+from typing import Dict, Any
+
+from api.utils.action_journal import action_journal
+
+
+async def get_actions(since: int = 0, limit: int = 100) -> Dict[str, Any]:
+    """Get journaled actions newer than the given action id."""
+    actions = action_journal.since(since, limit)
+    return {
+        "status": "success",
+        "actions": actions,
+        "last_action_id": action_journal.last_action_id,
+        "capacity": action_journal.capacity
+    }
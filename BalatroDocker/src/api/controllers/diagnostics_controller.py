@@ -0,0 +1,97 @@
+"""
+Diagnostics controller for measuring input-to-photon latency of the input paths.
+"""
+import asyncio
+from typing import Dict, Any, List, Tuple
+from fastapi import HTTPException
+
+from api.controllers.gamepad_controller import gamepad_controller, gamepad_queue, VALID_BUTTONS
+from api.models.requests import LatencyProbeRequest
+from api.utils.executors import mouse_executor, run_in_executor
+from api.utils.frame_buffer import frame_buffer
+from api.utils.latency_probe import measure_input_latency, summarize_latencies, wait_until_settled
+from api.utils.mouse_backend import mouse_backends
+
+LATENCY_PATHS = ("uinput", "xtest", "pyautogui")
+
+
+def _probe_gamepad(buttons: List[str], request: LatencyProbeRequest) -> List[Dict[str, Any]]:
+    """Press the buttons in turn on the gamepad queue thread and time each one."""
+    gamepad_controller.focus_balatro_window()
+    trials = []
+    for trial in range(request.trials):
+        button = buttons[trial % len(buttons)]
+        wait_until_settled(frame_buffer)
+        result = measure_input_latency(
+            frame_buffer,
+            lambda: gamepad_controller.set_buttons([button], True),
+            lambda: gamepad_controller.set_buttons([button], False),
+            request.hold_ms,
+            request.timeout_ms,
+            request.threshold
+        )
+        trials.append(dict(result, input=button))
+    return trials
+
+
+def _probe_mouse(backend, points: List[Tuple[int, int]], request: LatencyProbeRequest) -> List[Dict[str, Any]]:
+    """Move the pointer between the points on the mouse worker thread and time each move."""
+    trials = []
+    for trial in range(request.trials):
+        x, y = points[trial % len(points)]
+        wait_until_settled(frame_buffer)
+        result = measure_input_latency(
+            frame_buffer,
+            lambda: backend.move(x, y),
+            timeout_ms=request.timeout_ms,
+            threshold=request.threshold
+        )
+        trials.append(dict(result, input=[x, y]))
+    return trials
+
+
+def _probe_points(request: LatencyProbeRequest, screen_size: Tuple[int, int]) -> List[Tuple[int, int]]:
+    """Pointer positions alternated between mouse trials."""
+    width, height = screen_size
+    first = (request.x1 if request.x1 is not None else width // 2 - width // 8,
+             request.y1 if request.y1 is not None else height // 2)
+    second = (request.x2 if request.x2 is not None else width // 2 + width // 8,
+              request.y2 if request.y2 is not None else height // 2)
+    return [first, second]
+
+
+async def measure_latency(request: LatencyProbeRequest) -> Dict[str, Any]:
+    """Measure input-to-photon latency percentiles for the requested input paths."""
+    paths = [path.strip().lower() for path in request.paths.split(",") if path.strip()]
+    for path in paths:
+        if path not in LATENCY_PATHS:
+            raise HTTPException(status_code=400, detail=f"Invalid path '{path}'. Valid paths: {', '.join(LATENCY_PATHS)}")
+
+    buttons = [button.upper() for button in request.buttons.split()]
+    if not buttons or any(button not in VALID_BUTTONS for button in buttons):
+        raise HTTPException(status_code=400, detail=f"Invalid buttons: {request.buttons}")
+
+    results = {}
+    try:
+        for path in paths:
+            if path == "uinput":
+                if not gamepad_controller.native_gamepad:
+                    results[path] = {"status": "unavailable"}
+                    continue
+                # Queued like any other gamepad action so the probe never interleaves with agent input
+                job = gamepad_queue.submit(_probe_gamepad, buttons, request, description={"latency_probe": buttons})
+                trials = await asyncio.wrap_future(job.future)
+            else:
+                backend = mouse_backends.get(path)
+                if backend is None:
+                    results[path] = {"status": "unavailable"}
+                    continue
+                points = _probe_points(request, backend.screen_size)
+                trials = await run_in_executor(mouse_executor, _probe_mouse, backend, points, request)
+
+            results[path] = dict(summarize_latencies(trials), status="success", trials_detail=trials)
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Latency probe error: {e}")
+
+    return {"status": "success", "paths": results}
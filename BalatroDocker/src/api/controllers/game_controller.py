@@ -3,19 +3,28 @@ Game management controller for starting/stopping Balatro and managing game state
 """
 import os
 import subprocess
-import json
 import time
 from typing import Optional, Dict, Any
 from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
 
+from api.controllers.gamepad_controller import gamepad_controller
 from api.utils.config import get_config
-from api.models.requests import AutoStartRequest
+from api.utils.game_state import get_game_state_path
+from api.utils.mod_client import mod_client, ModCommandError
+from api.models.requests import AutoStartRequest, GameActionRequest
+from api.utils.action_journal import run_journaled
 
 # Global game state
 balatro_running = False
 balatro_process: Optional[subprocess.Popen] = None
 
 
+def is_balatro_running() -> bool:
+    """Whether the Balatro process started by the API is alive."""
+    return balatro_process is not None and balatro_process.poll() is None
+
+
 async def start_balatro() -> Dict[str, Any]:
     """Start Balatro with mods using Lovely."""
     global balatro_process
@@ -33,11 +42,20 @@ async def start_balatro() -> Dict[str, Any]:
         env = dict(os.environ, 
                   DISPLAY=":0", 
                   LD_PRELOAD=config['LOVELY_PRELOAD'],
-                  LOVELY_MOD_DIR=config['LOVELY_MODS_DIR'])
+                  LOVELY_MOD_DIR=config['LOVELY_MODS_DIR'],
+                  BALATRO_MOD_PORT=str(mod_client.port),
+                  BALATRO_STATE_FILE=get_game_state_path())
         
         if not os.path.exists(config['LOVELY_MODS_DIR']):
             os.makedirs(config['LOVELY_MODS_DIR'], exist_ok=True)
         
+        # The new game opens a new window and exports its own state
+        gamepad_controller.invalidate_balatro_window()
+        try:
+            os.remove(get_game_state_path())
+        except FileNotFoundError:
+            pass
+        
         balatro_process = subprocess.Popen(
             cmd,
             stdout=subprocess.PIPE,
@@ -58,6 +76,16 @@ async def start_balatro() -> Dict[str, Any]:
         raise HTTPException(status_code=500, detail=f"Error starting Balatro: {e}")
 
 
+def _terminate_process(process: subprocess.Popen):
+    """Terminate a process, killing it if it does not exit in time."""
+    process.terminate()
+    try:
+        process.wait(timeout=5)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
 async def stop_balatro() -> Dict[str, Any]:
     """Stop Balatro game."""
     global balatro_process
@@ -69,16 +97,13 @@ async def stop_balatro() -> Dict[str, Any]:
         if balatro_process.poll() is not None:
             return {"status": "already_stopped"}
         
-        balatro_process.terminate()
-        try:
-            balatro_process.wait(timeout=5)
-        except subprocess.TimeoutExpired:
-            balatro_process.kill()
-            balatro_process.wait()
+        # Waiting for the process to exit can take seconds, keep it off the event loop
+        await run_in_threadpool(_terminate_process, balatro_process)
         
         global balatro_running
         balatro_running = False
         balatro_process = None
+        gamepad_controller.invalidate_balatro_window()
         
         return {"status": "stopped"}
         
@@ -87,29 +112,60 @@ async def stop_balatro() -> Dict[str, Any]:
 
 
 async def auto_start_game(request: AutoStartRequest) -> Dict[str, Any]:
-    """Configure and trigger auto-start with specific deck, stake, and seed."""
+    """Start a run with specific deck, stake, and seed through the mod's command channel."""
+    config = {
+        "deck": request.deck,
+        "stake": request.stake,
+        "seed": request.seed if request.seed else "random"
+    }
+    settings = get_config()
+
     try:
-        config = {
-            "auto_start": True,
-            "deck": request.deck,
-            "stake": request.stake,
-            "seed": request.seed if request.seed else "random"
-        }
-        
-        with open("/tmp/balatro_auto_start.json", "w") as f:
-            json.dump(config, f)
-        
-        return {"status": "success", "config": config}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error: {e}")
+        # The game may still be loading right after /start_balatro
+        result = await mod_client.call(
+            "auto_start", config,
+            timeout=float(settings.get('MOD_COMMAND_TIMEOUT_S', 2)),
+            connect_timeout=float(settings.get('MOD_CONNECT_TIMEOUT_S', 30))
+        )
+    except ConnectionError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except TimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except ModCommandError as e:
+        raise HTTPException(status_code=409, detail=f"Mod could not start the run: {e}")
+
+    return {"status": "success", "config": config, "result": result}
 
 
 async def get_mod_status() -> Dict[str, Any]:
     """Get current mod status."""
+    if not mod_client.connected:
+        return {"status": "no_status", "connected": False, "last_status": mod_client.status}
+    return {"status": mod_client.status or "no_status", "connected": True, "frame": mod_client.frame}
+
+
+# Arguments each game action needs
+ACTION_ARGUMENTS = {"highlight": ("indices",), "buy": ("index",), "sell": ("index",), "use": ("index",)}
+
+
+async def game_action(request: GameActionRequest) -> Dict[str, Any]:
+    """Run a whitelisted game action in the mod, calling the game's own functions instead of emulating input."""
+    missing = [name for name in ACTION_ARGUMENTS.get(request.action, ()) if getattr(request, name) is None]
+    if missing:
+        raise HTTPException(status_code=400, detail=f"Action '{request.action}' requires: {', '.join(missing)}")
+
+    args = request.model_dump(exclude={"step_id"}, exclude_none=True)
+
+    async def run() -> Dict[str, Any]:
+        started = time.perf_counter()
+        result = await mod_client.call("action", args)
+        return {"status": "success", **result, "action_ms": round((time.perf_counter() - started) * 1000, 2)}
+
     try:
-        with open("/tmp/balatro_mod_status.json", "r") as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return {"status": "no_status"}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error: {e}")
+        return await run_journaled("game_action", args, request.step_id, run)
+    except ConnectionError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except TimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except ModCommandError as e:
+        raise HTTPException(status_code=409, detail=f"Action not possible: {e}")
@@ -1,61 +1,294 @@
 """
 Gamepad input controller for handling button presses and game control.
 """
+import asyncio
 import time
-from typing import Dict, Any
+from typing import Dict, Any, List
 from fastapi import HTTPException
 
-from api.models.requests import GamepadButtonsRequest
+from api.models.requests import GamepadButtonsRequest, GamepadSequenceRequest, GamepadStep
+from api.utils.action_journal import action_journal, replay, run_journaled
+from api.utils.action_queue import ActionQueue, sleep_until
+from api.utils.change_detection import ScreenWaiter, wait_for_screen_sync
+from api.utils.config import get_config
+from api.utils.frame_buffer import frame_buffer
 from api.utils.gamepad_controller import BalatroGamepadController
-
-# Global state for actions tracking
-ACTIONS_DONE = {}
+from api.utils.mod_client import mod_client
 
 # Initialize gamepad controller
 gamepad_controller = BalatroGamepadController()
 
+# All gamepad actions run in order on one dedicated thread
+gamepad_queue = ActionQueue("gamepad")
+
+VALID_BUTTONS = [
+    'A', 'B', 'X', 'Y', 'LB', 'RB', 'LT', 'RT',
+    'START', 'BACK', 'SELECT', 'UP', 'DOWN', 'LEFT', 'RIGHT'
+]
+
+# Button names as Love reports them to the mod
+LOVE_BUTTONS = {
+    'A': 'a', 'B': 'b', 'X': 'x', 'Y': 'y', 'LB': 'leftshoulder', 'RB': 'rightshoulder',
+    'LT': 'triggerleft', 'RT': 'triggerright', 'START': 'start', 'BACK': 'back', 'SELECT': 'back',
+    'UP': 'dpup', 'DOWN': 'dpdown', 'LEFT': 'dpleft', 'RIGHT': 'dpright'
+}
+
+# Floor for the wait after each press, the game drops inputs that come faster
+MIN_PRESS_DELAY = float(get_config().get('GAMEPAD_MIN_PRESS_DELAY_MS', 50)) / 1000
+
+# Maximum wait for the game to report an injected input in ack mode
+INPUT_ACK_TIMEOUT = float(get_config().get('INPUT_ACK_TIMEOUT_MS', 500)) / 1000
+
+# Polling interval while waiting for the screen to settle
+SETTLE_POLL_MS = 50
+
+
+def _wait_for_settle(settle_ms: int, timeout_ms: int) -> str:
+    """Block until the screen has not changed for settle_ms, or timeout_ms passes."""
+    waiter = ScreenWaiter(frame_buffer.get(max_age_ms=0), "stable", settle_ms)
+    return wait_for_screen_sync(frame_buffer, waiter, timeout_ms, SETTLE_POLL_MS)
+
+
+def _press_buttons(
+    buttons: List[str],
+    duration: float,
+    delays: List[float],
+    wait_mode: str,
+    settle_ms: int,
+    settle_timeout_ms: int
+) -> Dict[str, Any]:
+    """Press buttons in order on the gamepad queue thread, stopping at the first error."""
+    presses = []
+    result = None
+
+    for button, delay in zip(buttons, delays):
+        # Registered before the press so the game's report cannot be missed
+        expected = None
+        if wait_mode == "ack":
+            love_button = {"button": LOVE_BUTTONS[button]}
+            expected = mod_client.expect_inputs([("gamepad_pressed", love_button), ("gamepad_released", love_button)])
+
+        started = time.perf_counter()
+        try:
+            result = gamepad_controller.press_button(button, duration)
+        except Exception:
+            if expected:
+                mod_client.drop_inputs(expected)
+            raise
+        released = time.perf_counter()
+
+        if result["status"] == "error":
+            # Otherwise they would take the game's report of the next press of this button
+            if expected:
+                mod_client.drop_inputs(expected)
+            break
+
+        ack = mod_client.wait_inputs(expected, INPUT_ACK_TIMEOUT) if expected else None
+        if ack and ack["acknowledged"]:
+            # The game has seen the release, the minimum delay guessed at that
+            sleep_until(time.perf_counter() + delay)
+        else:
+            sleep_until(released + max(delay, MIN_PRESS_DELAY))
+        settle = _wait_for_settle(settle_ms, settle_timeout_ms) if wait_mode == "settle" else None
+
+        presses.append({
+            "button": button,
+            "press_ms": round((released - started) * 1000, 2),
+            "wait_ms": round((time.perf_counter() - released) * 1000, 2),
+            "settle": settle,
+            "ack": ack,
+        })
+
+    return {"result": result, "presses": presses}
+
+
+def _press_delays(request: GamepadButtonsRequest, count: int) -> List[float]:
+    """Per-press delays from the request."""
+    if request.delays is None:
+        return [request.delay] * count
+    if len(request.delays) != count:
+        raise HTTPException(status_code=400, detail=f"Expected {count} delays, got {len(request.delays)}")
+    if any(delay < 0 for delay in request.delays):
+        raise HTTPException(status_code=400, detail="Delays must be non-negative")
+    return request.delays
+
 
 async def press_gamepad_button(request: GamepadButtonsRequest) -> Dict[str, Any]:
     """Press one or more gamepad buttons."""
-    global gamepad_controller
-
-    buttons = request.buttons.split()
+    buttons = [button.strip().upper() for button in request.buttons.split()]
     if not buttons:
         raise HTTPException(status_code=400, detail="No buttons specified")
-    
-    valid_buttons = [
-        'A', 'B', 'X', 'Y', 'LB', 'RB', 'LT', 'RT',
-        'START', 'BACK', 'SELECT', 'UP', 'DOWN', 'LEFT', 'RIGHT'
-    ]
-    
-    result = None
-    success = True
 
     for button in buttons:
-        button = button.strip().upper()
-        if button not in valid_buttons:
+        if button not in VALID_BUTTONS:
             raise HTTPException(status_code=400, detail=f"Invalid button: {button}")
-        
-        result = gamepad_controller.press_button(button, request.duration)
-        
-        time.sleep(1)  # Wait between button presses
-    
+
+    delays = _press_delays(request, len(buttons))
+
+    if not request.wait:
+        return await _queue_gamepad_buttons(request, buttons, delays)
+
+    async def press() -> Dict[str, Any]:
+        job = gamepad_queue.submit(
+            _press_buttons,
+            buttons,
+            request.duration,
+            delays,
+            request.wait_mode,
+            request.settle_ms,
+            request.settle_timeout_ms,
+            description={"buttons": buttons}
+        )
+        try:
+            outcome = await asyncio.wrap_future(job.future)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Gamepad error: {e}")
+
+        result = outcome["result"]
         if result["status"] == "error":
-            success = False
-            break
-            
-    # Store action in global state for tracking
-    if request.step_id:
-        ACTIONS_DONE[request.step_id] = {
-            "buttons": buttons,
-            "timestamp": time.time(),
-            "success": success,
+            raise HTTPException(status_code=400, detail=result["message"])
+
+        return {
+            "status": "success",
+            "message": f"{buttons} pressed",
+            "job_id": job.job_id,
+            "presses": outcome["presses"],
         }
 
-    if result["status"] == "error":
-        raise HTTPException(status_code=400, detail=result["message"])
-    
+    return await run_journaled("gamepad_buttons", {"buttons": buttons}, request.step_id, press)
+
+
+async def _queue_gamepad_buttons(request: GamepadButtonsRequest, buttons: List[str], delays: List[float]) -> Dict[str, Any]:
+    """Queue a button sequence and return its job id, journaling it once it completes."""
+    record, is_new = action_journal.begin("gamepad_buttons", {"buttons": buttons}, request.step_id)
+    if not is_new:
+        return await replay(record)
+
+    job = gamepad_queue.submit(
+        _press_buttons,
+        buttons,
+        request.duration,
+        delays,
+        request.wait_mode,
+        request.settle_ms,
+        request.settle_timeout_ms,
+        description={"buttons": buttons}
+    )
+    record.job_id = job.job_id
+    response = {
+        "status": "queued",
+        "job_id": job.job_id,
+        "action_id": record.action_id,
+        "pending": gamepad_queue.pending(),
+    }
+
+    def finish(future):
+        success = future.exception() is None and future.result()["result"]["status"] != "error"
+        action_journal.finish(record, success, response)
+
+    job.future.add_done_callback(finish)
+    return response
+
+
+def _run_sequence(steps: List[GamepadStep], release_all: bool) -> Dict[str, Any]:
+    """Run a sequence script on the gamepad queue thread, stopping at the first error."""
+    gamepad_controller.focus_balatro_window()
+
+    held = set()
+    timings = []
+    result = {"status": "success"}
+    started = time.perf_counter()
+
+    for index, step in enumerate(steps):
+        buttons = [button.upper() for button in step.buttons]
+
+        for repetition in range(step.repeat):
+            step_start = time.perf_counter()
+
+            if step.action == "release":
+                result = gamepad_controller.set_buttons(buttons, False)
+                held.difference_update(buttons)
+            else:
+                result = gamepad_controller.set_buttons(buttons, True, step.value)
+                if step.action == "hold":
+                    held.update(buttons)
+                elif result["status"] != "error":
+                    sleep_until(step_start + step.duration)
+                    result = gamepad_controller.set_buttons(buttons, False)
+
+            if result["status"] == "error":
+                break
+
+            emitted = time.perf_counter()
+            # Taps respect the minimum delay, holds and releases may chain immediately into chords
+            delay = max(step.delay, MIN_PRESS_DELAY) if step.action == "tap" else step.delay
+            sleep_until(emitted + delay)
+
+            timings.append({
+                "step": index,
+                "repeat": repetition,
+                "buttons": buttons,
+                "action": step.action,
+                "start_ms": round((step_start - started) * 1000, 2),
+                "emit_ms": round((emitted - step_start) * 1000, 2),
+                "wait_ms": round((time.perf_counter() - emitted) * 1000, 2),
+            })
+
+        if result["status"] == "error":
+            break
+
+    released = []
+    if release_all and held:
+        released = sorted(held)
+        gamepad_controller.set_buttons(released, False)
+
     return {
-        "status": "success",
-        "message": f"{buttons} pressed",
+        "result": result,
+        "steps": timings,
+        "released": released,
+        "total_ms": round((time.perf_counter() - started) * 1000, 2),
     }
+
+
+async def run_gamepad_sequence(request: GamepadSequenceRequest) -> Dict[str, Any]:
+    """Run a scripted gamepad sequence with chords, holds and repeats in one request."""
+    for step in request.steps:
+        for button in step.buttons:
+            if button.upper() not in VALID_BUTTONS:
+                raise HTTPException(status_code=400, detail=f"Invalid button: {button}")
+
+    async def run() -> Dict[str, Any]:
+        job = gamepad_queue.submit(
+            _run_sequence,
+            request.steps,
+            request.release_all,
+            description={"sequence": len(request.steps)}
+        )
+        try:
+            outcome = await asyncio.wrap_future(job.future)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Gamepad error: {e}")
+
+        result = outcome["result"]
+        if result["status"] == "error":
+            raise HTTPException(status_code=400, detail=result["message"])
+
+        return {
+            "status": "success",
+            "message": f"{len(outcome['steps'])} steps executed",
+            "job_id": job.job_id,
+            "steps": outcome["steps"],
+            "released": outcome["released"],
+            "total_ms": outcome["total_ms"],
+        }
+
+    detail = {"steps": [{"buttons": step.buttons, "action": step.action, "repeat": step.repeat} for step in request.steps]}
+    return await run_journaled("gamepad_sequence", detail, request.step_id, run)
+
+
+async def get_gamepad_job(job_id: str) -> Dict[str, Any]:
+    """Get the status of a queued gamepad job."""
+    job = gamepad_queue.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    return job.to_dict()
@@ -1,101 +1,234 @@
 """
 Mouse input controller for handling mouse actions and positioning.
 """
-import pyautogui
-from typing import Dict, Any
-from fastapi import HTTPException
 import time
+from typing import Dict, Any, List, Optional, Tuple
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+
+from api.models.requests import MouseClickRequest, MouseMoveRequest, MouseDragRequest, MouseGesture, MouseGesturesRequest
+from api.utils.action_journal import run_journaled
+from api.utils.action_queue import sleep_until
+from api.utils.config import get_config
+from api.utils.coordinates import to_screen_point
+from api.utils.executors import mouse_executor, run_in_executor
+from api.utils.mod_client import mod_client
+from api.utils.mouse_backend import get_mouse_backend
+
+# Mouse button numbers as Love reports them to the mod
+LOVE_BUTTONS = {"left": 1, "right": 2, "middle": 3}
+
+# Maximum wait for the game to report an injected click
+INPUT_ACK_TIMEOUT = float(get_config().get('INPUT_ACK_TIMEOUT_MS', 500)) / 1000
+
 
-from api.models.requests import MouseClickRequest, MouseMoveRequest, MouseDragRequest
-from api.utils.system import relative_to_absolute
+def _screen_info(backend) -> Dict[str, Any]:
+    """Screen size fields shared by the mouse responses."""
+    screen_width, screen_height = backend.screen_size
+    return {
+        "screen_size": {"width": screen_width, "height": screen_height},
+        "coordinate_info": (f"Screen resolution: {screen_width}x{screen_height} pixels. Coordinates are screen pixels, "
+                            "or pixels/normalized values of a served frame with coordinates='frame'/'normalized' and image_id."),
+        "backend": backend.name
+    }
+
+
+def _backend(name: Optional[str]):
+    """Resolve the mouse backend for a request."""
+    try:
+        return get_mouse_backend(name)
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+
+def _to_screen(backend, x: float, y: float, request) -> Tuple[int, int]:
+    """Map request coordinates to screen pixels according to its coordinate space."""
+    try:
+        return to_screen_point(x, y, request.coordinates, request.image_id, backend.screen_size)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 async def mouse_click(request: MouseClickRequest) -> Dict[str, Any]:
     """Click at specific coordinates using pixel positioning."""
+    backend = _backend(request.backend)
+    pixel_x, pixel_y = _to_screen(backend, request.x, request.y, request)
     try:
-        # Get screen dimensions for validation and info
-        screen_width, screen_height = pyautogui.size()
-        
-        # Use coordinates directly as pixels
-        pixel_x, pixel_y = int(request.x), int(request.y)
-        
-        #pyautogui.click(pixel_x, pixel_y, clicks=request.clicks, button=request.button)
-        for _ in range(request.clicks):
-            pyautogui.moveTo(pixel_x, pixel_y, duration=0)
-            pyautogui.mouseDown(button=request.button)
-            time.sleep(0.05)
-            pyautogui.mouseUp(button=request.button)
+        async def click() -> Dict[str, Any]:
+            expected = None
+            if request.ack and request.button in LOVE_BUTTONS:
+                love_button = {"button": LOVE_BUTTONS[request.button]}
+                expected = mod_client.expect_inputs(
+                    [("mouse_pressed", love_button), ("mouse_released", love_button)] * request.clicks
+                )
 
-        return {
-            "status": "success",
-            "message": f"Clicked at pixel coordinates ({pixel_x}, {pixel_y}) with {request.button} button {request.clicks} time(s)",
-            "screen_size": {"width": screen_width, "height": screen_height},
-            "coordinate_info": f"Screen resolution: {screen_width}x{screen_height} pixels. Use pixel coordinates for all mouse actions."
-        }
+            try:
+                await run_in_executor(mouse_executor, backend.click, pixel_x, pixel_y, request.button, request.clicks)
+            except Exception:
+                # Otherwise they would take the game's report of the next click
+                if expected:
+                    mod_client.drop_inputs(expected)
+                raise
+            response = {
+                "status": "success",
+                "message": f"Clicked at pixel coordinates ({pixel_x}, {pixel_y}) with {request.button} button {request.clicks} time(s)",
+                **_screen_info(backend)
+            }
+            if request.ack:
+                # None when the mod is not connected to report inputs
+                response["ack"] = await mod_client.await_inputs(expected, INPUT_ACK_TIMEOUT) if expected else None
+            return response
+
+        detail = {"x": pixel_x, "y": pixel_y, "button": request.button, "clicks": request.clicks}
+        return await run_journaled("mouse_click", detail, request.step_id, click)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to click: {str(e)}")
 
 
 async def mouse_move(request: MouseMoveRequest) -> Dict[str, Any]:
     """Move mouse cursor to specific coordinates using pixel positioning."""
+    backend = _backend(request.backend)
+    pixel_x, pixel_y = _to_screen(backend, request.x, request.y, request)
     try:
-        # Get screen dimensions for validation and info
-        screen_width, screen_height = pyautogui.size()
-        
-        # Use coordinates directly as pixels
-        pixel_x, pixel_y = int(request.x), int(request.y)
-        
-        pyautogui.moveTo(pixel_x, pixel_y, duration=request.duration)
-        return {
-            "status": "success",
-            "message": f"Moved mouse to pixel coordinates ({pixel_x}, {pixel_y})",
-            "screen_size": {"width": screen_width, "height": screen_height},
-            "coordinate_info": f"Screen resolution: {screen_width}x{screen_height} pixels. Use pixel coordinates for all mouse actions."
-        }
+        async def move() -> Dict[str, Any]:
+            await run_in_executor(mouse_executor, backend.move, pixel_x, pixel_y, request.duration)
+            return {
+                "status": "success",
+                "message": f"Moved mouse to pixel coordinates ({pixel_x}, {pixel_y})",
+                **_screen_info(backend)
+            }
+
+        return await run_journaled("mouse_move", {"x": pixel_x, "y": pixel_y}, request.step_id, move)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to move mouse: {str(e)}")
 
 
 async def mouse_drag(request: MouseDragRequest) -> Dict[str, Any]:
     """Drag from start coordinates to end coordinates using pixel positioning."""
+    backend = _backend(request.backend)
+    start_x, start_y = _to_screen(backend, request.start_x, request.start_y, request)
+    end_x, end_y = _to_screen(backend, request.end_x, request.end_y, request)
     try:
-        # Get screen dimensions for validation and info
-        screen_width, screen_height = pyautogui.size()
-        
-        # Use coordinates directly as pixels
-        start_x, start_y = int(request.start_x), int(request.start_y)
-        end_x, end_y = int(request.end_x), int(request.end_y)
-        
-        pyautogui.drag(
-            end_x - start_x,
-            end_y - start_y,
-            duration=request.duration,
-            button=request.button,
-            start=(start_x, start_y)
-        )
-        return {
-            "status": "success",
-            "message": f"Dragged from pixel coordinates ({start_x}, {start_y}) to ({end_x}, {end_y}) with {request.button} button",
-            "screen_size": {"width": screen_width, "height": screen_height},
-            "coordinate_info": f"Screen resolution: {screen_width}x{screen_height} pixels. Use pixel coordinates for all mouse actions."
-        }
+        async def drag() -> Dict[str, Any]:
+            await run_in_executor(
+                mouse_executor,
+                backend.drag,
+                start_x,
+                start_y,
+                end_x,
+                end_y,
+                duration=request.duration,
+                button=request.button
+            )
+            return {
+                "status": "success",
+                "message": f"Dragged from pixel coordinates ({start_x}, {start_y}) to ({end_x}, {end_y}) with {request.button} button",
+                **_screen_info(backend)
+            }
+
+        detail = {"start": [start_x, start_y], "end": [end_x, end_y], "button": request.button}
+        return await run_journaled("mouse_drag", detail, request.step_id, drag)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to drag: {str(e)}")
 
 
+# Coordinates each gesture type needs
+GESTURE_FIELDS = {
+    "click": ("x", "y"),
+    "move": ("x", "y"),
+    "drag": ("x", "y", "end_x", "end_y"),
+    "wait": (),
+}
+
+
+def _run_gestures(backend, gestures: List[MouseGesture]) -> List[Dict[str, Any]]:
+    """Perform gestures back to back on the mouse worker thread."""
+    timings = []
+    started = time.perf_counter()
+
+    for index, gesture in enumerate(gestures):
+        gesture_start = time.perf_counter()
+
+        if gesture.type == "click":
+            backend.click(gesture.x, gesture.y, gesture.button, gesture.clicks, gesture.hold)
+        elif gesture.type == "move":
+            backend.move(gesture.x, gesture.y, gesture.duration)
+        elif gesture.type == "drag":
+            backend.drag(gesture.x, gesture.y, gesture.end_x, gesture.end_y, gesture.duration, gesture.button)
+        else:
+            sleep_until(gesture_start + gesture.duration)
+
+        performed = time.perf_counter()
+        sleep_until(performed + gesture.delay)
+
+        timings.append({
+            "index": index,
+            "type": gesture.type,
+            "start_ms": round((gesture_start - started) * 1000, 2),
+            "gesture_ms": round((performed - gesture_start) * 1000, 2),
+            "wait_ms": round((time.perf_counter() - performed) * 1000, 2),
+        })
+
+    return timings
+
+
+async def mouse_gestures(request: MouseGesturesRequest) -> Dict[str, Any]:
+    """Run an ordered batch of clicks, moves, drags and waits in one request."""
+    backend = _backend(request.backend)
+
+    gestures = []
+    for index, gesture in enumerate(request.gestures):
+        missing = [field for field in GESTURE_FIELDS[gesture.type] if getattr(gesture, field) is None]
+        if missing:
+            raise HTTPException(status_code=400, detail=f"Gesture {index} ({gesture.type}) requires {', '.join(missing)}")
+
+        # Map to screen pixels up front, so a bad frame id fails before anything is performed
+        update = {}
+        if gesture.x is not None and gesture.y is not None:
+            update["x"], update["y"] = _to_screen(backend, gesture.x, gesture.y, request)
+        if gesture.end_x is not None and gesture.end_y is not None:
+            update["end_x"], update["end_y"] = _to_screen(backend, gesture.end_x, gesture.end_y, request)
+        gestures.append(gesture.model_copy(update=update))
+
+    try:
+        async def perform() -> Dict[str, Any]:
+            started = time.perf_counter()
+            timings = await run_in_executor(mouse_executor, _run_gestures, backend, gestures)
+            return {
+                "status": "success",
+                "message": f"{len(timings)} gestures performed",
+                "gestures": timings,
+                "total_ms": round((time.perf_counter() - started) * 1000, 2),
+                **_screen_info(backend)
+            }
+
+        detail = {"gestures": [gesture.type for gesture in gestures]}
+        return await run_journaled("mouse_gestures", detail, request.step_id, perform)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to perform gestures: {str(e)}")
+
+
 async def get_mouse_position() -> Dict[str, Any]:
     """Get current mouse position in pixel coordinates."""
+    backend = _backend(None)
     try:
         # Get absolute position in pixels
-        pixel_x, pixel_y = pyautogui.position()
+        pixel_x, pixel_y = await run_in_threadpool(backend.position)
         
         # Get screen dimensions
-        screen_width, screen_height = pyautogui.size()
+        screen_width, screen_height = backend.screen_size
         
         return {
             "position": {"x": pixel_x, "y": pixel_y},
             "screen_size": {"width": screen_width, "height": screen_height},
             "coordinate_info": f"Mouse at pixel coordinates ({pixel_x}, {pixel_y}). Screen resolution: {screen_width}x{screen_height} pixels.",
+            "backend": backend.name,
             "status": "success"
         }
     except Exception as e:
@@ -1,77 +1,366 @@
 """
 Screenshot controller for capturing game state and providing visual feedback.
 """
-import subprocess
+import asyncio
+import hashlib
 import time
+from typing import Dict, Any, Optional, Tuple, AsyncIterator, Union
 from PIL import Image
-from fastapi import HTTPException
-from fastapi.responses import Response
+from fastapi import HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response, StreamingResponse
 
+from api.controllers.gamepad_controller import gamepad_controller
+from api.models.requests import ScreenshotRequest, ScreenWaitRequest, StreamRequest
 from api.utils.system import wait_for_x11
-from api.utils.image_processing import draw_point, image_to_bytes
+from api.utils.image_processing import draw_point, resize_image, encode_image, diff_regions, image_digest, MEDIA_TYPES
+from api.utils.regions import BALATRO_REGIONS, resolve_region
+from api.utils.screen_capture import capture_screen, get_screen_size, get_pointer_position, frame_grabber
+from api.utils.frame_buffer import frame_buffer, Frame
+from api.utils.change_detection import ScreenWaiter, reference_frame, wait_for_screen
+from api.utils.coordinates import FrameTransform, frame_transforms
 
 
-async def get_screenshot() -> Response:
-    """Take a screenshot of the current screen."""
+def _capture_headers(
+    backend: str,
+    capture_ms: float,
+    region: Optional[Tuple[int, int, int, int]],
+    frame: Optional[Frame] = None
+) -> dict:
+    """Build the capture metadata headers attached to every screenshot."""
+    headers = {
+        "X-Capture-Backend": backend,
+        "X-Capture-Time-Ms": f"{capture_ms:.2f}",
+    }
+    if region:
+        headers["X-Region"] = ",".join(str(v) for v in region)
+    if frame:
+        headers["X-Frame-Id"] = str(frame.frame_id)
+        headers["X-Frame-Timestamp"] = f"{frame.timestamp:.3f}"
+        headers["X-Frame-Age-Ms"] = f"{frame.age_ms:.2f}"
+    return headers
+
+
+async def _resolve_capture_region(spec: Optional[str]) -> Optional[Tuple[int, int, int, int]]:
+    """Resolve the requested region against the Balatro window geometry."""
+    if not spec:
+        return None
+
+    # Pixel rectangles are absolute, only named regions need the window (a wmctrl call)
+    geometry = None
+    if "," not in spec:
+        geometry = await run_in_threadpool(gamepad_controller.get_balatro_window_geometry)
+
     try:
-        result = subprocess.run(
-            ['import', '-window', 'root', 'png:-'],
-            capture_output=True,
-            env={'DISPLAY': ':0'}
-        )
-        
-        if result.returncode != 0:
-            raise HTTPException(status_code=500, detail="Failed to capture screenshot")
-        
-        return Response(content=result.stdout, media_type="image/png")
+        return resolve_region(spec, geometry, get_screen_size())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _resize_and_encode(img: Image.Image, request: ScreenshotRequest):
+    """Downscale and encode a captured frame according to the request options."""
+    img = resize_image(img, request.scale, request.width, request.height)
+    return img.size, encode_image(img, request.format, request.quality, request.compress_level)
+
+
+async def _capture(request: ScreenshotRequest) -> Tuple[Image.Image, dict, Optional[Tuple[int, int, int, int]], Frame]:
+    """Capture the requested frame, reusing buffered frames when max_age_ms allows it."""
+    region = await _resolve_capture_region(request.region)
+
+    # Without a freshness budget a region is grabbed directly, which is cheaper than a full frame
+    if region and request.max_age_ms is None:
+        start = time.perf_counter()
+        img, backend = await run_in_threadpool(capture_screen, region)
+        capture_ms = (time.perf_counter() - start) * 1000
+        # Not buffered, but numbered like buffered frames so clients can refer to it
+        frame = Frame(frame_buffer.allocate_id(), img, backend, capture_ms)
+        return img, _capture_headers(backend, capture_ms, region, frame), region, frame
+
+    frame = await run_in_threadpool(frame_buffer.get, request.max_age_ms)
+    img = frame.image
+    if region:
+        x, y, width, height = region
+        img = img.crop((x, y, x + width, y + height))
+
+    return img, _capture_headers(frame.backend, frame.capture_ms, region, frame), region, frame
+
+
+def _content_etag(img: Image.Image, frame: Optional[Frame], request: ScreenshotRequest, *extra) -> str:
+    """Strong ETag for the captured pixels combined with everything that shapes the encoded output."""
+    # Full buffered frames share one cached digest, crops and direct captures are hashed here
+    digest = frame.digest() if frame is not None and img is frame.image else image_digest(img)
+    key = (digest, request.format, request.quality, request.compress_level,
+           request.scale, request.width, request.height) + extra
+    return '"' + hashlib.blake2b(repr(key).encode(), digest_size=16).hexdigest() + '"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header value matches the given ETag (weak comparison)."""
+    if not if_none_match:
+        return False
+    candidates = [value.strip() for value in if_none_match.split(",")]
+    return "*" in candidates or etag in (value[2:] if value.startswith("W/") else value for value in candidates)
+
+
+def _not_modified(etag: str, headers: dict) -> Response:
+    """Empty 304 response carrying the ETag and capture metadata."""
+    return Response(status_code=304, headers=dict(headers, ETag=etag))
+
+
+def _register_transform(
+    region: Optional[Tuple[int, int, int, int]],
+    source_size: Tuple[int, int],
+    size: Tuple[int, int]
+) -> FrameTransform:
+    """Remember how a served image maps to the screen under a new image id, so coordinates on it can be mapped back."""
+    transform = FrameTransform.from_region(region, source_size, size)
+    frame_transforms.register(transform)
+    return transform
+
+
+async def _encoded_response(
+    img: Image.Image,
+    request: ScreenshotRequest,
+    headers: dict,
+    frame: Frame,
+    region: Optional[Tuple[int, int, int, int]]
+) -> Response:
+    """Encode a frame off the event loop and wrap it in a response."""
+    start = time.perf_counter()
+    (width, height), img_bytes = await run_in_threadpool(_resize_and_encode, img, request)
+    encode_ms = (time.perf_counter() - start) * 1000
+
+    transform = _register_transform(region, img.size, (width, height))
+    headers = dict(
+        headers,
+        **{
+            "X-Encode-Time-Ms": f"{encode_ms:.2f}",
+            "X-Image-Width": str(width),
+            "X-Image-Height": str(height),
+        },
+        **transform.headers()
+    )
+    if request.format == "raw":
+        headers["X-Image-Mode"] = "RGB"
+
+    return Response(content=img_bytes, media_type=MEDIA_TYPES[request.format], headers=headers)
+
+
+async def get_screenshot(request: ScreenshotRequest, if_none_match: Optional[str] = None) -> Response:
+    """Take a screenshot of the current screen, answering 304 when it matches If-None-Match."""
+    try:
+        img, headers, region, frame = await _capture(request)
+
+        etag = await run_in_threadpool(_content_etag, img, frame, request)
+        if _etag_matches(if_none_match, etag):
+            return _not_modified(etag, headers)
+
+        headers["ETag"] = etag
+        return await _encoded_response(img, request, headers, frame, region)
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Screenshot error: {e}")
 
 
-async def get_screenshot_with_cursor() -> Response:
+async def get_screenshot_with_cursor(request: ScreenshotRequest, if_none_match: Optional[str] = None) -> Response:
     """Take screenshot with visible cursor position marked."""
     try:
-        # Verify X11 is available
-        if not wait_for_x11():
+        # The persistent X connection already proves the display is up
+        if not frame_grabber.available and not await run_in_threadpool(wait_for_x11, 1):
             raise HTTPException(status_code=503, detail="X11 server not available")
         
-        # Capture base screenshot
-        result = subprocess.run(
-            ['import', '-window', 'root', 'png:/tmp/screen_base.png'],
-            capture_output=True,
-            env={'DISPLAY': ':0'},
-            timeout=10
-        )
-        
-        if result.returncode != 0:
-            error_msg = result.stderr.decode() if result.stderr else "Unknown error"
-            raise HTTPException(status_code=500, detail=f"Failed to capture screenshot: {error_msg}")
+        # Capture base screenshot and pointer position
+        img, headers, region, frame = await _capture(request)
+        mouse_x, mouse_y = await run_in_threadpool(get_pointer_position)
         
-        # Get current mouse position
-        mouse_result = subprocess.run(
-            ['xdotool', 'getmouselocation', '--shell'],
-            capture_output=True, text=True,
-            env={'DISPLAY': ':0'},
-            timeout=5
-        )
-        
-        mouse_x, mouse_y = 0, 0
-        if mouse_result.returncode == 0:
-            for line in mouse_result.stdout.strip().split('\n'):
-                if line.startswith('X='):
-                    mouse_x = int(line.split('=')[1])
-                elif line.startswith('Y='):
-                    mouse_y = int(line.split('=')[1])
+        screen_width, screen_height = get_screen_size()
+        headers.update({
+            "X-Cursor-X": str(mouse_x),
+            "X-Cursor-Y": str(mouse_y),
+            "X-Screen-Width": str(screen_width),
+            "X-Screen-Height": str(screen_height),
+        })
+
+        # The marker is part of the image, so the cursor position is part of the tag
+        etag = await run_in_threadpool(_content_etag, img, frame, request, mouse_x, mouse_y, region)
+        if _etag_matches(if_none_match, etag):
+            return _not_modified(etag, headers)
+        headers["ETag"] = etag
         
-        # Load image and draw cursor position
-        img = Image.open('/tmp/screen_base.png')
-        img = draw_point(img, [mouse_x, mouse_y], "green")
+        # Buffered frames are shared between requests, crops are already private copies
+        if region is None:
+            img = img.copy()
         
-        # Convert to bytes for response
-        img_bytes = image_to_bytes(img, 'PNG')
+        # Draw cursor position relative to the captured region
+        origin_x, origin_y = region[:2] if region else (0, 0)
+        img = draw_point(img, [mouse_x - origin_x, mouse_y - origin_y], "green")
         
-        return Response(content=img_bytes, media_type="image/png")
+        return await _encoded_response(img, request, headers, frame, region)
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Screenshot with cursor error: {e}")
+
+
+async def wait_for_screen_change(request: ScreenWaitRequest) -> Union[Response, Dict[str, Any]]:
+    """Block until the screen changes from a reference frame or stays unchanged for a settle window."""
+    try:
+        start = time.perf_counter()
+        reference = await run_in_threadpool(reference_frame, frame_buffer, request.since_frame)
+        waiter = ScreenWaiter(reference, request.mode, request.settle_ms, request.threshold)
+
+        status = await wait_for_screen(frame_buffer, waiter, request.timeout_ms, request.poll_ms)
+        boxes = await run_in_threadpool(waiter.changed_boxes)
+        waited_ms = (time.perf_counter() - start) * 1000
+
+        frame = waiter.last
+        if not request.image:
+            return {
+                "status": status,
+                "frame_id": frame.frame_id,
+                "reference_frame_id": reference.frame_id,
+                "changed": bool(boxes),
+                "changed_boxes": boxes,
+                "waited_ms": round(waited_ms, 2)
+            }
+
+        region = await _resolve_capture_region(request.region)
+        img = frame.image
+        if region:
+            x, y, width, height = region
+            img = img.crop((x, y, x + width, y + height))
+
+        headers = _capture_headers(frame.backend, frame.capture_ms, region, frame)
+        headers.update({
+            "X-Wait-Status": status,
+            "X-Reference-Frame-Id": str(reference.frame_id),
+            "X-Changed-Boxes": ";".join(",".join(str(v) for v in box) for box in boxes),
+            "X-Waited-Ms": f"{waited_ms:.2f}",
+        })
+        return await _encoded_response(img, request, headers, frame, region)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Screen wait error: {e}")
+
+
+STREAM_BOUNDARY = "frame"
+
+
+def _encode_frame(frame: Frame, request: ScreenshotRequest, region: Optional[Tuple[int, int, int, int]]):
+    """Encode a buffered frame once per set of encoding options, viewers of the same image share its image id."""
+    key = (request.format, request.quality, request.compress_level,
+           request.scale, request.width, request.height, region)
+    if key not in frame.encodings:
+        img = frame.image
+        if region:
+            x, y, width, height = region
+            img = img.crop((x, y, x + width, y + height))
+        size, img_bytes = _resize_and_encode(img, request)
+        frame.encodings[key] = size, img_bytes, _register_transform(region, img.size, size)
+    return frame.encodings[key]
+
+
+def _intersects(box: Tuple[int, int, int, int], region: Tuple[int, int, int, int]) -> bool:
+    """Whether two (x, y, width, height) rectangles overlap."""
+    return (box[0] < region[0] + region[2] and region[0] < box[0] + box[2]
+            and box[1] < region[1] + region[3] and region[1] < box[1] + box[3])
+
+
+async def _stream_frames(
+    request: StreamRequest,
+    region: Optional[Tuple[int, int, int, int]]
+) -> AsyncIterator[Tuple[Frame, Tuple[int, int], bytes, list, FrameTransform]]:
+    """Yield encoded frames of the resolved region at the requested rate, skipping unchanged ones."""
+    interval = 1.0 / request.fps
+    last_sent: Optional[Frame] = None
+
+    while True:
+        started = time.monotonic()
+        # All viewers read from the shared buffer, so N streams cost one capture
+        frame = await run_in_threadpool(frame_buffer.get, interval * 1000)
+
+        if last_sent is None or frame.frame_id != last_sent.frame_id:
+            boxes = []
+            if last_sent is not None:
+                boxes = await run_in_threadpool(
+                    diff_regions, last_sent.thumbnail(), frame.thumbnail(), frame.image.size, request.threshold
+                )
+                if region:
+                    boxes = [box for box in boxes if _intersects(box, region)]
+
+            if last_sent is None or boxes or not request.only_changed:
+                size, img_bytes, transform = await run_in_threadpool(_encode_frame, frame, request, region)
+                last_sent = frame
+                yield frame, size, img_bytes, boxes, transform
+
+        await asyncio.sleep(max(0.0, interval - (time.monotonic() - started)))
+
+
+async def stream_mjpeg(request: StreamRequest) -> StreamingResponse:
+    """Push frames as a multipart/x-mixed-replace stream (MJPEG when format=jpeg)."""
+    media_type = MEDIA_TYPES[request.format]
+    # Invalid regions fail with a 400 before the stream starts
+    region = await _resolve_capture_region(request.region)
+
+    async def body():
+        async for frame, (width, height), img_bytes, _, transform in _stream_frames(request, region):
+            transform_headers = "".join(f"{name}: {value}\r\n" for name, value in transform.headers().items())
+            yield (
+                f"--{STREAM_BOUNDARY}\r\n"
+                f"Content-Type: {media_type}\r\n"
+                f"Content-Length: {len(img_bytes)}\r\n"
+                f"X-Frame-Id: {frame.frame_id}\r\n"
+                f"X-Frame-Timestamp: {frame.timestamp:.3f}\r\n"
+                f"X-Image-Width: {width}\r\n"
+                f"X-Image-Height: {height}\r\n"
+                f"{transform_headers}\r\n"
+            ).encode() + img_bytes + b"\r\n"
+
+    return StreamingResponse(body(), media_type=f"multipart/x-mixed-replace; boundary={STREAM_BOUNDARY}")
+
+
+async def stream_websocket(websocket: WebSocket, request: StreamRequest):
+    """Push frames over a WebSocket as a JSON metadata message followed by the encoded bytes."""
+    try:
+        region = await _resolve_capture_region(request.region)
+    except HTTPException as e:
+        # Rejects the handshake
+        await websocket.close(code=1008, reason=str(e.detail))
+        return
+
+    await websocket.accept()
+    try:
+        async for frame, (width, height), img_bytes, boxes, transform in _stream_frames(request, region):
+            await websocket.send_json({
+                "frame_id": frame.frame_id,
+                "timestamp": frame.timestamp,
+                "format": request.format,
+                "width": width,
+                "height": height,
+                "transform": transform.to_dict(),
+                "changed_boxes": boxes
+            })
+            await websocket.send_bytes(img_bytes)
+    except WebSocketDisconnect:
+        pass
+
+
+async def get_regions() -> Dict[str, Any]:
+    """List the named screenshot regions resolved against the Balatro window."""
+    geometry = await run_in_threadpool(gamepad_controller.get_balatro_window_geometry)
+    screen_width, screen_height = get_screen_size()
+
+    return {
+        "status": "success",
+        "window_geometry": geometry,
+        "screen_size": {"width": screen_width, "height": screen_height},
+        "regions": {
+            name: resolve_region(name, geometry, (screen_width, screen_height))
+            for name in BALATRO_REGIONS
+        }
+    }
@@ -0,0 +1,48 @@
+"""
+Lockstep simulation controller: hold the game loop and advance it frame by frame through the mod.
+"""
+from typing import Dict, Any, Optional
+
+from fastapi import HTTPException
+
+from api.utils.mod_client import mod_client, ModCommandError
+
+
+async def _call(cmd: str, args: Dict[str, Any], timeout_ms: int) -> Dict[str, Any]:
+    """Run a mod command, mapping channel errors to HTTP errors."""
+    try:
+        return await mod_client.call(cmd, args, timeout=timeout_ms / 1000)
+    except ConnectionError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except TimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except ModCommandError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+async def set_lockstep(enabled: bool, dt: Optional[float] = None) -> Dict[str, Any]:
+    """Enable or disable lockstep, in which the game only advances on step requests."""
+    args = {"enabled": enabled}
+    if dt is not None:
+        args["dt"] = dt
+    result = await _call("lockstep", args, 2000)
+    return {"status": "success", **result}
+
+
+async def get_sim_status() -> Dict[str, Any]:
+    """Get the game frame counter and lockstep mode."""
+    result = await _call("status", {}, 2000)
+    mod_status = result.pop("status")
+    return {"status": "success", **result, "mod_status": mod_status}
+
+
+async def step(frames: int, timeout_ms: int) -> Dict[str, Any]:
+    """Advance the game by a number of frames and return the resulting frame counter."""
+    result = await _call("step", {"frames": frames}, timeout_ms)
+    return {"status": "success", **result}
+
+
+async def step_until_idle(max_frames: int, timeout_ms: int) -> Dict[str, Any]:
+    """Advance the game until no events are queued and no animation holds input, or max_frames ran."""
+    result = await _call("step_until_idle", {"max_frames": max_frames}, timeout_ms)
+    return {"status": "success", **result}
@@ -0,0 +1,75 @@
+"""
+Game state controller serving the snapshots and UI geometry exported by the BalatroLogger mod.
+"""
+import time
+from typing import Dict, Any, Optional
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+
+from api.controllers import game_controller
+from api.utils.game_state import game_state_reader, to_game_state
+from api.utils.mod_client import mod_client, ModCommandError
+from api.utils.ui_elements import resolve_element, with_names
+
+
+async def get_game_state(raw: bool = False) -> Dict[str, Any]:
+    """Get the current game state in the agents' GameState schema."""
+    # Snapshots pushed over the command channel are the freshest, the file covers mods without it.
+    # The file is only trusted while the game runs, otherwise it is left over from an earlier run.
+    latest = mod_client.state if mod_client.connected else None
+    if latest is not None:
+        latest = dict(latest, age_ms=round((time.time() - latest["updated_at"]) * 1000, 2))
+    elif game_controller.is_balatro_running():
+        try:
+            latest = await run_in_threadpool(game_state_reader.read)
+        except (OSError, ValueError) as e:
+            raise HTTPException(status_code=500, detail=f"Error reading game state: {e}")
+
+    if latest is None:
+        raise HTTPException(status_code=503, detail="Game state not available, is Balatro running with the mod?")
+
+    snapshot = latest["snapshot"]
+    response = {
+        "status": "success",
+        "game_state": to_game_state(snapshot),
+        "state": snapshot.get("state"),
+        "seq": latest["seq"],
+        "updated_at": latest["updated_at"],
+        "age_ms": latest["age_ms"],
+    }
+    if raw:
+        response["snapshot"] = snapshot
+    return response
+
+
+async def get_ui_elements(query: Optional[str] = None, kind: Optional[str] = None, area: Optional[str] = None) -> Dict[str, Any]:
+    """Get the screen pixel boxes of cards and enabled buttons, or resolve a query to one of them."""
+    try:
+        geometry = await mod_client.call("ui_elements")
+    except ConnectionError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except TimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except ModCommandError as e:
+        raise HTTPException(status_code=409, detail=f"UI geometry not available: {e}")
+
+    elements = [
+        element for element in with_names(geometry["elements"])
+        if (kind is None or element.get("kind") == kind) and (area is None or element.get("area") == area)
+    ]
+    response = {
+        "status": "success",
+        "state": geometry.get("state"),
+        "window": geometry.get("window"),
+    }
+
+    if query is None:
+        response["elements"] = elements
+        return response
+
+    element = resolve_element(elements, query)
+    if element is None:
+        labels = ", ".join(sorted({element["label"] for element in elements}))
+        raise HTTPException(status_code=404, detail=f"No UI element matches '{query}'. Available: {labels}")
+    response.update(element=element, x=element["center_x"], y=element["center_y"])
+    return response
@@ -1,8 +1,8 @@
 """
 Pydantic models for API request and response validation.
 """
-from typing import Optional, List
-from pydantic import BaseModel
+from typing import Optional, List, Literal
+from pydantic import BaseModel, Field
 
 
 class GamepadButtonsRequest(BaseModel):
@@ -10,40 +10,90 @@ class GamepadButtonsRequest(BaseModel):
     buttons: str = "A"
     step_id: Optional[str] = None
     duration: Optional[float] = 0.1
+    delay: float = Field(0.0, ge=0, description="Seconds to wait after each press (raised to the configured minimum)")
+    delays: Optional[List[float]] = Field(None, description="Per-press delays in seconds, overriding delay")
+    wait_mode: Literal["delay", "settle", "ack"] = Field("settle", description="After each press wait only the delay, also until the screen settles, or until the game reports the press and release")
+    settle_ms: int = Field(200, ge=0, description="Unchanged time that counts as settled in settle mode")
+    settle_timeout_ms: int = Field(1000, ge=0, le=30000, description="Maximum settle wait per press")
+    wait: bool = Field(True, description="Wait for the sequence to finish, or return the job id right away")
     
     class Config:
         json_schema_extra = {
             "example": {
                 "buttons": "A B",
                 "step_id": "step_1",
-                "duration": 0.1
+                "duration": 0.1,
+                "wait_mode": "settle",
+                "settle_ms": 200
+            }
+        }
+
+
+class GamepadStep(BaseModel):
+    """A single step of a gamepad sequence script."""
+    buttons: List[str] = Field(..., min_length=1, description="Buttons emitted together as one chord")
+    action: Literal["tap", "hold", "release"] = Field("tap", description="Press and release, press only, or release held buttons")
+    duration: float = Field(0.1, ge=0, le=10, description="Seconds the chord is held for a tap")
+    repeat: int = Field(1, ge=1, le=100, description="Times the step is performed")
+    delay: float = Field(0.0, ge=0, le=10, description="Seconds to wait after each repetition")
+    value: int = Field(255, ge=0, le=255, description="Analog value for LT/RT")
+
+
+class GamepadSequenceRequest(BaseModel):
+    """Request model for scripted gamepad sequences."""
+    steps: List[GamepadStep] = Field(..., min_length=1, max_length=200)
+    step_id: Optional[str] = None
+    release_all: bool = Field(True, description="Release buttons still held when the script ends")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "steps": [
+                    {"buttons": ["RIGHT"], "repeat": 3, "delay": 0.15},
+                    {"buttons": ["A"]},
+                    {"buttons": ["LT"], "action": "hold", "value": 200},
+                    {"buttons": ["DOWN"], "delay": 0.2},
+                    {"buttons": ["LT"], "action": "release"}
+                ],
+                "step_id": "step_2"
             }
         }
 
 
 class MouseClickRequest(BaseModel):
     """Request model for mouse clicks."""
-    x: int  # Pixel coordinate
-    y: int  # Pixel coordinate
+    x: float  # In the coordinate space, pixels by default
+    y: float  # In the coordinate space, pixels by default
     button: str = "left"
     clicks: int = 1
+    coordinates: Literal["screen", "frame", "normalized"] = "screen"  # Screen pixels, pixels of image image_id, or 0-1
+    image_id: Optional[int] = None  # Served image the coordinates refer to (X-Image-Id / transform.image_id)
+    step_id: Optional[str] = None
+    backend: Optional[Literal["xtest", "pyautogui"]] = None  # Defaults to MOUSE_BACKEND
+    ack: bool = False  # Wait until the game reports each press and release, and return the frame
     
     class Config:
         json_schema_extra = {
             "example": {
-                "x": 960,
-                "y": 540,
+                "x": 480,
+                "y": 270,
                 "button": "left",
-                "clicks": 1
+                "clicks": 1,
+                "coordinates": "frame",
+                "image_id": 42
             }
         }
 
 
 class MouseMoveRequest(BaseModel):
     """Request model for mouse movement."""
-    x: int  # Pixel coordinate
-    y: int  # Pixel coordinate
+    x: float  # In the coordinate space, pixels by default
+    y: float  # In the coordinate space, pixels by default
     duration: float = 0.0
+    coordinates: Literal["screen", "frame", "normalized"] = "screen"  # Screen pixels, pixels of image image_id, or 0-1
+    image_id: Optional[int] = None  # Served image the coordinates refer to (X-Image-Id / transform.image_id)
+    step_id: Optional[str] = None
+    backend: Optional[Literal["xtest", "pyautogui"]] = None  # Defaults to MOUSE_BACKEND
     
     class Config:
         json_schema_extra = {
@@ -57,12 +107,16 @@ class MouseMoveRequest(BaseModel):
 
 class MouseDragRequest(BaseModel):
     """Request model for mouse dragging."""
-    start_x: int  # Pixel coordinate
-    start_y: int  # Pixel coordinate
-    end_x: int    # Pixel coordinate
-    end_y: int    # Pixel coordinate
+    start_x: float  # In the coordinate space, pixels by default
+    start_y: float  # In the coordinate space, pixels by default
+    end_x: float    # In the coordinate space, pixels by default
+    end_y: float    # In the coordinate space, pixels by default
     duration: float = 0.5
     button: str = "left"
+    coordinates: Literal["screen", "frame", "normalized"] = "screen"  # Screen pixels, pixels of image image_id, or 0-1
+    image_id: Optional[int] = None  # Served image the coordinates refer to (X-Image-Id / transform.image_id)
+    step_id: Optional[str] = None
+    backend: Optional[Literal["xtest", "pyautogui"]] = None  # Defaults to MOUSE_BACKEND
     
     class Config:
         json_schema_extra = {
@@ -77,6 +131,42 @@ class MouseDragRequest(BaseModel):
         }
 
 
+class MouseGesture(BaseModel):
+    """A single gesture of a mouse gesture batch."""
+    type: Literal["click", "move", "drag", "wait"]
+    x: Optional[float] = None  # Drag start for drags, in the request's coordinate space
+    y: Optional[float] = None  # Drag start for drags, in the request's coordinate space
+    end_x: Optional[float] = None  # Drag end, in the request's coordinate space
+    end_y: Optional[float] = None  # Drag end, in the request's coordinate space
+    button: str = "left"
+    clicks: int = Field(1, ge=1, le=5)
+    hold: Optional[float] = Field(None, ge=0, le=5, description="Seconds each click is held, defaults to the backend setting")
+    duration: float = Field(0.0, ge=0, le=10, description="Path duration for moves and drags, length of waits")
+    delay: float = Field(0.0, ge=0, le=10, description="Seconds to wait after the gesture")
+
+
+class MouseGesturesRequest(BaseModel):
+    """Request model for batched mouse gestures."""
+    gestures: List[MouseGesture] = Field(..., min_length=1, max_length=100)
+    coordinates: Literal["screen", "frame", "normalized"] = "screen"  # Screen pixels, pixels of image image_id, or 0-1
+    image_id: Optional[int] = None  # Served image the coordinates refer to (X-Image-Id / transform.image_id)
+    step_id: Optional[str] = None
+    backend: Optional[Literal["xtest", "pyautogui"]] = None  # Defaults to MOUSE_BACKEND
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "gestures": [
+                    {"type": "click", "x": 700, "y": 900, "delay": 0.1},
+                    {"type": "click", "x": 820, "y": 900, "delay": 0.1},
+                    {"type": "click", "x": 940, "y": 900, "delay": 0.1},
+                    {"type": "click", "x": 600, "y": 1000}
+                ],
+                "step_id": "step_3"
+            }
+        }
+
+
 class AutoStartRequest(BaseModel):
     """Request model for auto-starting the game."""
     deck: Optional[str] = "b_red"
@@ -91,3 +181,141 @@ class AutoStartRequest(BaseModel):
                 "seed": "12345"
             }
         }
+
+
+class GameActionRequest(BaseModel):
+    """Request model for a game action run by the mod, bypassing input emulation."""
+    action: Literal[
+        "select_blind", "skip_blind", "highlight", "play", "discard", "sort_rank", "sort_suit",
+        "cash_out", "buy", "sell", "use", "reroll", "next_round", "skip_pack"
+    ]
+    indices: Optional[List[int]] = Field(None, max_length=8)  # 1-based hand cards for highlight
+    area: Optional[Literal["hand", "jokers", "consumables", "shop_jokers", "shop_vouchers", "shop_booster", "pack"]] = None
+    index: Optional[int] = Field(None, ge=1)  # 1-based card for buy, sell and use
+    step_id: Optional[str] = None  # Idempotency key, a retried step_id is not run twice
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "action": "highlight",
+                "indices": [1, 3, 4]
+            }
+        }
+
+
+class ScreenshotRequest(BaseModel):
+    """Query parameters for screenshot encoding and downscaling."""
+    format: Literal["png", "jpeg", "webp", "raw"] = "png"
+    quality: int = Field(85, ge=1, le=100)  # JPEG/WebP quality
+    compress_level: int = Field(6, ge=0, le=9)  # PNG zlib level
+    scale: Optional[float] = Field(None, gt=0, le=1)  # Takes precedence over width/height
+    width: Optional[int] = Field(None, gt=0)  # Target width in pixels
+    height: Optional[int] = Field(None, gt=0)  # Target height in pixels
+    region: Optional[str] = None  # "x,y,width,height" in pixels or a named Balatro region
+    max_age_ms: Optional[int] = Field(None, ge=0)  # Serve a buffered frame up to this old
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "format": "jpeg",
+                "quality": 75,
+                "scale": 0.5,
+                "region": "hand",
+                "max_age_ms": 200
+            }
+        }
+
+
+class ScreenWaitRequest(ScreenshotRequest):
+    """Query parameters for waiting until the screen changes or settles."""
+    since_frame: Optional[int] = None  # Reference frame id, defaults to the newest frame
+    mode: Literal["changed", "stable"] = "changed"
+    timeout_ms: int = Field(5000, ge=0, le=60000)
+    settle_ms: int = Field(300, ge=0)  # Unchanged time required in "stable" mode
+    poll_ms: int = Field(50, ge=10)
+    threshold: int = Field(16, ge=0, le=255)  # Per-pixel difference that counts as a change
+    image: bool = True  # Return only JSON metadata when False
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "since_frame": 42,
+                "mode": "stable",
+                "timeout_ms": 5000,
+                "settle_ms": 300,
+                "format": "jpeg"
+            }
+        }
+
+
+class StreamRequest(ScreenshotRequest):
+    """Query parameters for pushed frame streams."""
+    format: Literal["png", "jpeg", "webp", "raw"] = "jpeg"
+    fps: float = Field(5.0, gt=0, le=30)
+    only_changed: bool = True  # Skip frames identical to the last one sent
+    threshold: int = Field(16, ge=0, le=255)  # Per-pixel difference that counts as a change
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "format": "jpeg",
+                "quality": 70,
+                "scale": 0.5,
+                "fps": 10
+            }
+        }
+
+
+class ActRequest(BaseModel):
+    """Request model for running one action and returning the frame it produced."""
+    # Exactly one action
+    gamepad: Optional[GamepadButtonsRequest] = None
+    sequence: Optional[GamepadSequenceRequest] = None
+    click: Optional[MouseClickRequest] = None
+    move: Optional[MouseMoveRequest] = None
+    drag: Optional[MouseDragRequest] = None
+    gestures: Optional[MouseGesturesRequest] = None
+    # Settle policy
+    settle: Literal["delay", "changed", "stable"] = Field("stable", description="Wait only delay_ms, until the screen changes, or until it stops changing")
+    delay_ms: int = Field(0, ge=0, le=10000, description="Fixed wait after the action, before any screen polling")
+    settle_ms: int = Field(300, ge=0, description="Unchanged time required in stable mode")
+    timeout_ms: int = Field(3000, ge=0, le=30000)
+    poll_ms: int = Field(50, ge=10)
+    threshold: int = Field(16, ge=0, le=255)  # Per-pixel difference that counts as a change
+    # Resulting frame
+    frame: ScreenshotRequest = Field(default_factory=ScreenshotRequest, description="Encoding and region of the returned frame")
+    cursor: bool = False  # Mark the pointer on the frame and report its position
+    image: bool = True  # Return only JSON metadata when False
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "gamepad": {"buttons": "RIGHT A", "wait_mode": "delay"},
+                "settle": "stable",
+                "settle_ms": 300,
+                "frame": {"format": "jpeg", "quality": 80, "scale": 0.5}
+            }
+        }
+
+
+class LatencyProbeRequest(BaseModel):
+    """Query parameters for the input-to-photon latency probe."""
+    paths: str = "uinput,xtest,pyautogui"  # Comma-separated input paths to measure
+    trials: int = Field(10, ge=1, le=100)  # Trials per path
+    buttons: str = "RIGHT LEFT"  # Gamepad buttons alternated between trials, should move the selection and back
+    x1: Optional[int] = None  # Pointer positions alternated between trials, default left and right of the screen center
+    y1: Optional[int] = None
+    x2: Optional[int] = None
+    y2: Optional[int] = None
+    hold_ms: int = Field(50, ge=0, le=1000)  # Button hold time
+    timeout_ms: int = Field(1000, ge=50, le=10000)  # Maximum wait for a changed frame per trial
+    threshold: int = Field(16, ge=0, le=255)  # Per-pixel difference that counts as a change
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "paths": "uinput,xtest",
+                "trials": 20,
+                "buttons": "RIGHT LEFT"
+            }
+        }
@@ -0,0 +1,206 @@
+"""
+Bounded journal of input actions with step_id idempotency.
+"""
+import asyncio
+import itertools
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from api.utils.config import get_config
+from api.utils.frame_buffer import frame_buffer
+
+
+class ActionRecord:
+    """A compact record of one input action."""
+
+    __slots__ = (
+        "action_id", "step_id", "kind", "detail", "timestamp", "started", "finished",
+        "frame_before", "frame_after", "success", "job_id", "response", "error", "completion"
+    )
+
+    def __init__(self, action_id: int, kind: str, detail: Dict[str, Any], step_id: Optional[str]):
+        self.action_id = action_id
+        self.step_id = step_id
+        self.kind = kind
+        self.detail = detail
+        self.timestamp = time.time()
+        self.started = time.monotonic()
+        self.finished: Optional[float] = None
+        latest = frame_buffer.latest()
+        self.frame_before = latest.frame_id if latest else None
+        self.frame_after: Optional[int] = None
+        self.success: Optional[bool] = None
+        self.job_id: Optional[str] = None
+        self.response: Optional[Dict[str, Any]] = None
+        self.error: Optional[BaseException] = None
+        # Resolved when the action finishes, duplicate requests wait on it
+        self.completion: Future = Future()
+
+    @property
+    def duration_ms(self) -> Optional[float]:
+        """Action duration in milliseconds, None while running."""
+        if self.finished is None:
+            return None
+        return round((self.finished - self.started) * 1000, 2)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serializable summary of the record."""
+        return {
+            "action_id": self.action_id,
+            "step_id": self.step_id,
+            "kind": self.kind,
+            "detail": self.detail,
+            "timestamp": self.timestamp,
+            "started": self.started,
+            "duration_ms": self.duration_ms,
+            "frame_before": self.frame_before,
+            "frame_after": self.frame_after,
+            "success": self.success,
+            "job_id": self.job_id,
+        }
+
+
+class ActionJournal:
+    """Fixed-capacity ring buffer of action records, indexed by step_id."""
+
+    def __init__(self, capacity: int = 1024):
+        self.capacity = capacity
+        self._records = deque()
+        self._by_step: Dict[str, ActionRecord] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def begin(self, kind: str, detail: Dict[str, Any], step_id: Optional[str] = None) -> Tuple[ActionRecord, bool]:
+        """
+        Start recording an action, or find the earlier attempt with the same step_id.
+
+        Args:
+            kind: Action type, e.g. "gamepad_buttons" or "mouse_click"
+            detail: Compact description of the action
+            step_id: Client idempotency key
+
+        Returns:
+            Tuple[ActionRecord, bool]: The record and whether it is new (False means a duplicate)
+        """
+        with self._lock:
+            existing = self._by_step.get(step_id) if step_id else None
+            # Failed attempts may be retried, anything else is a duplicate
+            if existing is not None and existing.success is not False:
+                return existing, False
+
+            record = ActionRecord(next(self._ids), kind, detail, step_id)
+            if len(self._records) >= self.capacity:
+                evicted = self._records.popleft()
+                if evicted.step_id and self._by_step.get(evicted.step_id) is evicted:
+                    del self._by_step[evicted.step_id]
+            self._records.append(record)
+            if step_id:
+                self._by_step[step_id] = record
+            return record, True
+
+    def finish(self, record: ActionRecord, success: bool, response: Optional[Dict[str, Any]] = None,
+               error: Optional[BaseException] = None):
+        """
+        Mark an action as finished. Safe to call from any thread.
+
+        Args:
+            record: Record returned by begin()
+            success: Whether the action succeeded
+            response: Response returned to the client, replayed for duplicates
+            error: Exception raised to the client, re-raised for duplicates
+        """
+        with self._lock:
+            record.finished = time.monotonic()
+            # The first frame captured after the action completed
+            record.frame_after = frame_buffer.next_frame_id
+            record.success = success
+            record.response = response
+            record.error = error
+        if not record.completion.done():
+            record.completion.set_result(success)
+
+    def since(self, action_id: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        Get the records newer than an action id, oldest first.
+
+        Args:
+            action_id: Last action id the caller has seen
+            limit: Maximum number of records returned
+
+        Returns:
+            List[Dict[str, Any]]: Serialized records
+        """
+        with self._lock:
+            records = [record for record in self._records if record.action_id > action_id]
+        return [record.to_dict() for record in records[:limit]]
+
+    @property
+    def last_action_id(self) -> int:
+        """Id of the newest record, 0 when empty."""
+        with self._lock:
+            return self._records[-1].action_id if self._records else 0
+
+
+async def replay(record: ActionRecord) -> Dict[str, Any]:
+    """
+    Answer a duplicate request with the outcome of the original attempt.
+
+    Args:
+        record: Record of the original attempt
+
+    Returns:
+        Dict[str, Any]: The original response marked as replayed
+    """
+    if record.job_id and not record.completion.done():
+        # Queued without waiting, report the same job instead of queueing it again
+        return {"status": "queued", "job_id": record.job_id, "action_id": record.action_id, "replayed": True}
+
+    await asyncio.wrap_future(record.completion)
+    if record.error is not None:
+        raise record.error
+    return dict(record.response or {}, replayed=True)
+
+
+async def run_journaled(
+    kind: str,
+    detail: Dict[str, Any],
+    step_id: Optional[str],
+    action: Callable[[], Awaitable[Dict[str, Any]]]
+) -> Dict[str, Any]:
+    """
+    Run an action once per step_id and record it in the journal.
+
+    Args:
+        kind: Action type
+        detail: Compact description of the action
+        step_id: Client idempotency key
+        action: Coroutine function performing the action and returning the response
+
+    Returns:
+        Dict[str, Any]: The action response with its action_id
+    """
+    record, is_new = action_journal.begin(kind, detail, step_id)
+    if not is_new:
+        return await replay(record)
+
+    try:
+        response = await action()
+    except Exception as e:
+        action_journal.finish(record, False, error=e)
+        raise
+
+    response = dict(response, action_id=record.action_id)
+    action_journal.finish(record, True, response)
+    return response
+
+
+def _load_action_journal() -> ActionJournal:
+    """Create the action journal from the API configuration."""
+    return ActionJournal(capacity=int(get_config().get('ACTION_JOURNAL_SIZE', 1024)))
+
+
+# Shared action journal for the API process
+action_journal = _load_action_journal()
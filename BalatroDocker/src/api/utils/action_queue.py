@@ -0,0 +1,126 @@
+"""
+Per-device action queues with precise timing between queued input actions.
+"""
+import itertools
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional
+
+# Below this remaining time sleep() is too coarse and the deadline is spun on instead
+SPIN_THRESHOLD = 0.002
+
+
+def sleep_until(deadline: float):
+    """
+    Sleep until a time.perf_counter() deadline with sub-millisecond precision.
+
+    Args:
+        deadline: Target perf_counter value
+    """
+    while True:
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            return
+        if remaining > SPIN_THRESHOLD:
+            time.sleep(remaining - SPIN_THRESHOLD)
+
+
+class ActionJob:
+    """A queued action with its completion future and timings."""
+
+    def __init__(self, func: Callable[..., Any], args: tuple, kwargs: dict, description: Any = None):
+        self.job_id = str(uuid.uuid4())
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.description = description
+        self.future: Future = Future()
+        self.submitted_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    @property
+    def status(self) -> str:
+        """queued, running, done or failed."""
+        if not self.future.done():
+            return "running" if self.started_at else "queued"
+        return "failed" if self.future.exception() else "done"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serializable job summary, including the result once finished."""
+        info = {
+            "job_id": self.job_id,
+            "status": self.status,
+            "action": self.description,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+        if self.status == "done":
+            info["result"] = self.future.result()
+        elif self.status == "failed":
+            info["error"] = str(self.future.exception())
+        return info
+
+
+class ActionQueue:
+    """Runs actions for one input device in submission order on a dedicated thread."""
+
+    def __init__(self, name: str, history: int = 256):
+        self.name = name
+        self.history = history
+        self._queue: "queue.Queue[ActionJob]" = queue.Queue()
+        self._jobs: "OrderedDict[str, ActionJob]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name=f"{name}-actions", daemon=True)
+        self._thread.start()
+
+    def submit(self, func: Callable[..., Any], *args, description: Any = None, **kwargs) -> ActionJob:
+        """
+        Queue an action.
+
+        Args:
+            func: Blocking callable performing the action
+            *args: Positional arguments for func
+            description: Summary of the action reported in job listings
+            **kwargs: Keyword arguments for func
+
+        Returns:
+            ActionJob: The queued job, its future resolves with func's return value
+        """
+        job = ActionJob(func, args, kwargs, description)
+        with self._lock:
+            self._jobs[job.job_id] = job
+            # Forget the oldest finished jobs beyond the history size
+            for job_id in itertools.islice(list(self._jobs), max(0, len(self._jobs) - self.history)):
+                if self._jobs[job_id].future.done():
+                    del self._jobs[job_id]
+        self._queue.put(job)
+        return job
+
+    def get_job(self, job_id: str) -> Optional[ActionJob]:
+        """Return a recent job by id."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def pending(self) -> int:
+        """Number of jobs waiting to run."""
+        return self._queue.qsize()
+
+    def _run(self):
+        """Execute queued jobs one at a time."""
+        while True:
+            job = self._queue.get()
+            job.started_at = time.time()
+            try:
+                result = job.func(*job.args, **job.kwargs)
+            except Exception as e:
+                job.finished_at = time.time()
+                job.future.set_exception(e)
+            else:
+                job.finished_at = time.time()
+                job.future.set_result(result)
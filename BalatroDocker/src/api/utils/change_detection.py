@@ -0,0 +1,121 @@
+"""
+Screen change detection on top of the frame buffer.
+"""
+import asyncio
+import time
+from typing import List, Optional, Tuple
+
+from api.utils.frame_buffer import Frame, FrameBuffer
+from api.utils.image_processing import diff_regions
+
+WAIT_MODES = ("changed", "stable")
+
+
+class ScreenWaiter:
+    """Tracks new frames until the screen changes from, or settles after, a reference frame."""
+
+    def __init__(self, reference: Frame, mode: str = "changed", settle_ms: float = 300, threshold: int = 16,
+                 stable_since: Optional[float] = None):
+        if mode not in WAIT_MODES:
+            raise ValueError(f"Invalid wait mode '{mode}'. Valid modes: {', '.join(WAIT_MODES)}")
+        self.reference = reference
+        self.mode = mode
+        self.settle_ms = settle_ms
+        self.threshold = threshold
+        self.last = reference
+        # Start of the settle window, later than the reference when an action ran in between
+        self._stable_since = reference.monotonic if stable_since is None else stable_since
+
+    def _diff(self, previous: Frame, current: Frame) -> List[Tuple[int, int, int, int]]:
+        """Changed boxes between two frames in screen pixels."""
+        return diff_regions(previous.thumbnail(), current.thumbnail(), current.image.size, self.threshold)
+
+    def update(self, frame: Frame) -> bool:
+        """
+        Feed the newest frame.
+        
+        Args:
+            frame: Latest frame from the buffer
+            
+        Returns:
+            bool: True once the wait condition is met
+        """
+        if frame.frame_id > self.last.frame_id:
+            if self.mode == "changed":
+                self.last = frame
+                return bool(self._diff(self.reference, frame))
+
+            if self._diff(self.last, frame):
+                self._stable_since = frame.monotonic
+            self.last = frame
+
+        return self.mode == "stable" and (self.last.monotonic - self._stable_since) * 1000 >= self.settle_ms
+
+    def changed_boxes(self) -> List[Tuple[int, int, int, int]]:
+        """Boxes that differ between the reference and the last frame seen."""
+        if self.last is self.reference:
+            return []
+        return self._diff(self.reference, self.last)
+
+
+def reference_frame(buffer: FrameBuffer, since_frame: Optional[int]) -> Frame:
+    """
+    Pick the frame to compare against.
+    
+    Args:
+        buffer: Frame buffer to read from
+        since_frame: Frame id the caller last saw, or None to use the newest frame
+        
+    Returns:
+        Frame: The requested frame, the oldest buffered one if it was evicted,
+        or a fresh capture when the buffer is empty
+    """
+    if since_frame is not None:
+        frame = buffer.get_frame(since_frame)
+        if frame is None:
+            oldest = buffer.oldest()
+            if oldest and oldest.frame_id < since_frame:
+                # Ids newer than anything captured fall back to the newest frame
+                frame = buffer.latest()
+            else:
+                frame = oldest
+        if frame is not None:
+            return frame
+
+    return buffer.latest() or buffer.capture()
+
+
+def wait_for_screen_sync(buffer: FrameBuffer, waiter: ScreenWaiter, timeout_ms: float, poll_ms: float = 50) -> str:
+    """
+    Block until the waiter's condition is met or the timeout expires.
+    
+    Args:
+        buffer: Frame buffer to poll
+        waiter: Wait condition
+        timeout_ms: Maximum wait in milliseconds
+        poll_ms: Polling interval, also the maximum age of reused frames
+        
+    Returns:
+        str: The wait mode on success, or "timeout"
+    """
+    deadline = time.monotonic() + timeout_ms / 1000
+    while True:
+        if waiter.update(buffer.get(max_age_ms=poll_ms)):
+            return waiter.mode
+        if time.monotonic() >= deadline:
+            return "timeout"
+        time.sleep(poll_ms / 1000)
+
+
+async def wait_for_screen(buffer: FrameBuffer, waiter: ScreenWaiter, timeout_ms: float, poll_ms: float = 50) -> str:
+    """Async counterpart of wait_for_screen_sync that keeps the event loop free between polls."""
+    loop = asyncio.get_running_loop()
+    deadline = time.monotonic() + timeout_ms / 1000
+    while True:
+        frame = await loop.run_in_executor(None, buffer.get, poll_ms)
+        # Thumbnailing and diffing the frame is CPU work too
+        if await loop.run_in_executor(None, waiter.update, frame):
+            return waiter.mode
+        if time.monotonic() >= deadline:
+            return "timeout"
+        await asyncio.sleep(poll_ms / 1000)
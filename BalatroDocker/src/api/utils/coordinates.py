@@ -0,0 +1,147 @@
+"""
+Mapping between served frame images and screen pixels.
+
+Every image served by the API may be a crop and/or a downscale of the
+screen. Each served image gets its own image id under which its transform is
+remembered, so clients can send coordinates in the pixels of the image they
+were given, or normalized to it, and the server maps them back to the screen.
+Buffered frames are shared by every consumer, so the same frame may be served
+at several sizes: the frame id alone does not identify the image.
+"""
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from api.utils.config import get_config
+from api.utils.system import relative_to_absolute
+
+COORDINATE_SPACES = ("screen", "frame", "normalized")
+
+
+class FrameTransform:
+    """Crop origin and scale that turned the screen into a served image."""
+
+    __slots__ = ("origin_x", "origin_y", "source_width", "source_height", "width", "height", "image_id")
+
+    def __init__(self, origin: Tuple[int, int], source_size: Tuple[int, int], size: Tuple[int, int]):
+        self.origin_x, self.origin_y = origin
+        self.source_width, self.source_height = source_size
+        self.width, self.height = size
+        self.image_id: Optional[int] = None  # Assigned when registered
+
+    @classmethod
+    def from_region(
+        cls,
+        region: Optional[Tuple[int, int, int, int]],
+        source_size: Tuple[int, int],
+        size: Tuple[int, int]
+    ) -> "FrameTransform":
+        """Transform of an image cropped to region (None for the full screen) and resized to size."""
+        return cls(region[:2] if region else (0, 0), source_size, size)
+
+    @property
+    def scale(self) -> Tuple[float, float]:
+        """Served pixels per screen pixel along x and y."""
+        return self.width / self.source_width, self.height / self.source_height
+
+    def to_screen(self, x: float, y: float) -> Tuple[int, int]:
+        """Map a pixel of the served image to screen pixels."""
+        scale_x, scale_y = self.scale
+        offset_x = max(0, min(int(x / scale_x), self.source_width - 1))
+        offset_y = max(0, min(int(y / scale_y), self.source_height - 1))
+        return self.origin_x + offset_x, self.origin_y + offset_y
+
+    def normalized_to_screen(self, x: float, y: float) -> Tuple[int, int]:
+        """Map (0-1, 0-1) coordinates over the served image to screen pixels."""
+        offset_x, offset_y = relative_to_absolute(x, y, self.source_width, self.source_height)
+        return self.origin_x + offset_x, self.origin_y + offset_y
+
+    def headers(self) -> Dict[str, str]:
+        """Response headers describing the transform."""
+        scale_x, scale_y = self.scale
+        return {
+            "X-Image-Id": str(self.image_id),
+            "X-Crop-Origin": f"{self.origin_x},{self.origin_y}",
+            "X-Scale": f"{scale_x:.6g},{scale_y:.6g}",
+        }
+
+    def to_dict(self) -> Dict[str, object]:
+        """Serializable form of the transform."""
+        scale_x, scale_y = self.scale
+        return {
+            "image_id": self.image_id,
+            "crop_origin": [self.origin_x, self.origin_y],
+            "scale": [round(scale_x, 6), round(scale_y, 6)],
+            "size": [self.width, self.height],
+        }
+
+
+class FrameTransforms:
+    """Bounded map from served image id to the transform of that image."""
+
+    def __init__(self, capacity: int = 256):
+        self.capacity = capacity
+        self._transforms: "OrderedDict[int, FrameTransform]" = OrderedDict()
+        self._next_id = 1
+        self._lock = threading.Lock()
+
+    def register(self, transform: FrameTransform) -> int:
+        """Remember the transform of a served image under a new image id, and return the id."""
+        with self._lock:
+            image_id = self._next_id
+            self._next_id += 1
+            transform.image_id = image_id
+            self._transforms[image_id] = transform
+            while len(self._transforms) > self.capacity:
+                self._transforms.popitem(last=False)
+            return image_id
+
+    def get(self, image_id: int) -> Optional[FrameTransform]:
+        """Transform registered for an image id, None if unknown or expired."""
+        with self._lock:
+            return self._transforms.get(image_id)
+
+
+def to_screen_point(
+    x: float,
+    y: float,
+    space: str,
+    image_id: Optional[int],
+    screen_size: Tuple[int, int]
+) -> Tuple[int, int]:
+    """
+    Map a point given in a coordinate space to screen pixels.
+
+    Args:
+        x: X coordinate
+        y: Y coordinate
+        space: "screen" pixels, "frame" pixels of the served image image_id,
+            or "normalized" (0-1) over that image, or over the screen without image_id
+        image_id: Id of the served image the coordinates refer to
+        screen_size: (width, height) of the screen
+
+    Returns:
+        Tuple[int, int]: Screen pixel coordinates
+
+    Raises:
+        ValueError: If the space is invalid, or image_id is missing or no longer known
+    """
+    if space not in COORDINATE_SPACES:
+        raise ValueError(f"Invalid coordinate space '{space}'. Valid spaces: {', '.join(COORDINATE_SPACES)}")
+    if space == "screen":
+        return int(x), int(y)
+    if space == "normalized" and image_id is None:
+        return relative_to_absolute(x, y, *screen_size)
+
+    if image_id is None:
+        raise ValueError("image_id is required for frame coordinates")
+    transform = frame_transforms.get(image_id)
+    if transform is None:
+        raise ValueError(f"Unknown or expired image id {image_id}, request a new screenshot")
+    if space == "frame":
+        return transform.to_screen(x, y)
+    return transform.normalized_to_screen(x, y)
+
+
+# Transforms of recently served images for the API process
+frame_transforms = FrameTransforms(capacity=int(get_config().get('FRAME_TRANSFORM_HISTORY', 256)))
@@ -0,0 +1,30 @@
+"""
+Dedicated worker threads for blocking input and system calls.
+
+The mouse gets a single worker so that its actions run in request order
+without ever blocking the event loop. Gamepad input goes through its own
+action queue (api.utils.action_queue).
+"""
+import asyncio
+import functools
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Callable
+
+mouse_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mouse-input")
+
+
+async def run_in_executor(executor: Executor, func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Run a blocking callable on the given executor and await its result.
+    
+    Args:
+        executor: Executor to run the call on
+        func: Blocking callable
+        *args: Positional arguments for func
+        **kwargs: Keyword arguments for func
+        
+    Returns:
+        Any: The callable's return value
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, functools.partial(func, *args, **kwargs))
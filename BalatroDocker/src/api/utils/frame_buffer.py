@@ -0,0 +1,223 @@
+"""
+Ring buffer of recent screen frames shared by all screenshot consumers.
+"""
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Optional, List, Tuple
+
+from PIL import Image
+
+from api.utils.config import get_config
+from api.utils.image_processing import frame_thumbnail, image_digest
+from api.utils.screen_capture import capture_screen
+from api.utils.shared_frames import SharedFrameWriter, get_shared_frame_path
+
+
+class Frame:
+    """A captured screen frame with its id and capture metadata."""
+
+    __slots__ = ("frame_id", "image", "timestamp", "monotonic", "backend", "capture_ms", "_thumbnail", "_digest", "encodings")
+
+    def __init__(self, frame_id: int, image: Image.Image, backend: str, capture_ms: float):
+        self.frame_id = frame_id
+        self.image = image
+        self.timestamp = time.time()
+        self.monotonic = time.monotonic()
+        self.backend = backend
+        self.capture_ms = capture_ms
+        self._thumbnail = None
+        self._digest = None
+        # Encoded outputs keyed by encoding options, shared between stream viewers
+        self.encodings = {}
+
+    def thumbnail(self) -> Image.Image:
+        """Downsampled grayscale copy used for change detection, computed once."""
+        if self._thumbnail is None:
+            self._thumbnail = frame_thumbnail(self.image)
+        return self._thumbnail
+
+    def digest(self) -> str:
+        """Content hash of the full frame, computed once."""
+        if self._digest is None:
+            self._digest = image_digest(self.image)
+        return self._digest
+
+    @property
+    def age_ms(self) -> float:
+        """Milliseconds elapsed since the frame was captured."""
+        return (time.monotonic() - self.monotonic) * 1000
+
+
+class FrameBuffer:
+    """Keeps the last N full-screen frames and deduplicates concurrent captures."""
+
+    def __init__(self, capacity: int = 8, fps: float = 5.0, shared_writer: Optional[SharedFrameWriter] = None):
+        self.capacity = capacity
+        self.fps = fps
+        self.shared_writer = shared_writer
+        self._frames = deque(maxlen=capacity)
+        self._next_id = 1
+        self._lock = threading.Lock()
+        # Capture in flight as (sequence number, future), and the number of captures started so far
+        self._inflight: Optional[Tuple[int, Future]] = None
+        self._started = 0
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Start the background capture loop (no-op when fps is 0)."""
+        if self.fps <= 0 or (self._thread and self._thread.is_alive()):
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="frame-buffer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background capture loop."""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+            self._thread = None
+        if self.shared_writer:
+            self.shared_writer.close()
+
+    def _run(self):
+        """Capture frames at the configured rate until stopped."""
+        interval = 1.0 / self.fps
+        while not self._stop_event.is_set():
+            started = time.monotonic()
+            try:
+                self.capture()
+            except Exception as e:
+                print(f"Background frame capture failed: {e}")
+            self._stop_event.wait(max(0.0, interval - (time.monotonic() - started)))
+
+    def _capture_frame(self) -> Frame:
+        """Grab a new frame and append it to the ring buffer."""
+        start = time.perf_counter()
+        image, backend = capture_screen()
+        capture_ms = (time.perf_counter() - start) * 1000
+
+        with self._lock:
+            frame = Frame(self._next_id, image, backend, capture_ms)
+            self._next_id += 1
+            self._frames.append(frame)
+
+        # Co-located processes pick the frame up from shared memory instead of over HTTP
+        if self.shared_writer:
+            try:
+                self.shared_writer.write(frame.frame_id, frame.image, frame.timestamp)
+            except (OSError, ValueError) as e:
+                print(f"Shared frame publish failed: {e}")
+        return frame
+
+    def capture(self) -> Frame:
+        """
+        Capture a new frame, joining a capture already in flight if it started after this call.
+
+        A capture that was already running when the call came in may show the
+        screen from before the caller's last action, so the call waits for it to
+        finish and then starts (or joins) the next one.
+
+        Returns:
+            Frame: A frame captured entirely after the call
+        """
+        with self._lock:
+            ticket = self._started
+
+        while True:
+            with self._lock:
+                if self._inflight is None:
+                    self._started += 1
+                    self._inflight = (self._started, Future())
+                    owner = True
+                else:
+                    owner = False
+                number, future = self._inflight
+
+            if owner:
+                try:
+                    future.set_result(self._capture_frame())
+                except Exception as e:
+                    future.set_exception(e)
+                finally:
+                    with self._lock:
+                        self._inflight = None
+                return future.result()
+
+            if number > ticket:
+                return future.result()
+            # Started before this call, wait for it without using its frame
+            try:
+                future.result()
+            except Exception:
+                pass
+
+    def latest(self) -> Optional[Frame]:
+        """Return the newest buffered frame, if any."""
+        with self._lock:
+            return self._frames[-1] if self._frames else None
+
+    def allocate_id(self) -> int:
+        """Reserve a frame id for a capture that bypasses the buffer, e.g. a direct region grab."""
+        with self._lock:
+            frame_id = self._next_id
+            self._next_id += 1
+            return frame_id
+
+    @property
+    def next_frame_id(self) -> int:
+        """Id the next captured frame will get."""
+        with self._lock:
+            return self._next_id
+
+    def get(self, max_age_ms: Optional[float] = None) -> Frame:
+        """
+        Return the newest frame no older than max_age_ms, capturing one if needed.
+
+        Args:
+            max_age_ms: Maximum acceptable frame age in milliseconds, None forces a capture
+
+        Returns:
+            Frame: A sufficiently fresh frame
+        """
+        if max_age_ms is not None:
+            frame = self.latest()
+            if frame and frame.age_ms <= max_age_ms:
+                return frame
+        return self.capture()
+
+    def get_frame(self, frame_id: int) -> Optional[Frame]:
+        """Return the buffered frame with the given id, if it has not been evicted."""
+        with self._lock:
+            for frame in self._frames:
+                if frame.frame_id == frame_id:
+                    return frame
+            return None
+
+    def oldest(self) -> Optional[Frame]:
+        """Return the oldest buffered frame, if any."""
+        with self._lock:
+            return self._frames[0] if self._frames else None
+
+    def frames_since(self, frame_id: int) -> List[Frame]:
+        """Return the buffered frames newer than frame_id, oldest first."""
+        with self._lock:
+            return [frame for frame in self._frames if frame.frame_id > frame_id]
+
+
+def _load_frame_buffer() -> FrameBuffer:
+    """Create the frame buffer from the API configuration."""
+    config = get_config()
+    shared_path = get_shared_frame_path()
+    return FrameBuffer(
+        capacity=int(config.get('FRAME_BUFFER_SIZE', 8)),
+        fps=float(config.get('FRAME_CAPTURE_FPS', 5)),
+        shared_writer=SharedFrameWriter(shared_path) if shared_path else None,
+    )
+
+
+# Shared frame buffer for the API process
+frame_buffer = _load_frame_buffer()
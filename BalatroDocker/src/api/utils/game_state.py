@@ -0,0 +1,179 @@
+"""
+Game state snapshots exported by the BalatroLogger mod.
+
+The mod serializes a compact snapshot of G.GAME, the hand, jokers and shop
+whenever it changes. This module reads it and maps it to the GameState
+schema used by the agents (agents/models/visualizer.py).
+"""
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from api.utils.config import get_config
+
+DEFAULT_GAME_STATE_PATH = "/tmp/balatro_game_state.json"
+
+# Game states (G.STATES names) shown as each agent screen type
+SHOP_STATES = {"SHOP", "TAROT_PACK", "PLANET_PACK", "SPECTRAL_PACK", "STANDARD_PACK", "BUFFOON_PACK"}
+PLAY_STATES = {"SELECTING_HAND", "HAND_PLAYED", "DRAW_TO_HAND", "NEW_ROUND", "PLAY_TAROT", "ROUND_EVAL"}
+
+SHOP_ITEM_TYPES = {"Joker": "Joker", "Booster": "Booster Pack", "Voucher": "Voucher"}
+FOCUS_TYPES = {"hand": "Card", "jokers": "Joker", "shop": "ShopItem"}
+
+
+def get_game_state_path() -> str:
+    """Snapshot file path from the API configuration."""
+    return get_config().get('GAME_STATE_PATH', DEFAULT_GAME_STATE_PATH)
+
+
+class GameStateReader:
+    """Reads the mod's snapshot file, parsing it again only when it was replaced."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._mtime_ns: Optional[int] = None
+        self._snapshot: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+
+    def read(self) -> Optional[Dict[str, Any]]:
+        """
+        Get the latest snapshot.
+
+        Returns:
+            Optional[Dict[str, Any]]: {"seq", "snapshot", "updated_at", "age_ms"}, or None if the mod has not written one
+        """
+        try:
+            mtime_ns = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+        with self._lock:
+            if mtime_ns != self._mtime_ns:
+                with open(self.path, "r") as f:
+                    self._snapshot = json.load(f)
+                self._mtime_ns = mtime_ns
+
+            updated_at = mtime_ns / 1e9
+            return dict(self._snapshot, updated_at=updated_at, age_ms=round((time.time() - updated_at) * 1000, 2))
+
+
+def _card_name(card: Dict[str, Any]) -> str:
+    """Display name of a card, "Ace of Spades" for playing cards."""
+    if card.get("rank"):
+        name = f"{card['rank']} of {card['suit']}"
+        extras = [value for value in (card.get("enhancement"), card.get("edition"), card.get("seal")) if value]
+        return f"{name} ({', '.join(extras)})" if extras else name
+    return card.get("name") or card.get("key") or "Unknown"
+
+
+def _screen(state: Optional[str]) -> str:
+    """Agent screen type for a game state name."""
+    if state in SHOP_STATES:
+        return "Shop"
+    if state in PLAY_STATES:
+        return "Play"
+    return "Menu"
+
+
+def _summary(snapshot: Dict[str, Any], screen: str) -> str:
+    """One-line description of the snapshot."""
+    run = snapshot.get("run")
+    if not run:
+        return f"{screen} screen ({snapshot.get('state')}), no run in progress."
+    parts = [
+        f"{screen} screen ({snapshot.get('state')})",
+        f"ante {run.get('ante')} round {run.get('round')}",
+        f"{run.get('blind') or 'no blind'} with {run.get('score') or 0}/{run.get('objective') or 0} chips",
+        f"${run.get('money')}",
+        f"{run.get('hands')} hands and {run.get('discards')} discards left",
+        f"{len(snapshot.get('jokers', []))} jokers",
+    ]
+    if screen == "Shop":
+        parts.append(f"{len(snapshot.get('shop', []))} shop items")
+    return ", ".join(parts) + "."
+
+
+def _int(value: Any) -> int:
+    """Integer value of a snapshot number, 0 when missing."""
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return 0
+
+
+def to_game_state(snapshot: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Map a mod snapshot to the agents' GameState schema.
+
+    Args:
+        snapshot: The "snapshot" object written by the mod
+
+    Returns:
+        Dict[str, Any]: GameState-compatible dictionary. Gamepad button hints are not
+        exported by the mod, so gamepad_buttons is always empty, and execution_progression
+        is left to the agent.
+    """
+    screen = _screen(snapshot.get("state"))
+    run = snapshot.get("run") or {}
+    hand: List[Dict[str, Any]] = snapshot.get("hand", [])
+
+    picked_hand = None
+    poker_hand = snapshot.get("poker_hand")
+    if poker_hand:
+        picked_hand = {
+            "picked_cards": [_card_name(card) for card in hand if card.get("highlighted")],
+            # Evaluated by the game itself, so always consistent
+            "correct_picked_cards": True,
+            "hand_type": poker_hand.get("name"),
+            "level": _int(poker_hand.get("level")),
+            "chips": _int(poker_hand.get("chips")),
+            "bonus": _int(poker_hand.get("mult")),
+        }
+
+    focused = snapshot.get("focused") or {}
+    if focused.get("button"):
+        highlighted = {"type": "Button", "name": focused.get("text") or focused["button"], "description": None}
+    elif focused:
+        highlighted = {
+            "type": FOCUS_TYPES.get(focused.get("area"), "Unknown"),
+            "name": _card_name(focused),
+            "description": focused.get("set"),
+        }
+    else:
+        highlighted = {"type": "Unknown", "name": "None", "description": None}
+
+    return {
+        "summary": _summary(snapshot, screen),
+        "screen": screen,
+        "run_parameters": {
+            "hands": _int(run.get("hands")),
+            "discards": _int(run.get("discards")),
+            "money": _int(run.get("money")),
+            "ante": _int(run.get("ante")),
+            "round": _int(run.get("round")),
+            "blind": run.get("blind") or "None",
+            "current_score": _int(run.get("score")),
+            "objective_score": _int(run.get("objective")),
+        },
+        "jokers": [{"name": _card_name(joker)} for joker in snapshot.get("jokers", [])],
+        "shop_items": [
+            {
+                "name": _card_name(item),
+                "price": _int(item.get("cost")),
+                "item_type": SHOP_ITEM_TYPES.get(item.get("set"), "Other"),
+            }
+            for item in snapshot.get("shop", [])
+        ] if screen == "Shop" else [],
+        "gamepad_buttons": [],
+        "highlighted_element": highlighted,
+        "play_area": {
+            "hand": [_card_name(card) for card in hand],
+            "picked_hand": picked_hand,
+        },
+    }
+
+
+# Shared snapshot reader for the API process
+game_state_reader = GameStateReader(get_game_state_path())
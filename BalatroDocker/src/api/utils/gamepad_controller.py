@@ -3,7 +3,7 @@ Gamepad controller for handling input to Balatro game.
 """
 import subprocess
 import time
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
 
 try:
     import uinput
@@ -13,6 +13,11 @@ except ImportError:
     uinput = None
     UINPUT_AVAILABLE = False
 
+from api.utils.window_tracker import BalatroWindowTracker
+
+# Full pull of the analog triggers (ABS_Z / ABS_RZ range is 0-255)
+TRIGGER_MAX = 255
+
 
 class BalatroGamepadController:
     """Controller for handling gamepad inputs to Balatro."""
@@ -20,6 +25,8 @@ class BalatroGamepadController:
     def __init__(self):
         self.native_gamepad = None
         self.balatro_window_id = None
+        self.balatro_window_geometry = None
+        self.window_tracker = BalatroWindowTracker()
         self._init_controllers()
     
     def _init_controllers(self):
@@ -79,17 +86,26 @@ class BalatroGamepadController:
         return device
     
     def find_balatro_window(self) -> Optional[str]:
-        """Find Balatro window using wmctrl."""
+        """Find Balatro window and its geometry, over X11 when possible and wmctrl otherwise."""
+        if self.window_tracker.available:
+            window = self.window_tracker.find_window()
+            self.balatro_window_id = f"0x{window:08x}" if window else None
+            self.balatro_window_geometry = self.window_tracker.geometry() if window else None
+            return self.balatro_window_id
+
         try:
-            result = subprocess.run(['wmctrl', '-l'], capture_output=True, text=True)
+            result = subprocess.run(['wmctrl', '-lG'], capture_output=True, text=True)
             if result.returncode != 0:
                 return None
             
+            # Columns: id desktop x y width height host title...
             lines = result.stdout.strip().split('\n')
             for line in lines:
                 if 'balatro' in line.lower() or 'love' in line.lower():
-                    window_id = line.split()[0]
+                    fields = line.split()
+                    window_id = fields[0]
                     self.balatro_window_id = window_id
+                    self.balatro_window_geometry = tuple(int(v) for v in fields[2:6])
                     return window_id
             
             return None
@@ -97,8 +113,27 @@ class BalatroGamepadController:
         except Exception:
             return None
     
+    def get_balatro_window_geometry(self) -> Optional[Tuple[int, int, int, int]]:
+        """Get the (x, y, width, height) of the Balatro window, looking it up if needed."""
+        if self.window_tracker.available:
+            # Cached by the tracker and refreshed from window events
+            return self.window_tracker.geometry()
+        if not self.balatro_window_geometry:
+            self.find_balatro_window()
+        return self.balatro_window_geometry
+    
+    def invalidate_balatro_window(self):
+        """Forget the cached window, e.g. after the game was restarted."""
+        self.balatro_window_id = None
+        self.balatro_window_geometry = None
+        self.window_tracker.invalidate()
+    
     def focus_balatro_window(self) -> bool:
         """Focus Balatro window."""
+        if self.window_tracker.available:
+            # Only issues a focus request when the focus has moved away
+            return self.window_tracker.focus()
+
         try:
             if not self.balatro_window_id:
                 self.find_balatro_window()
@@ -123,51 +158,84 @@ class BalatroGamepadController:
         
         return self._press_button_native(button_name, duration)
     
+    def _button_events(self, button_name: str, pressed: bool, analog_value: int = TRIGGER_MAX) -> List[Tuple[Any, int]]:
+        """Translate a button name into the (event, value) pairs that press or release it."""
+        button_map = {
+            'A': uinput.BTN_A,
+            'B': uinput.BTN_B,
+            'X': uinput.BTN_X,
+            'Y': uinput.BTN_Y,
+            'LB': uinput.BTN_TL,
+            'RB': uinput.BTN_TR,
+            'START': uinput.BTN_START,
+            'BACK': uinput.BTN_SELECT,
+            'SELECT': uinput.BTN_SELECT,
+        }
+        
+        trigger_map = {
+            'LT': uinput.ABS_Z,
+            'RT': uinput.ABS_RZ,
+        }
+        
+        dpad_map = {
+            'UP': (uinput.ABS_HAT0Y, -1),
+            'DOWN': (uinput.ABS_HAT0Y, 1),
+            'LEFT': (uinput.ABS_HAT0X, -1),
+            'RIGHT': (uinput.ABS_HAT0X, 1),
+        }
+        
+        button_name = button_name.upper()
+        if button_name in button_map:
+            return [(button_map[button_name], 1 if pressed else 0)]
+        if button_name in trigger_map:
+            return [(trigger_map[button_name], analog_value if pressed else 0)]
+        if button_name in dpad_map:
+            axis, value = dpad_map[button_name]
+            return [(axis, value if pressed else 0)]
+        raise ValueError(f"Button '{button_name}' not recognized")
+    
+    def set_buttons(self, buttons: List[str], pressed: bool, analog_value: int = TRIGGER_MAX) -> Dict[str, Any]:
+        """
+        Press or release several buttons at once, emitted as a single report.
+        
+        Args:
+            buttons: Button names forming the chord
+            pressed: True to press, False to release
+            analog_value: Trigger value (0-255) used for LT/RT when pressing
+            
+        Returns:
+            Dict[str, Any]: Status of the operation
+        """
+        if not self.native_gamepad:
+            return {"status": "error", "message": "Native gamepad not available (uinput may not be installed)"}
+        
+        try:
+            events = [event for button in buttons for event in self._button_events(button, pressed, analog_value)]
+            for event, value in events:
+                self.native_gamepad.emit(event, value, syn=False)
+            self.native_gamepad.syn()
+            return {"status": "success", "message": f"Buttons {buttons} {'pressed' if pressed else 'released'}"}
+        except Exception as e:
+            return {"status": "error", "message": f"Native gamepad error: {e}"}
+    
     def _press_button_native(self, button_name: str, duration: float) -> Dict[str, Any]:
         """Press button with native gamepad."""
         try:            
-            button_map = {
-                'A': uinput.BTN_A,
-                'B': uinput.BTN_B,
-                'X': uinput.BTN_X,
-                'Y': uinput.BTN_Y,
-                'LB': uinput.BTN_TL,
-                'RB': uinput.BTN_TR,
-                'LT': uinput.ABS_Z,
-                'RT': uinput.ABS_RZ,
-                'START': uinput.BTN_START,
-                'BACK': uinput.BTN_SELECT,
-                'SELECT': uinput.BTN_SELECT,
-            }
-            
-            dpad_map = {
-                'UP': (uinput.ABS_HAT0Y, -1),
-                'DOWN': (uinput.ABS_HAT0Y, 1),
-                'LEFT': (uinput.ABS_HAT0X, -1),
-                'RIGHT': (uinput.ABS_HAT0X, 1),
-            }
-            
             button_name = button_name.upper()
             self.focus_balatro_window()
             
-            if button_name in button_map:
-                button = button_map[button_name]
-                self.native_gamepad.emit(button, 1)
-                self.native_gamepad.syn()
-                time.sleep(duration)
-                self.native_gamepad.emit(button, 0)
-                self.native_gamepad.syn()
-                
-            elif button_name in dpad_map:
-                axis, value = dpad_map[button_name]
-                self.native_gamepad.emit(axis, value)
-                self.native_gamepad.syn()
-                time.sleep(duration)
-                self.native_gamepad.emit(axis, 0)
-                self.native_gamepad.syn()
-                
-            else:
-                return {"status": "error", "message": f"Button '{button_name}' not recognized"}
+            try:
+                events = self._button_events(button_name, True)
+            except ValueError as e:
+                return {"status": "error", "message": str(e)}
+            
+            for event, value in events:
+                self.native_gamepad.emit(event, value)
+            self.native_gamepad.syn()
+            time.sleep(duration)
+            for event, _ in events:
+                self.native_gamepad.emit(event, 0)
+            self.native_gamepad.syn()
             
             return {
                 "status": "success",
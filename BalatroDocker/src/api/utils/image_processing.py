@@ -2,21 +2,25 @@
 Image processing utilities for screenshots and visual feedback.
 """
 import io
-from PIL import Image, ImageDraw, ImageColor
-from typing import List, Union, Optional
+import hashlib
+from PIL import Image, ImageDraw, ImageColor, ImageChops
+from typing import List, Union, Optional, Tuple
 
 
 def draw_point(image: Image.Image, point: List[Union[int, float]], color: Optional[str] = None) -> Image.Image:
     """
     Draw a point on the image with optional color.
     
+    Only the patch around the point is blended, and it is written back into
+    the given image, so pass a copy if the original must stay untouched.
+    
     Args:
-        image: PIL Image to draw on
+        image: RGB PIL Image to draw on (modified in place)
         point: [x, y] coordinates of the point
         color: Color name or None for default red
         
     Returns:
-        Image.Image: Image with point drawn
+        Image.Image: The same image with the point drawn
     """
     if isinstance(color, str):
         try:
@@ -27,30 +31,40 @@ def draw_point(image: Image.Image, point: List[Union[int, float]], color: Option
     else:
         color = (255, 0, 0, 128)  
 
-    overlay = Image.new('RGBA', image.size, (255, 255, 255, 0))
-    overlay_draw = ImageDraw.Draw(overlay)
     radius = min(image.size) * 0.05
     x, y = point
 
+    # Patch covering the marker, clipped to the image
+    left = max(0, int(x - radius))
+    top = max(0, int(y - radius))
+    right = min(image.width, int(x + radius) + 1)
+    bottom = min(image.height, int(y + radius) + 1)
+    if left >= right or top >= bottom:
+        return image
+
+    patch = image.crop((left, top, right, bottom)).convert('RGBA')
+    overlay = Image.new('RGBA', patch.size, (255, 255, 255, 0))
+    overlay_draw = ImageDraw.Draw(overlay)
+    px, py = x - left, y - top
+
     # Draw outer circle
     overlay_draw.ellipse(
-        [(x - radius, y - radius), (x + radius, y + radius)],
+        [(px - radius, py - radius), (px + radius, py + radius)],
         fill=color
     )
     
     # Draw center point
     center_radius = radius * 0.1
     overlay_draw.ellipse(
-        [(x - center_radius, y - center_radius), 
-         (x + center_radius, y + center_radius)],
+        [(px - center_radius, py - center_radius), 
+         (px + center_radius, py + center_radius)],
         fill=(0, 255, 0, 255)
     )
 
-    # Composite images
-    image = image.convert('RGBA')
-    combined = Image.alpha_composite(image, overlay)
+    # Composite only the patch and write it back
+    image.paste(Image.alpha_composite(patch, overlay).convert(image.mode), (left, top))
 
-    return combined.convert('RGB')
+    return image
 
 
 def image_to_bytes(image: Image.Image, format: str = 'PNG') -> bytes:
@@ -68,3 +82,182 @@ def image_to_bytes(image: Image.Image, format: str = 'PNG') -> bytes:
     image.save(img_buffer, format=format)
     img_buffer.seek(0)
     return img_buffer.getvalue()
+
+
+# Media types for each supported output encoding
+MEDIA_TYPES = {
+    'png': 'image/png',
+    'jpeg': 'image/jpeg',
+    'webp': 'image/webp',
+    'raw': 'application/octet-stream',
+}
+
+
+def resize_image(
+    image: Image.Image,
+    scale: Optional[float] = None,
+    width: Optional[int] = None,
+    height: Optional[int] = None
+) -> Image.Image:
+    """
+    Downscale an image by a factor or to a target size.
+    
+    Args:
+        image: PIL Image to resize
+        scale: Scale factor (0-1], takes precedence over width/height
+        width: Target width in pixels (height follows aspect ratio if omitted)
+        height: Target height in pixels (width follows aspect ratio if omitted)
+        
+    Returns:
+        Image.Image: Resized image, or the original if no resize was requested
+    """
+    src_width, src_height = image.size
+
+    if scale is not None:
+        target = (max(1, round(src_width * scale)), max(1, round(src_height * scale)))
+    elif width and height:
+        target = (width, height)
+    elif width:
+        target = (width, max(1, round(src_height * width / src_width)))
+    elif height:
+        target = (max(1, round(src_width * height / src_height)), height)
+    else:
+        return image
+
+    if target == image.size:
+        return image
+
+    # reducing_gap lets Pillow use a fast integer reduce before the bilinear pass
+    return image.resize(target, Image.BILINEAR, reducing_gap=2.0)
+
+
+def encode_image(
+    image: Image.Image,
+    format: str = 'png',
+    quality: int = 85,
+    compress_level: int = 6
+) -> bytes:
+    """
+    Encode an image for transport.
+    
+    Args:
+        image: PIL Image to encode
+        format: Output format ('png', 'jpeg', 'webp' or 'raw' for packed RGB bytes)
+        quality: Quality for lossy formats (1-100)
+        compress_level: zlib compression level for PNG (0-9)
+        
+    Returns:
+        bytes: Encoded image
+    """
+    format = format.lower()
+    if format == 'raw':
+        return image.convert('RGB').tobytes()
+
+    img_buffer = io.BytesIO()
+    if format == 'png':
+        image.save(img_buffer, format='PNG', compress_level=compress_level)
+    elif format == 'jpeg':
+        image.convert('RGB').save(img_buffer, format='JPEG', quality=quality)
+    elif format == 'webp':
+        # method=0 is the fastest WebP encoder setting
+        image.save(img_buffer, format='WEBP', quality=quality, method=0)
+    else:
+        raise ValueError(f"Unsupported image format: {format}")
+    return img_buffer.getvalue()
+
+
+def image_digest(image: Image.Image) -> str:
+    """
+    Hash the raw pixel data of an image.
+    
+    Args:
+        image: PIL Image to hash
+        
+    Returns:
+        str: Hex digest that changes whenever any pixel changes
+    """
+    # blake2b over the raw buffer is far cheaper than any encode of the same frame
+    digest = hashlib.blake2b(image.tobytes(), digest_size=16)
+    digest.update(f"{image.mode}:{image.width}x{image.height}".encode())
+    return digest.hexdigest()
+
+
+def frame_thumbnail(image: Image.Image, max_width: int = 160) -> Image.Image:
+    """
+    Build a small grayscale thumbnail used for cheap frame comparisons.
+    
+    Args:
+        image: Full resolution PIL Image
+        max_width: Approximate thumbnail width in pixels
+        
+    Returns:
+        Image.Image: Downsampled 'L' mode image
+    """
+    factor = max(1, image.width // max_width)
+    # Integer reduce before the color conversion keeps this to a few milliseconds
+    return image.reduce(factor).convert('L')
+
+
+def diff_regions(
+    previous: Image.Image,
+    current: Image.Image,
+    full_size: Tuple[int, int],
+    threshold: int = 16,
+    grid: Tuple[int, int] = (32, 18)
+) -> List[Tuple[int, int, int, int]]:
+    """
+    Find the areas that changed between two frame thumbnails.
+    
+    Changed pixels are bucketed into a coarse grid and adjacent changed cells
+    are merged into bounding boxes.
+    
+    Args:
+        previous: Thumbnail of the reference frame
+        current: Thumbnail of the new frame
+        full_size: (width, height) of the full resolution frames the boxes map to
+        threshold: Minimum per-pixel intensity difference (0-255) that counts as a change
+        grid: (columns, rows) of the change grid
+        
+    Returns:
+        List[Tuple[int, int, int, int]]: Changed (x, y, width, height) boxes in full resolution pixels
+    """
+    if previous.size != current.size:
+        return [(0, 0, full_size[0], full_size[1])]
+
+    mask = ImageChops.difference(previous, current).point(lambda v: 255 if v > threshold else 0)
+    if mask.getbbox() is None:
+        return []
+
+    columns, rows = grid
+    # Any changed pixel leaves a non-zero average in its cell
+    cells = list(mask.resize((columns, rows), Image.BOX).getdata())
+    changed = {(i % columns, i // columns) for i, value in enumerate(cells) if value > 0}
+
+    cell_width = full_size[0] / columns
+    cell_height = full_size[1] / rows
+    boxes = []
+
+    # Merge 4-connected changed cells into boxes
+    while changed:
+        stack = [changed.pop()]
+        min_col = max_col = stack[0][0]
+        min_row = max_row = stack[0][1]
+        while stack:
+            col, row = stack.pop()
+            min_col, max_col = min(min_col, col), max(max_col, col)
+            min_row, max_row = min(min_row, row), max(max_row, row)
+            for neighbour in ((col + 1, row), (col - 1, row), (col, row + 1), (col, row - 1)):
+                if neighbour in changed:
+                    changed.remove(neighbour)
+                    stack.append(neighbour)
+
+        x = round(min_col * cell_width)
+        y = round(min_row * cell_height)
+        boxes.append((
+            x,
+            y,
+            round((max_col + 1) * cell_width) - x,
+            round((max_row + 1) * cell_height) - y,
+        ))
+
+    return sorted(boxes, key=lambda box: (box[1], box[0]))
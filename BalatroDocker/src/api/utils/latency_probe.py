@@ -0,0 +1,121 @@
+"""
+Input-to-photon latency measurement on top of the frame buffer.
+"""
+import statistics
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from api.utils.change_detection import ScreenWaiter, wait_for_screen_sync
+from api.utils.frame_buffer import FrameBuffer
+from api.utils.image_processing import diff_regions
+
+# Unchanged time that counts as settled between trials
+PROBE_SETTLE_MS = 300
+
+
+def measure_input_latency(
+    buffer: FrameBuffer,
+    press: Callable[[], Any],
+    release: Optional[Callable[[], Any]] = None,
+    hold_ms: float = 50,
+    timeout_ms: float = 1000,
+    threshold: int = 16
+) -> Dict[str, Any]:
+    """
+    Inject one input and timestamp the first captured frame that differs from before it.
+
+    Frames are captured back to back instead of at the buffer rate, so the
+    resolution is one capture time. The screen should be settled when called.
+
+    Args:
+        buffer: Frame buffer used for the captures
+        press: Callable injecting the input
+        release: Callable undoing the input after hold_ms, e.g. releasing a button
+        hold_ms: Time between press and release
+        timeout_ms: Maximum wait for a changed frame
+        threshold: Minimum per-pixel intensity difference that counts as a change
+
+    Returns:
+        Dict[str, Any]: latency_ms (None on timeout), resolution_ms, frames and frame_id
+    """
+    reference = buffer.capture()
+    last_unchanged = reference.monotonic
+
+    injected = time.monotonic()
+    press()
+    inject_ms = (time.monotonic() - injected) * 1000
+
+    released = release is None
+    frames = 0
+    try:
+        while True:
+            if not released and (time.monotonic() - injected) * 1000 >= hold_ms:
+                release()
+                released = True
+
+            frame = buffer.capture()
+            frames += 1
+            if diff_regions(reference.thumbnail(), frame.thumbnail(), frame.image.size, threshold):
+                return {
+                    "latency_ms": round((frame.monotonic - injected) * 1000, 2),
+                    # The change became visible somewhere between the previous capture and this one
+                    "resolution_ms": round((frame.monotonic - max(last_unchanged, injected)) * 1000, 2),
+                    "inject_ms": round(inject_ms, 2),
+                    "frames": frames,
+                    "frame_id": frame.frame_id,
+                }
+            last_unchanged = frame.monotonic
+
+            if (frame.monotonic - injected) * 1000 >= timeout_ms:
+                return {"latency_ms": None, "inject_ms": round(inject_ms, 2), "frames": frames, "frame_id": frame.frame_id}
+    finally:
+        if not released:
+            release()
+
+
+def wait_until_settled(buffer: FrameBuffer, timeout_ms: float = 2000, settle_ms: float = PROBE_SETTLE_MS) -> str:
+    """
+    Block until the screen has stopped changing, so animations are not counted as input latency.
+
+    Args:
+        buffer: Frame buffer to poll
+        timeout_ms: Maximum wait in milliseconds
+        settle_ms: Unchanged time required
+
+    Returns:
+        str: "stable" or "timeout"
+    """
+    waiter = ScreenWaiter(buffer.get(max_age_ms=0), "stable", settle_ms)
+    return wait_for_screen_sync(buffer, waiter, timeout_ms)
+
+
+def summarize_latencies(trials: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Percentiles over the trials that produced a changed frame.
+
+    Args:
+        trials: Results of measure_input_latency
+
+    Returns:
+        Dict[str, Any]: Sample counts, timeouts and latency statistics in milliseconds
+    """
+    samples = sorted(trial["latency_ms"] for trial in trials if trial["latency_ms"] is not None)
+    summary = {"trials": len(trials), "samples": len(samples), "timeouts": len(trials) - len(samples)}
+    if not samples:
+        return summary
+
+    def percentile(pct: float) -> float:
+        # Nearest-rank percentile
+        index = max(0, min(len(samples) - 1, round(pct / 100 * len(samples)) - 1))
+        return samples[index]
+
+    summary.update({
+        "min_ms": samples[0],
+        "p50_ms": percentile(50),
+        "p90_ms": percentile(90),
+        "p95_ms": percentile(95),
+        "p99_ms": percentile(99),
+        "max_ms": samples[-1],
+        "mean_ms": round(statistics.mean(samples), 2),
+    })
+    return summary
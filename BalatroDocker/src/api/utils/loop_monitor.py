@@ -0,0 +1,57 @@
+"""
+Event loop lag monitoring for the API server.
+"""
+import asyncio
+import time
+from collections import deque
+from typing import Dict, Optional
+
+
+class EventLoopMonitor:
+    """Measures how late the event loop wakes up from a fixed-interval sleep."""
+
+    def __init__(self, interval: float = 0.1, window: int = 100):
+        self.interval = interval
+        self._samples = deque(maxlen=window)
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start sampling on the running event loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Stop sampling."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        """Record the oversleep of each interval as loop lag."""
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            self._samples.append(max(0.0, (time.perf_counter() - expected) * 1000))
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Summarize recent lag samples.
+        
+        Returns:
+            Dict[str, float]: Last and maximum lag in milliseconds over the sample window
+        """
+        samples = list(self._samples)
+        if not samples:
+            return {"last_ms": 0.0, "max_ms": 0.0}
+        return {
+            "last_ms": round(samples[-1], 2),
+            "max_ms": round(max(samples), 2),
+        }
+
+
+# Shared monitor for the API process
+loop_monitor = EventLoopMonitor()
@@ -0,0 +1,321 @@
+"""
+Command channel to the BalatroLogger mod.
+
+The mod listens on a loopback TCP port and exchanges newline-delimited JSON
+messages: requests {"id", "cmd", "args"} are answered with
+{"id", "ok", "result"/"error"}, and the mod pushes {"event": "status"},
+{"event": "state"} and {"event": "input"} messages on its own. This client
+keeps one persistent connection, reconnecting whenever the game restarts.
+"""
+import asyncio
+import itertools
+import json
+import socket
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Any, Dict, List, Optional, Tuple
+
+from api.utils.config import get_config
+
+MOD_HOST = "127.0.0.1"
+DEFAULT_MOD_IPC_PORT = 12346
+
+
+class ModCommandError(Exception):
+    """The mod received a command but reported an error running it."""
+
+
+class ModClient:
+    """Persistent connection to the mod's command channel."""
+
+    def __init__(self, host: str, port: int, reconnect_interval: float = 0.5):
+        self.host = host
+        self.port = port
+        self.reconnect_interval = reconnect_interval
+        # Last pushed values, kept across reconnects
+        self.status: Optional[str] = None
+        self.state: Optional[Dict[str, Any]] = None
+        self.frame: Optional[int] = None  # Latest game frame counter seen in a pushed event
+        self._sock: Optional[socket.socket] = None
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, Future] = {}
+        # Expected input events, in registration order: (kind, fields, future)
+        self._input_waiters: List[Tuple[str, Dict[str, Any], Future]] = []
+        self._lock = threading.Lock()
+        self._send_lock = threading.Lock()
+        self._connected = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def connected(self) -> bool:
+        """Whether the mod is currently connected."""
+        return self._connected.is_set()
+
+    def start(self):
+        """Start connecting to the mod in a background thread."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="mod-client", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Close the connection and stop reconnecting."""
+        self._stop_event.set()
+        with self._lock:
+            sock = self._sock
+        if sock:
+            # Unblocks the reader thread
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        if self._thread:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def _run(self):
+        """Connect, read messages until the connection drops, and retry."""
+        while not self._stop_event.is_set():
+            try:
+                sock = socket.create_connection((self.host, self.port), timeout=1)
+            except OSError:
+                self._stop_event.wait(self.reconnect_interval)
+                continue
+
+            sock.settimeout(None)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            with self._lock:
+                self._sock = sock
+            self._connected.set()
+            try:
+                self._read(sock)
+            except (OSError, ValueError):
+                pass
+            finally:
+                self._connected.clear()
+                with self._lock:
+                    self._sock = None
+                    pending = list(self._pending.values()) + [future for _, _, future in self._input_waiters]
+                    self._pending.clear()
+                    self._input_waiters.clear()
+                for future in pending:
+                    if not future.done():
+                        future.set_exception(ConnectionError("Connection to the mod was lost"))
+                sock.close()
+
+    def _read(self, sock: socket.socket):
+        """Dispatch every message received on the connection."""
+        with sock.makefile("r", encoding="utf-8", newline="\n") as lines:
+            for line in lines:
+                if line.strip():
+                    self._dispatch(json.loads(line))
+
+    def _dispatch(self, message: Dict[str, Any]):
+        """Store pushed events and resolve the request a response answers."""
+        event = message.get("event")
+        if event and message.get("frame") is not None:
+            self.frame = message["frame"]
+
+        if event == "input":
+            self._acknowledge(message)
+        elif event == "status":
+            self.status = message.get("status")
+        elif event == "state":
+            self.state = {"seq": message.get("seq"), "snapshot": message.get("snapshot"), "updated_at": time.time()}
+        elif "id" in message:
+            with self._lock:
+                future = self._pending.pop(message["id"], None)
+            if future and not future.done():
+                future.set_result(message)
+
+    def _acknowledge(self, event: Dict[str, Any]):
+        """Resolve the first input expectation the event matches."""
+        with self._lock:
+            for index, (kind, fields, future) in enumerate(self._input_waiters):
+                if kind == event.get("kind") and all(event.get(key) == value for key, value in fields.items()):
+                    del self._input_waiters[index]
+                    break
+            else:
+                return
+        if not future.done():
+            future.set_result(event)
+
+    def expect_inputs(self, expected: List[Tuple[str, Dict[str, Any]]]) -> Optional[List[Future]]:
+        """
+        Register input events the game should report, before injecting the input.
+
+        Args:
+            expected: (kind, fields) pairs in order, e.g. ("gamepad_pressed", {"button": "a"})
+
+        Returns:
+            Optional[List[Future]]: Futures resolving to each input event, or None if the mod is not connected
+        """
+        if not self.connected:
+            return None
+        futures = [Future() for _ in expected]
+        with self._lock:
+            self._input_waiters.extend((kind, fields, future) for (kind, fields), future in zip(expected, futures))
+        return futures
+
+    def drop_inputs(self, futures: List[Future]):
+        """
+        Forget input expectations, e.g. when injecting the input failed.
+
+        Args:
+            futures: Futures from expect_inputs(), those not resolved yet are cancelled
+        """
+        with self._lock:
+            self._input_waiters = [waiter for waiter in self._input_waiters if waiter[2] not in futures]
+        for future in futures:
+            future.cancel()
+
+    def _input_ack(self, futures: List[Future]) -> Dict[str, Any]:
+        """Acknowledgement summary, dropping expectations that were not met."""
+        self.drop_inputs(futures)
+        frames = [
+            future.result()["frame"] if future.done() and not future.cancelled() and future.exception() is None else None
+            for future in futures
+        ]
+        return {
+            "acknowledged": all(frame is not None for frame in frames),
+            "frames": frames,
+            "frame": frames[-1],
+        }
+
+    def wait_inputs(self, futures: List[Future], timeout: float) -> Dict[str, Any]:
+        """
+        Wait for expected input events.
+
+        Args:
+            futures: Futures from expect_inputs()
+            timeout: Seconds to wait for all of them
+
+        Returns:
+            Dict[str, Any]: "acknowledged" when all were reported, the game "frames" that consume each
+            event (None if not reported) and the last one as "frame"
+        """
+        deadline = time.monotonic() + timeout
+        for future in futures:
+            try:
+                future.result(max(0.0, deadline - time.monotonic()))
+            except (FutureTimeoutError, ConnectionError):
+                break
+        return self._input_ack(futures)
+
+    async def await_inputs(self, futures: List[Future], timeout: float) -> Dict[str, Any]:
+        """Wait for expected input events from the event loop, see wait_inputs()."""
+        try:
+            await asyncio.wait_for(asyncio.gather(*(asyncio.wrap_future(future) for future in futures)), timeout)
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        return self._input_ack(futures)
+
+    def submit(self, cmd: str, args: Optional[Dict[str, Any]] = None) -> Future:
+        """
+        Send a command without waiting for its response.
+
+        Args:
+            cmd: Command name, one of the mod's COMMANDS
+            args: Command arguments
+
+        Returns:
+            Future: Resolves to the mod's response message
+
+        Raises:
+            ConnectionError: If the mod is not connected
+        """
+        future: Future = Future()
+        request_id = next(self._ids)
+        with self._lock:
+            sock = self._sock
+            if sock is None:
+                raise ConnectionError("Mod command channel not connected, is Balatro running with the mod?")
+            self._pending[request_id] = future
+
+        payload = json.dumps({"id": request_id, "cmd": cmd, "args": args or {}}) + "\n"
+        try:
+            with self._send_lock:
+                sock.sendall(payload.encode("utf-8"))
+        except OSError as e:
+            with self._lock:
+                self._pending.pop(request_id, None)
+            raise ConnectionError(f"Error sending '{cmd}' to the mod: {e}")
+        future.request_id = request_id
+        return future
+
+    def _result(self, cmd: str, response: Dict[str, Any]) -> Any:
+        """Result of a response, raising the mod's error."""
+        if not response.get("ok"):
+            raise ModCommandError(f"{cmd}: {response.get('error')}")
+        return response.get("result")
+
+    def _forget(self, future: Future):
+        """Drop a request nobody is waiting for anymore."""
+        with self._lock:
+            self._pending.pop(getattr(future, "request_id", None), None)
+
+    def request(self, cmd: str, args: Optional[Dict[str, Any]] = None, timeout: float = 2.0) -> Any:
+        """
+        Run a command and wait for its result.
+
+        Args:
+            cmd: Command name
+            args: Command arguments
+            timeout: Seconds to wait for the response
+
+        Returns:
+            Any: The command result
+
+        Raises:
+            ConnectionError: If the mod is not connected or the connection drops
+            TimeoutError: If the mod does not answer in time
+            ModCommandError: If the command failed in the mod
+        """
+        future = self.submit(cmd, args)
+        try:
+            response = future.result(timeout)
+        except FutureTimeoutError:
+            self._forget(future)
+            raise TimeoutError(f"The mod did not answer '{cmd}' within {timeout}s")
+        return self._result(cmd, response)
+
+    async def call(
+        self,
+        cmd: str,
+        args: Optional[Dict[str, Any]] = None,
+        timeout: float = 2.0,
+        connect_timeout: float = 0.0
+    ) -> Any:
+        """
+        Run a command from the event loop without blocking it.
+
+        Args:
+            cmd: Command name
+            args: Command arguments
+            timeout: Seconds to wait for the response
+            connect_timeout: Seconds to wait for the mod to connect, e.g. while the game loads
+
+        Returns:
+            Any: The command result
+
+        Raises:
+            ConnectionError, TimeoutError, ModCommandError: As request()
+        """
+        deadline = time.monotonic() + connect_timeout
+        while not self.connected and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+
+        future = self.submit(cmd, args)
+        try:
+            response = await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            self._forget(future)
+            raise TimeoutError(f"The mod did not answer '{cmd}' within {timeout}s")
+        return self._result(cmd, response)
+
+
+# Command channel to the mod for the API process
+mod_client = ModClient(MOD_HOST, int(get_config().get('MOD_IPC_PORT', DEFAULT_MOD_IPC_PORT)))
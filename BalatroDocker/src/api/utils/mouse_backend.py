@@ -0,0 +1,237 @@
+"""
+Mouse input backends.
+
+The XTest backend injects pointer events over a persistent X11 connection,
+so a click costs little more than an X round trip. pyautogui is kept as a
+fallback and can be selected with MOUSE_BACKEND in the configuration.
+"""
+import ctypes
+import ctypes.util
+import math
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from api.utils import screen_capture as _x11
+from api.utils.action_queue import sleep_until
+from api.utils.config import get_config
+
+try:
+    import pyautogui
+    PYAUTOGUI_AVAILABLE = True
+except ImportError:
+    print("Warning: pyautogui not available. Mouse input requires XTest.")
+    pyautogui = None
+    PYAUTOGUI_AVAILABLE = False
+
+try:
+    _libxtst = ctypes.CDLL(ctypes.util.find_library("Xtst") or "libXtst.so.6")
+    XTEST_AVAILABLE = _x11.XSHM_AVAILABLE
+except OSError:
+    print("Warning: libXtst not available. Mouse input will use pyautogui.")
+    _libxtst = None
+    XTEST_AVAILABLE = False
+
+if XTEST_AVAILABLE:
+    _libxtst.XTestQueryExtension.argtypes = [
+        ctypes.c_void_p, ctypes.POINTER(ctypes.c_int), ctypes.POINTER(ctypes.c_int),
+        ctypes.POINTER(ctypes.c_int), ctypes.POINTER(ctypes.c_int),
+    ]
+    _libxtst.XTestFakeMotionEvent.argtypes = [ctypes.c_void_p, ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_ulong]
+    _libxtst.XTestFakeButtonEvent.argtypes = [ctypes.c_void_p, ctypes.c_uint, ctypes.c_int, ctypes.c_ulong]
+
+# X11 pointer button numbers
+MOUSE_BUTTONS = {"left": 1, "middle": 2, "right": 3}
+
+# Rate of intermediate motion events for moves and drags with a duration
+DEFAULT_MOTION_RATE_HZ = 120
+
+
+class XTestMouse:
+    """Pointer injection through the XTest extension."""
+
+    name = "xtest"
+
+    def __init__(self, display_name: Optional[str] = None, click_hold: float = 0.02,
+                 motion_rate_hz: float = DEFAULT_MOTION_RATE_HZ):
+        self.display_name = display_name or os.environ.get("DISPLAY", ":0")
+        self.click_hold = click_hold
+        self.motion_rate_hz = motion_rate_hz
+        self.display = None
+        self.root = None
+        self.screen_size = _x11.DEFAULT_SCREEN_SIZE
+        self.available = False
+        self._lock = threading.RLock()
+        self._init_display()
+
+    def _init_display(self):
+        """Open the X connection and check for the XTest extension."""
+        try:
+            if not XTEST_AVAILABLE:
+                return
+            self.display = _x11._libx11.XOpenDisplay(self.display_name.encode())
+            if not self.display:
+                raise RuntimeError(f"Cannot open display {self.display_name}")
+
+            event_base, error_base, major, minor = (ctypes.c_int() for _ in range(4))
+            if not _libxtst.XTestQueryExtension(self.display, ctypes.byref(event_base), ctypes.byref(error_base),
+                                                ctypes.byref(major), ctypes.byref(minor)):
+                raise RuntimeError("XTest extension not available")
+
+            screen = _x11._libx11.XDefaultScreen(self.display)
+            self.root = _x11._libx11.XRootWindow(self.display, screen)
+            # The Xvfb screen never changes size, read it once
+            self.screen_size = (_x11._libx11.XDisplayWidth(self.display, screen),
+                                _x11._libx11.XDisplayHeight(self.display, screen))
+            self.available = True
+        except Exception as e:
+            print(f"Failed to initialize XTest mouse: {e}")
+            if self.display:
+                _x11._libx11.XCloseDisplay(self.display)
+                self.display = None
+
+    def _button(self, button: str) -> int:
+        """X button number for a button name."""
+        if button not in MOUSE_BUTTONS:
+            raise ValueError(f"Invalid mouse button '{button}'. Valid buttons: {', '.join(MOUSE_BUTTONS)}")
+        return MOUSE_BUTTONS[button]
+
+    def _motion(self, x: int, y: int):
+        """Queue a pointer motion to absolute screen coordinates."""
+        _libxtst.XTestFakeMotionEvent(self.display, -1, int(x), int(y), 0)
+
+    def _sync(self):
+        """Wait until the server has processed the queued events."""
+        _x11._libx11.XSync(self.display, 0)
+
+    def _path(self, start: Tuple[int, int], end: Tuple[int, int], duration: float):
+        """Move along a straight line at the motion rate, ending exactly on the target."""
+        steps = max(1, math.ceil(duration * self.motion_rate_hz))
+        began = time.perf_counter()
+        for step in range(1, steps + 1):
+            t = step / steps
+            self._motion(round(start[0] + (end[0] - start[0]) * t), round(start[1] + (end[1] - start[1]) * t))
+            self._sync()
+            if step < steps:
+                sleep_until(began + duration * t)
+
+    def position(self) -> Tuple[int, int]:
+        """Current pointer position in screen pixels."""
+        with self._lock:
+            root_return, child_return = ctypes.c_ulong(), ctypes.c_ulong()
+            root_x, root_y, win_x, win_y = (ctypes.c_int() for _ in range(4))
+            mask = ctypes.c_uint()
+            _x11._libx11.XQueryPointer(
+                self.display, self.root,
+                ctypes.byref(root_return), ctypes.byref(child_return),
+                ctypes.byref(root_x), ctypes.byref(root_y),
+                ctypes.byref(win_x), ctypes.byref(win_y),
+                ctypes.byref(mask)
+            )
+            return root_x.value, root_y.value
+
+    def move(self, x: int, y: int, duration: float = 0.0):
+        """Move the pointer, along a timed path when duration is set."""
+        with self._lock:
+            if duration > 0:
+                self._path(self.position(), (x, y), duration)
+            else:
+                self._motion(x, y)
+                self._sync()
+
+    def click(self, x: int, y: int, button: str = "left", clicks: int = 1, hold: Optional[float] = None):
+        """Click at a position, holding each press long enough for the game to see it."""
+        number = self._button(button)
+        hold = self.click_hold if hold is None else hold
+        with self._lock:
+            self._motion(x, y)
+            for _ in range(clicks):
+                _libxtst.XTestFakeButtonEvent(self.display, number, 1, 0)
+                self._sync()
+                sleep_until(time.perf_counter() + hold)
+                _libxtst.XTestFakeButtonEvent(self.display, number, 0, 0)
+                self._sync()
+
+    def drag(self, start_x: int, start_y: int, end_x: int, end_y: int, duration: float = 0.5, button: str = "left"):
+        """Press at the start, follow a rate-controlled path to the end and release."""
+        number = self._button(button)
+        with self._lock:
+            self._motion(start_x, start_y)
+            _libxtst.XTestFakeButtonEvent(self.display, number, 1, 0)
+            self._sync()
+            sleep_until(time.perf_counter() + self.click_hold)
+            self._path((start_x, start_y), (end_x, end_y), duration)
+            _libxtst.XTestFakeButtonEvent(self.display, number, 0, 0)
+            self._sync()
+
+
+class PyAutoGuiMouse:
+    """Pointer injection through pyautogui."""
+
+    name = "pyautogui"
+
+    def __init__(self, click_hold: float = 0.05):
+        self.click_hold = click_hold
+        self.available = PYAUTOGUI_AVAILABLE
+        self.screen_size = tuple(pyautogui.size()) if PYAUTOGUI_AVAILABLE else _x11.DEFAULT_SCREEN_SIZE
+
+    def position(self) -> Tuple[int, int]:
+        """Current pointer position in screen pixels."""
+        x, y = pyautogui.position()
+        return x, y
+
+    def move(self, x: int, y: int, duration: float = 0.0):
+        """Move the pointer."""
+        pyautogui.moveTo(x, y, duration=duration)
+
+    def click(self, x: int, y: int, button: str = "left", clicks: int = 1, hold: Optional[float] = None):
+        """Click at a position."""
+        for _ in range(clicks):
+            pyautogui.moveTo(x, y, duration=0)
+            pyautogui.mouseDown(button=button)
+            time.sleep(self.click_hold if hold is None else hold)
+            pyautogui.mouseUp(button=button)
+
+    def drag(self, start_x: int, start_y: int, end_x: int, end_y: int, duration: float = 0.5, button: str = "left"):
+        """Drag between two positions."""
+        pyautogui.drag(end_x - start_x, end_y - start_y, duration=duration, button=button, start=(start_x, start_y))
+
+
+def _load_mouse_backends() -> Dict[str, object]:
+    """Create the available mouse backends from the API configuration."""
+    config = get_config()
+    click_hold = float(config.get('MOUSE_CLICK_HOLD_MS', 20)) / 1000
+    backends = {}
+
+    xtest = XTestMouse(click_hold=click_hold, motion_rate_hz=float(config.get('MOUSE_MOTION_RATE_HZ', DEFAULT_MOTION_RATE_HZ)))
+    if xtest.available:
+        backends[xtest.name] = xtest
+    if PYAUTOGUI_AVAILABLE:
+        backends[PyAutoGuiMouse.name] = PyAutoGuiMouse()
+    return backends
+
+
+mouse_backends = _load_mouse_backends()
+DEFAULT_MOUSE_BACKEND = get_config().get('MOUSE_BACKEND', 'xtest')
+
+
+def get_mouse_backend(name: Optional[str] = None):
+    """
+    Get a mouse backend by name, falling back to any available one.
+
+    Args:
+        name: "xtest" or "pyautogui", None uses MOUSE_BACKEND from the configuration
+
+    Returns:
+        The selected backend
+
+    Raises:
+        RuntimeError: If no mouse backend is available
+    """
+    name = name or DEFAULT_MOUSE_BACKEND
+    if name in mouse_backends:
+        return mouse_backends[name]
+    if mouse_backends:
+        return next(iter(mouse_backends.values()))
+    raise RuntimeError("No mouse backend available (install libXtst or pyautogui)")
@@ -0,0 +1,99 @@
+"""
+Named screen regions of the Balatro layout and region resolution helpers.
+"""
+from typing import Dict, Optional, Tuple
+
+# Rectangles as (x, y, width, height) fractions of the Balatro window,
+# measured on the 16:9 layout the game uses under Xvfb.
+BALATRO_REGIONS: Dict[str, Tuple[float, float, float, float]] = {
+    # Left sidebar
+    "hud": (0.04, 0.0, 0.225, 1.0),
+    "blind": (0.04, 0.07, 0.225, 0.30),
+    "score": (0.04, 0.37, 0.225, 0.27),
+    "run_stats": (0.12, 0.65, 0.145, 0.29),
+    # Top rows
+    "jokers": (0.27, 0.05, 0.445, 0.25),
+    "consumables": (0.715, 0.05, 0.21, 0.25),
+    # Play area
+    "hand": (0.27, 0.56, 0.56, 0.26),
+    "hand_buttons": (0.375, 0.82, 0.43, 0.145),
+    "deck": (0.82, 0.72, 0.115, 0.26),
+    # Shop
+    "shop": (0.285, 0.33, 0.525, 0.65),
+    "shop_jokers": (0.43, 0.33, 0.37, 0.28),
+    "shop_vouchers": (0.305, 0.64, 0.245, 0.32),
+    "shop_boosters": (0.55, 0.64, 0.235, 0.32),
+}
+
+
+def clamp_region(region: Tuple[int, int, int, int], screen_size: Tuple[int, int]) -> Tuple[int, int, int, int]:
+    """
+    Clamp a pixel rectangle to the screen bounds.
+    
+    Args:
+        region: (x, y, width, height) rectangle in screen pixels
+        screen_size: (width, height) of the screen in pixels
+        
+    Returns:
+        Tuple[int, int, int, int]: Rectangle fully inside the screen
+    """
+    screen_width, screen_height = screen_size
+    x, y, width, height = region
+
+    x = max(0, min(screen_width - 1, x))
+    y = max(0, min(screen_height - 1, y))
+    width = max(1, min(screen_width - x, width))
+    height = max(1, min(screen_height - y, height))
+
+    return x, y, width, height
+
+
+def resolve_region(
+    spec: str,
+    window_geometry: Optional[Tuple[int, int, int, int]],
+    screen_size: Tuple[int, int]
+) -> Tuple[int, int, int, int]:
+    """
+    Resolve a region specification to a pixel rectangle on the screen.
+    
+    Args:
+        spec: Either "x,y,width,height" in screen pixels or a name from BALATRO_REGIONS
+        window_geometry: (x, y, width, height) of the Balatro window, or None to use the full screen
+        screen_size: (width, height) of the screen in pixels
+        
+    Returns:
+        Tuple[int, int, int, int]: Clamped (x, y, width, height) rectangle in screen pixels
+        
+    Raises:
+        ValueError: If the specification is malformed or names an unknown region
+    """
+    spec = spec.strip()
+
+    if "," in spec:
+        parts = spec.split(",")
+        if len(parts) != 4:
+            raise ValueError(f"Region must be 'x,y,width,height', got '{spec}'")
+        try:
+            x, y, width, height = (int(float(p)) for p in parts)
+        except (ValueError, OverflowError):
+            raise ValueError(f"Region values must be finite numbers, got '{spec}'")
+        if width <= 0 or height <= 0:
+            raise ValueError("Region width and height must be positive")
+        return clamp_region((x, y, width, height), screen_size)
+
+    name = spec.lower()
+    if name not in BALATRO_REGIONS:
+        raise ValueError(f"Unknown region '{spec}'. Valid regions: {', '.join(BALATRO_REGIONS)}")
+
+    win_x, win_y, win_width, win_height = window_geometry or (0, 0, *screen_size)
+    rel_x, rel_y, rel_width, rel_height = BALATRO_REGIONS[name]
+
+    return clamp_region(
+        (
+            win_x + round(rel_x * win_width),
+            win_y + round(rel_y * win_height),
+            round(rel_width * win_width),
+            round(rel_height * win_height),
+        ),
+        screen_size
+    )
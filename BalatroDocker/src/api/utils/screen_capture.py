@@ -0,0 +1,432 @@
+"""
+Screen capture backends for the Xvfb display.
+
+The primary backend keeps a single X11 connection open and reads the root
+window through the MIT-SHM extension into a reusable shared memory segment.
+ImageMagick ``import`` is kept as a fallback for displays without MIT-SHM.
+"""
+import ctypes
+import ctypes.util
+import io
+import os
+import subprocess
+import threading
+from typing import Dict, Optional, Tuple
+
+from PIL import Image
+
+try:
+    _libx11 = ctypes.CDLL(ctypes.util.find_library("X11") or "libX11.so.6")
+    _libxext = ctypes.CDLL(ctypes.util.find_library("Xext") or "libXext.so.6")
+    _libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+    XSHM_AVAILABLE = True
+except OSError:
+    print("Warning: libX11/libXext not available. Screenshots will use ImageMagick import.")
+    _libx11 = _libxext = _libc = None
+    XSHM_AVAILABLE = False
+
+# X11 / SysV IPC constants
+Z_PIXMAP = 2
+ALL_PLANES = 0xFFFFFFFF
+IPC_PRIVATE = 0
+IPC_CREAT = 0o1000
+IPC_RMID = 0
+
+# Maximum number of XImage headers kept for region captures
+MAX_CACHED_IMAGES = 32
+
+# Xvfb screen size configured in supervisord.conf
+DEFAULT_SCREEN_SIZE = (1920, 1080)
+
+
+class _XImageFuncs(ctypes.Structure):
+    _fields_ = [
+        ("create_image", ctypes.c_void_p),
+        ("destroy_image", ctypes.c_void_p),
+        ("get_pixel", ctypes.c_void_p),
+        ("put_pixel", ctypes.c_void_p),
+        ("sub_image", ctypes.c_void_p),
+        ("add_pixel", ctypes.c_void_p),
+    ]
+
+
+class _XImage(ctypes.Structure):
+    _fields_ = [
+        ("width", ctypes.c_int),
+        ("height", ctypes.c_int),
+        ("xoffset", ctypes.c_int),
+        ("format", ctypes.c_int),
+        ("data", ctypes.c_void_p),
+        ("byte_order", ctypes.c_int),
+        ("bitmap_unit", ctypes.c_int),
+        ("bitmap_bit_order", ctypes.c_int),
+        ("bitmap_pad", ctypes.c_int),
+        ("depth", ctypes.c_int),
+        ("bytes_per_line", ctypes.c_int),
+        ("bits_per_pixel", ctypes.c_int),
+        ("red_mask", ctypes.c_ulong),
+        ("green_mask", ctypes.c_ulong),
+        ("blue_mask", ctypes.c_ulong),
+        ("obdata", ctypes.c_void_p),
+        ("f", _XImageFuncs),
+    ]
+
+
+class _XShmSegmentInfo(ctypes.Structure):
+    _fields_ = [
+        ("shmseg", ctypes.c_ulong),
+        ("shmid", ctypes.c_int),
+        ("shmaddr", ctypes.c_void_p),
+        ("readOnly", ctypes.c_int),
+    ]
+
+
+class _XErrorEvent(ctypes.Structure):
+    _fields_ = [
+        ("type", ctypes.c_int),
+        ("display", ctypes.c_void_p),
+        ("resourceid", ctypes.c_ulong),
+        ("serial", ctypes.c_ulong),
+        ("error_code", ctypes.c_ubyte),
+        ("request_code", ctypes.c_ubyte),
+        ("minor_code", ctypes.c_ubyte),
+    ]
+
+
+_XErrorHandler = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_void_p, ctypes.POINTER(_XErrorEvent))
+
+# Last X protocol error seen by the process-wide handler, per connection (display pointer)
+_x_errors: Dict[int, int] = {}
+
+
+def _on_x_error(display, event) -> int:
+    """Record X protocol errors instead of letting Xlib abort the process."""
+    _x_errors[display] = event.contents.error_code
+    return 0
+
+
+def take_x_error(display: int) -> Optional[int]:
+    """
+    Get and clear the last X error recorded for a connection.
+
+    Each connection has its own slot, so callers only need their own lock around
+    an Xlib call and the check of its error.
+
+    Args:
+        display: Display pointer returned by XOpenDisplay
+
+    Returns:
+        Optional[int]: X error code, or None if there was no error since the last call
+    """
+    return _x_errors.pop(display, None)
+
+
+# Keep a reference so the callback is not garbage collected
+_x_error_handler = _XErrorHandler(_on_x_error)
+
+if XSHM_AVAILABLE:
+    _libx11.XInitThreads.restype = ctypes.c_int
+    _libx11.XOpenDisplay.argtypes = [ctypes.c_char_p]
+    _libx11.XOpenDisplay.restype = ctypes.c_void_p
+    _libx11.XCloseDisplay.argtypes = [ctypes.c_void_p]
+    _libx11.XDefaultScreen.argtypes = [ctypes.c_void_p]
+    _libx11.XDefaultScreen.restype = ctypes.c_int
+    _libx11.XRootWindow.argtypes = [ctypes.c_void_p, ctypes.c_int]
+    _libx11.XRootWindow.restype = ctypes.c_ulong
+    _libx11.XDisplayWidth.argtypes = [ctypes.c_void_p, ctypes.c_int]
+    _libx11.XDisplayHeight.argtypes = [ctypes.c_void_p, ctypes.c_int]
+    _libx11.XDefaultVisual.argtypes = [ctypes.c_void_p, ctypes.c_int]
+    _libx11.XDefaultVisual.restype = ctypes.c_void_p
+    _libx11.XDefaultDepth.argtypes = [ctypes.c_void_p, ctypes.c_int]
+    _libx11.XSync.argtypes = [ctypes.c_void_p, ctypes.c_int]
+    _libx11.XFree.argtypes = [ctypes.c_void_p]
+    _libx11.XQueryPointer.argtypes = [
+        ctypes.c_void_p, ctypes.c_ulong,
+        ctypes.POINTER(ctypes.c_ulong), ctypes.POINTER(ctypes.c_ulong),
+        ctypes.POINTER(ctypes.c_int), ctypes.POINTER(ctypes.c_int),
+        ctypes.POINTER(ctypes.c_int), ctypes.POINTER(ctypes.c_int),
+        ctypes.POINTER(ctypes.c_uint),
+    ]
+    _libx11.XSetErrorHandler.argtypes = [_XErrorHandler]
+    _libx11.XSetErrorHandler.restype = ctypes.c_void_p
+
+    _libxext.XShmQueryExtension.argtypes = [ctypes.c_void_p]
+    _libxext.XShmCreateImage.argtypes = [
+        ctypes.c_void_p, ctypes.c_void_p, ctypes.c_uint, ctypes.c_int,
+        ctypes.c_char_p, ctypes.POINTER(_XShmSegmentInfo), ctypes.c_uint, ctypes.c_uint,
+    ]
+    _libxext.XShmCreateImage.restype = ctypes.POINTER(_XImage)
+    _libxext.XShmAttach.argtypes = [ctypes.c_void_p, ctypes.POINTER(_XShmSegmentInfo)]
+    _libxext.XShmDetach.argtypes = [ctypes.c_void_p, ctypes.POINTER(_XShmSegmentInfo)]
+    _libxext.XShmGetImage.argtypes = [
+        ctypes.c_void_p, ctypes.c_ulong, ctypes.POINTER(_XImage),
+        ctypes.c_int, ctypes.c_int, ctypes.c_ulong,
+    ]
+
+    _libc.shmget.argtypes = [ctypes.c_int, ctypes.c_size_t, ctypes.c_int]
+    _libc.shmget.restype = ctypes.c_int
+    _libc.shmat.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_int]
+    _libc.shmat.restype = ctypes.c_void_p
+    _libc.shmdt.argtypes = [ctypes.c_void_p]
+    _libc.shmctl.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_void_p]
+
+    # Must run before any other Xlib call so the connection can be shared across threads
+    _libx11.XInitThreads()
+    _libx11.XSetErrorHandler(_x_error_handler)
+
+
+class X11FrameGrabber:
+    """Persistent MIT-SHM capture of the X11 root window."""
+
+    def __init__(self, display_name: Optional[str] = None):
+        self.display_name = display_name or os.environ.get("DISPLAY", ":0")
+        self.display = None
+        self.root = None
+        self.width = 0
+        self.height = 0
+        self.available = False
+        self._visual = None
+        self._depth = 0
+        self._shminfo = _XShmSegmentInfo()
+        self._images = {}
+        self._lock = threading.Lock()
+        self._init_display()
+
+    def _init_display(self):
+        """Open the X connection and attach a screen-sized shared memory segment."""
+        try:
+            if not XSHM_AVAILABLE:
+                return
+            self._open()
+            self.available = True
+        except Exception as e:
+            print(f"Failed to initialize XShm frame grabber: {e}")
+            self.close()
+
+    def _open(self):
+        """Connect to the display and allocate the shared segment."""
+        self.display = _libx11.XOpenDisplay(self.display_name.encode())
+        if not self.display:
+            raise RuntimeError(f"Cannot open display {self.display_name}")
+
+        if not _libxext.XShmQueryExtension(self.display):
+            raise RuntimeError("MIT-SHM extension not available")
+
+        screen = _libx11.XDefaultScreen(self.display)
+        self.root = _libx11.XRootWindow(self.display, screen)
+        self.width = _libx11.XDisplayWidth(self.display, screen)
+        self.height = _libx11.XDisplayHeight(self.display, screen)
+        self._visual = _libx11.XDefaultVisual(self.display, screen)
+        self._depth = _libx11.XDefaultDepth(self.display, screen)
+
+        # The full screen image sizes the segment; smaller regions reuse it
+        ximage = self._image_for(self.width, self.height, allocate=True)
+        if ximage.contents.bits_per_pixel != 32:
+            raise RuntimeError(f"Unsupported pixel depth: {ximage.contents.bits_per_pixel} bpp")
+
+    def _image_for(self, width: int, height: int, allocate: bool = False):
+        """Return a cached XImage header of the given size backed by the shared segment."""
+        key = (width, height)
+        if key in self._images:
+            return self._images[key]
+
+        # Bound the header cache for arbitrary pixel regions, keeping the full screen image
+        if len(self._images) >= MAX_CACHED_IMAGES:
+            for stale_key in [k for k in self._images if k != (self.width, self.height)]:
+                _libx11.XFree(self._images.pop(stale_key))
+
+        ximage = _libxext.XShmCreateImage(
+            self.display, self._visual, self._depth, Z_PIXMAP,
+            None, ctypes.byref(self._shminfo), width, height
+        )
+        if not ximage:
+            raise RuntimeError(f"XShmCreateImage failed for {width}x{height}")
+
+        if allocate:
+            size = ximage.contents.bytes_per_line * height
+            shmid = _libc.shmget(IPC_PRIVATE, size, IPC_CREAT | 0o600)
+            if shmid < 0:
+                raise OSError(ctypes.get_errno(), "shmget failed")
+            shmaddr = _libc.shmat(shmid, None, 0)
+            if shmaddr in (None, ctypes.c_void_p(-1).value):
+                raise OSError(ctypes.get_errno(), "shmat failed")
+
+            self._shminfo.shmid = shmid
+            self._shminfo.shmaddr = shmaddr
+            self._shminfo.readOnly = 0
+            if not _libxext.XShmAttach(self.display, ctypes.byref(self._shminfo)):
+                raise RuntimeError("XShmAttach failed")
+            _libx11.XSync(self.display, 0)
+            # Segment is freed automatically once both sides detach
+            _libc.shmctl(shmid, IPC_RMID, None)
+
+        ximage.contents.data = self._shminfo.shmaddr
+        self._images[key] = ximage
+        return ximage
+
+    def grab(self, region: Optional[Tuple[int, int, int, int]] = None) -> Image.Image:
+        """
+        Capture the root window, or a rectangle of it, as an RGB image.
+
+        Args:
+            region: Optional (x, y, width, height) rectangle in screen pixels
+
+        Returns:
+            Image.Image: Captured RGB image
+        """
+        if not self.available:
+            raise RuntimeError("XShm frame grabber not available")
+
+        x, y, width, height = region or (0, 0, self.width, self.height)
+
+        with self._lock:
+            ximage = self._image_for(width, height)
+            take_x_error(self.display)
+            ok = _libxext.XShmGetImage(self.display, self.root, ximage, x, y, ALL_PLANES)
+            error = take_x_error(self.display)
+            if not ok or error is not None:
+                raise RuntimeError(f"XShmGetImage failed (X error {error})")
+
+            stride = ximage.contents.bytes_per_line
+            buffer = (ctypes.c_char * (stride * height)).from_address(self._shminfo.shmaddr)
+            # Decoding BGRX into RGB copies the pixels out of the shared segment
+            return Image.frombuffer("RGB", (width, height), memoryview(buffer), "raw", "BGRX", stride, 1)
+
+    def query_pointer(self) -> Tuple[int, int]:
+        """
+        Read the pointer position over the persistent connection.
+        
+        Returns:
+            Tuple[int, int]: Pointer (x, y) in screen pixels
+        """
+        if not self.available:
+            raise RuntimeError("XShm frame grabber not available")
+
+        root_return, child_return = ctypes.c_ulong(), ctypes.c_ulong()
+        root_x, root_y = ctypes.c_int(), ctypes.c_int()
+        win_x, win_y = ctypes.c_int(), ctypes.c_int()
+        mask = ctypes.c_uint()
+
+        with self._lock:
+            _libx11.XQueryPointer(
+                self.display, self.root,
+                ctypes.byref(root_return), ctypes.byref(child_return),
+                ctypes.byref(root_x), ctypes.byref(root_y),
+                ctypes.byref(win_x), ctypes.byref(win_y),
+                ctypes.byref(mask)
+            )
+        return root_x.value, root_y.value
+
+    def close(self):
+        """Detach the shared segment and close the X connection."""
+        with self._lock:
+            self.available = False
+            for ximage in self._images.values():
+                _libx11.XFree(ximage)
+            self._images = {}
+
+            if self.display and self._shminfo.shmaddr:
+                _libxext.XShmDetach(self.display, ctypes.byref(self._shminfo))
+                _libx11.XSync(self.display, 0)
+            if self._shminfo.shmaddr:
+                _libc.shmdt(self._shminfo.shmaddr)
+                self._shminfo.shmaddr = None
+            if self.display:
+                _libx11.XCloseDisplay(self.display)
+                self.display = None
+
+
+def capture_with_import(region: Optional[Tuple[int, int, int, int]] = None) -> Image.Image:
+    """
+    Capture the root window using ImageMagick ``import`` in a subprocess.
+    
+    Args:
+        region: Optional (x, y, width, height) rectangle in screen pixels
+        
+    Returns:
+        Image.Image: Captured RGB image
+    """
+    cmd = ['import', '-window', 'root']
+    if region:
+        x, y, width, height = region
+        cmd += ['-crop', f'{width}x{height}+{x}+{y}', '+repage']
+    cmd.append('png:-')
+
+    result = subprocess.run(
+        cmd,
+        capture_output=True,
+        env={'DISPLAY': ':0'},
+        timeout=10
+    )
+
+    if result.returncode != 0:
+        error_msg = result.stderr.decode() if result.stderr else "Unknown error"
+        raise RuntimeError(f"Failed to capture screenshot: {error_msg}")
+
+    image = Image.open(io.BytesIO(result.stdout))
+    return image.convert('RGB')
+
+
+# Shared grabber instance for the API process
+frame_grabber = X11FrameGrabber()
+
+
+def get_screen_size() -> Tuple[int, int]:
+    """
+    Get the size of the captured screen.
+    
+    Returns:
+        Tuple[int, int]: (width, height) in pixels, defaulting to the Xvfb size
+    """
+    if frame_grabber.available:
+        return frame_grabber.width, frame_grabber.height
+    return DEFAULT_SCREEN_SIZE
+
+
+def capture_screen(region: Optional[Tuple[int, int, int, int]] = None) -> Tuple[Image.Image, str]:
+    """
+    Capture the screen, or a rectangle of it, with the fastest available backend.
+    
+    Args:
+        region: Optional (x, y, width, height) rectangle in screen pixels
+        
+    Returns:
+        Tuple[Image.Image, str]: Captured RGB image and the backend used ("xshm" or "import")
+    """
+    if frame_grabber.available:
+        try:
+            return frame_grabber.grab(region), "xshm"
+        except Exception as e:
+            print(f"XShm capture failed, falling back to import: {e}")
+
+    return capture_with_import(region), "import"
+
+
+def get_pointer_position() -> Tuple[int, int]:
+    """
+    Get the pointer position, preferring the persistent X connection over xdotool.
+    
+    Returns:
+        Tuple[int, int]: Pointer (x, y) in screen pixels, (0, 0) if it cannot be read
+    """
+    if frame_grabber.available:
+        try:
+            return frame_grabber.query_pointer()
+        except Exception as e:
+            print(f"XQueryPointer failed, falling back to xdotool: {e}")
+
+    mouse_result = subprocess.run(
+        ['xdotool', 'getmouselocation', '--shell'],
+        capture_output=True, text=True,
+        env={'DISPLAY': ':0'},
+        timeout=5
+    )
+
+    mouse_x, mouse_y = 0, 0
+    if mouse_result.returncode == 0:
+        for line in mouse_result.stdout.strip().split('\n'):
+            if line.startswith('X='):
+                mouse_x = int(line.split('=')[1])
+            elif line.startswith('Y='):
+                mouse_y = int(line.split('=')[1])
+    return mouse_x, mouse_y
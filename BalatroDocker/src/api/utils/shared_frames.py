@@ -0,0 +1,190 @@
+"""
+Shared-memory handoff of the latest screen frame to co-located processes.
+
+The API process writes every captured frame once into a memory-mapped file
+under /dev/shm. Other processes in the container (the MCP server) map the
+same file and read raw RGB pixels directly, without going through HTTP or an
+image codec.
+"""
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import Optional
+
+from PIL import Image
+
+from api.utils.config import get_config
+
+DEFAULT_SHARED_FRAME_PATH = "/dev/shm/balatro_frame"
+
+SHARED_FRAME_MAGIC = b"BALFRAME"
+SHARED_FRAME_VERSION = 1
+
+# magic, version, sequence, frame_id, width, height, mode, data size, capture timestamp
+_HEADER = struct.Struct("<8sIQQII4sId")
+_SEQUENCE = struct.Struct("<Q")
+_SEQUENCE_OFFSET = 12
+HEADER_SIZE = 64
+
+
+def get_shared_frame_path() -> Optional[str]:
+    """
+    Get the shared frame file path from the configuration.
+
+    Returns:
+        Optional[str]: Path of the shared frame file, None when the channel is disabled
+    """
+    return get_config().get('SHARED_FRAME_PATH', DEFAULT_SHARED_FRAME_PATH) or None
+
+
+class SharedFrame:
+    """A frame read from shared memory."""
+
+    __slots__ = ("frame_id", "image", "timestamp")
+
+    def __init__(self, frame_id: int, image: Image.Image, timestamp: float):
+        self.frame_id = frame_id
+        self.image = image
+        self.timestamp = timestamp
+
+    @property
+    def age_ms(self) -> float:
+        """Milliseconds elapsed since the frame was captured."""
+        return (time.time() - self.timestamp) * 1000
+
+
+class SharedFrameWriter:
+    """Publishes frames into the shared file, one writer per container."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._mmap: Optional[mmap.mmap] = None
+        self._sequence = 0
+
+    def _ensure_capacity(self, size: int):
+        """Map the file, growing it when a frame does not fit."""
+        if self._mmap is not None and len(self._mmap) >= HEADER_SIZE + size:
+            return
+
+        if self._mmap is not None:
+            self._mmap.close()
+
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            os.ftruncate(fd, HEADER_SIZE + size)
+            self._mmap = mmap.mmap(fd, HEADER_SIZE + size, access=mmap.ACCESS_WRITE)
+        finally:
+            os.close(fd)
+
+    def write(self, frame_id: int, image: Image.Image, timestamp: float):
+        """
+        Publish a frame, replacing the previous one.
+
+        Args:
+            frame_id: Id of the frame in the API frame buffer
+            image: RGB PIL Image
+            timestamp: Capture time (time.time())
+        """
+        data = image.tobytes()
+
+        with self._lock:
+            self._ensure_capacity(len(data))
+
+            # Seqlock: an odd sequence tells readers a write is in progress
+            self._sequence += 1
+            _SEQUENCE.pack_into(self._mmap, _SEQUENCE_OFFSET, self._sequence)
+
+            self._mmap[HEADER_SIZE:HEADER_SIZE + len(data)] = data
+            self._sequence += 1
+            _HEADER.pack_into(
+                self._mmap, 0,
+                SHARED_FRAME_MAGIC, SHARED_FRAME_VERSION, self._sequence,
+                frame_id, image.width, image.height, image.mode.encode(), len(data), timestamp
+            )
+
+    def close(self):
+        """Unmap the shared file."""
+        with self._lock:
+            if self._mmap is not None:
+                self._mmap.close()
+                self._mmap = None
+
+
+class SharedFrameReader:
+    """Reads the latest published frame from the shared file."""
+
+    def __init__(self, path: str, retries: int = 5):
+        self.path = path
+        self.retries = retries
+        self._mmap: Optional[mmap.mmap] = None
+        self._inode: Optional[int] = None
+
+    def _mapping(self) -> Optional[mmap.mmap]:
+        """Map the shared file, remapping when it was replaced or has grown."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+
+        if self._mmap is None or stat.st_ino != self._inode or stat.st_size != len(self._mmap):
+            if self._mmap is not None:
+                self._mmap.close()
+                self._mmap = None
+            if stat.st_size < HEADER_SIZE:
+                return None
+
+            fd = os.open(self.path, os.O_RDONLY)
+            try:
+                self._mmap = mmap.mmap(fd, stat.st_size, access=mmap.ACCESS_READ)
+                self._inode = stat.st_ino
+            finally:
+                os.close(fd)
+
+        return self._mmap
+
+    def read(self, max_age_ms: Optional[float] = None) -> Optional[SharedFrame]:
+        """
+        Read the latest published frame.
+
+        Args:
+            max_age_ms: Maximum acceptable frame age in milliseconds, None accepts any age
+
+        Returns:
+            Optional[SharedFrame]: The frame, or None if nothing usable has been published
+        """
+        for _ in range(self.retries):
+            mapping = self._mapping()
+            if mapping is None:
+                return None
+
+            magic, version, sequence, frame_id, width, height, mode, size, timestamp = _HEADER.unpack_from(mapping, 0)
+            if magic != SHARED_FRAME_MAGIC or version != SHARED_FRAME_VERSION:
+                return None
+
+            if sequence % 2 or HEADER_SIZE + size > len(mapping):
+                # Mid-write or mid-resize, try again shortly
+                time.sleep(0.001)
+                continue
+
+            if max_age_ms is not None and (time.time() - timestamp) * 1000 > max_age_ms:
+                return None
+
+            # A single copy out of the mapping, validated against concurrent writes
+            data = mapping[HEADER_SIZE:HEADER_SIZE + size]
+            if _SEQUENCE.unpack_from(mapping, _SEQUENCE_OFFSET)[0] != sequence:
+                continue
+
+            mode = mode.rstrip(b"\0").decode()
+            image = Image.frombuffer(mode, (width, height), data, "raw", mode, 0, 1)
+            return SharedFrame(frame_id, image, timestamp)
+
+        return None
+
+    def close(self):
+        """Unmap the shared file."""
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
@@ -73,8 +73,8 @@ def relative_to_absolute(rel_x: float, rel_y: float, screen_width: int, screen_h
     rel_x = max(0.0, min(1.0, rel_x))
     rel_y = max(0.0, min(1.0, rel_y))
     
-    # Convert to absolute coordinates
-    abs_x = int(rel_x * screen_width)
-    abs_y = int(rel_y * screen_height)
+    # Convert to absolute coordinates, 1.0 is the last pixel rather than one past it
+    abs_x = min(int(rel_x * screen_width), screen_width - 1)
+    abs_y = min(int(rel_y * screen_height), screen_height - 1)
     
     return abs_x, abs_y
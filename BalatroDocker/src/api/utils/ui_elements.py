@@ -0,0 +1,84 @@
+"""
+Resolution of UI element queries against the geometry exported by the BalatroLogger mod.
+
+The mod reports the screen pixel box of every card and enabled button in the
+current frame. Queries name an element the way a player would, either by
+area and position ("hand card 3", "joker 1", "shop 2") or by its label
+("Play Hand button", "reroll").
+"""
+import re
+from typing import Any, Dict, List, Optional
+
+from api.utils.game_state import _card_name
+
+# Words accepted for each card area exported by the mod
+AREA_ALIASES = {
+    "hand": "hand", "card": "hand", "cards": "hand",
+    "joker": "jokers", "jokers": "jokers",
+    "consumable": "consumables", "consumables": "consumables", "consumeable": "consumables",
+    "tarot": "consumables", "planet": "consumables", "spectral": "consumables",
+    "shop": "shop_jokers", "shop card": "shop_jokers", "shop joker": "shop_jokers", "shop item": "shop_jokers",
+    "voucher": "shop_vouchers", "shop voucher": "shop_vouchers",
+    "booster": "shop_booster", "pack": "shop_booster", "shop booster": "shop_booster", "shop pack": "shop_booster",
+    "pack card": "pack", "booster card": "pack",
+}
+
+INDEXED_QUERY = re.compile(r"^(?P<area>[a-z ]+?)\s*#?(?P<index>\d+)$")
+FILLER_WORDS = re.compile(r"\b(the|button)\b")
+
+
+def _normalize(text: str) -> str:
+    """Lowercase text with filler words and repeated spaces removed."""
+    text = FILLER_WORDS.sub(" ", text.lower())
+    return " ".join(text.replace("_", " ").split())
+
+
+def element_name(element: Dict[str, Any]) -> str:
+    """Display name of an element, "Ace of Spades" for playing cards."""
+    if element.get("kind") == "card":
+        return _card_name(element)
+    return element.get("name") or element.get("button") or "Unknown"
+
+
+def with_names(elements: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Elements with their display name in "label"."""
+    return [dict(element, label=element_name(element)) for element in elements]
+
+
+def resolve_element(elements: List[Dict[str, Any]], query: str) -> Optional[Dict[str, Any]]:
+    """
+    Find the element a query refers to.
+
+    Args:
+        elements: Elements exported by the mod, with "label" from with_names()
+        query: Area and 1-based position ("hand card 3", "joker 1"), or a label,
+            button function or id ("Play Hand button", "reroll_shop")
+
+    Returns:
+        Optional[Dict[str, Any]]: The matching element, exact label matches first, or None
+    """
+    normalized = _normalize(query)
+
+    indexed = INDEXED_QUERY.match(normalized)
+    area = indexed and indexed.group("area")
+    if area and area not in AREA_ALIASES:
+        # "hand card 3", "shop item 2"
+        area = re.sub(r" (card|item)$", "", area)
+    if area in AREA_ALIASES:
+        area = AREA_ALIASES[area]
+        index = int(indexed.group("index"))
+        for element in elements:
+            if element.get("area") == area and element.get("index") == index:
+                return element
+        return None
+
+    def names(element: Dict[str, Any]) -> List[str]:
+        return [_normalize(str(value)) for value in (element.get("label"), element.get("button"), element.get("id")) if value]
+
+    for element in elements:
+        if normalized in names(element):
+            return element
+    for element in elements:
+        if any(normalized in name for name in names(element)):
+            return element
+    return None
@@ -0,0 +1,314 @@
+"""
+Tracking of the Balatro window over a persistent X11 connection.
+
+The window is looked up once by walking the window tree and then kept up to
+date from SubstructureNotify events on the root window and StructureNotify
+events on the game window itself (needed when it sits inside a window manager
+frame), so button presses do not need a wmctrl subprocess to find or focus it.
+"""
+import ctypes
+import os
+import threading
+from typing import Optional, Tuple
+
+from api.utils import screen_capture as _x11
+
+# Event masks and types from X.h
+STRUCTURE_NOTIFY_MASK = 1 << 17
+SUBSTRUCTURE_NOTIFY_MASK = 1 << 19
+UNMAP_NOTIFY = 18
+MAP_NOTIFY = 19
+DESTROY_NOTIFY = 17
+REPARENT_NOTIFY = 21
+CONFIGURE_NOTIFY = 22
+
+IS_VIEWABLE = 2
+REVERT_TO_PARENT = 2
+CURRENT_TIME = 0
+
+# Top-level windows may be reparented into a window manager frame
+MAX_SEARCH_DEPTH = 2
+
+
+class _XStructureEvent(ctypes.Structure):
+    """Common prefix of the SubstructureNotify events (event, window at the same offsets)."""
+    _fields_ = [
+        ("type", ctypes.c_int),
+        ("serial", ctypes.c_ulong),
+        ("send_event", ctypes.c_int),
+        ("display", ctypes.c_void_p),
+        ("event", ctypes.c_ulong),
+        ("window", ctypes.c_ulong),
+    ]
+
+
+class _XEvent(ctypes.Union):
+    _fields_ = [
+        ("type", ctypes.c_int),
+        ("xstructure", _XStructureEvent),
+        ("pad", ctypes.c_long * 24),
+    ]
+
+
+class _XWindowAttributes(ctypes.Structure):
+    _fields_ = [
+        ("x", ctypes.c_int),
+        ("y", ctypes.c_int),
+        ("width", ctypes.c_int),
+        ("height", ctypes.c_int),
+        ("border_width", ctypes.c_int),
+        ("depth", ctypes.c_int),
+        ("visual", ctypes.c_void_p),
+        ("root", ctypes.c_ulong),
+        ("class_", ctypes.c_int),
+        ("bit_gravity", ctypes.c_int),
+        ("win_gravity", ctypes.c_int),
+        ("backing_store", ctypes.c_int),
+        ("backing_planes", ctypes.c_ulong),
+        ("backing_pixel", ctypes.c_ulong),
+        ("save_under", ctypes.c_int),
+        ("colormap", ctypes.c_ulong),
+        ("map_installed", ctypes.c_int),
+        ("map_state", ctypes.c_int),
+        ("all_event_masks", ctypes.c_long),
+        ("your_event_mask", ctypes.c_long),
+        ("do_not_propagate_mask", ctypes.c_long),
+        ("override_redirect", ctypes.c_int),
+        ("screen", ctypes.c_void_p),
+    ]
+
+
+class _XClassHint(ctypes.Structure):
+    _fields_ = [
+        ("res_name", ctypes.c_char_p),
+        ("res_class", ctypes.c_char_p),
+    ]
+
+
+if _x11.XSHM_AVAILABLE:
+    _lib = _x11._libx11
+    _lib.XSelectInput.argtypes = [ctypes.c_void_p, ctypes.c_ulong, ctypes.c_long]
+    _lib.XPending.argtypes = [ctypes.c_void_p]
+    _lib.XNextEvent.argtypes = [ctypes.c_void_p, ctypes.POINTER(_XEvent)]
+    _lib.XFlush.argtypes = [ctypes.c_void_p]
+    _lib.XQueryTree.argtypes = [
+        ctypes.c_void_p, ctypes.c_ulong,
+        ctypes.POINTER(ctypes.c_ulong), ctypes.POINTER(ctypes.c_ulong),
+        ctypes.POINTER(ctypes.POINTER(ctypes.c_ulong)), ctypes.POINTER(ctypes.c_uint),
+    ]
+    _lib.XGetWindowAttributes.argtypes = [ctypes.c_void_p, ctypes.c_ulong, ctypes.POINTER(_XWindowAttributes)]
+    _lib.XTranslateCoordinates.argtypes = [
+        ctypes.c_void_p, ctypes.c_ulong, ctypes.c_ulong, ctypes.c_int, ctypes.c_int,
+        ctypes.POINTER(ctypes.c_int), ctypes.POINTER(ctypes.c_int), ctypes.POINTER(ctypes.c_ulong),
+    ]
+    _lib.XFetchName.argtypes = [ctypes.c_void_p, ctypes.c_ulong, ctypes.POINTER(ctypes.c_void_p)]
+    _lib.XGetClassHint.argtypes = [ctypes.c_void_p, ctypes.c_ulong, ctypes.POINTER(_XClassHint)]
+    _lib.XGetInputFocus.argtypes = [ctypes.c_void_p, ctypes.POINTER(ctypes.c_ulong), ctypes.POINTER(ctypes.c_int)]
+    _lib.XSetInputFocus.argtypes = [ctypes.c_void_p, ctypes.c_ulong, ctypes.c_int, ctypes.c_ulong]
+    _lib.XRaiseWindow.argtypes = [ctypes.c_void_p, ctypes.c_ulong]
+else:
+    _lib = None
+
+
+class BalatroWindowTracker:
+    """Finds, tracks and focuses the Balatro window."""
+
+    def __init__(self, display_name: Optional[str] = None):
+        self.display_name = display_name or os.environ.get("DISPLAY", ":0")
+        self.display = None
+        self.root = None
+        self.available = False
+        self.window: Optional[int] = None
+        self._geometry: Optional[Tuple[int, int, int, int]] = None
+        self._needs_scan = True
+        self._lock = threading.Lock()
+        self._init_display()
+
+    def _init_display(self):
+        """Open the X connection and subscribe to top-level window changes."""
+        try:
+            if _lib is None:
+                return
+            self.display = _lib.XOpenDisplay(self.display_name.encode())
+            if not self.display:
+                raise RuntimeError(f"Cannot open display {self.display_name}")
+            self.root = _lib.XRootWindow(self.display, _lib.XDefaultScreen(self.display))
+            _lib.XSelectInput(self.display, self.root, SUBSTRUCTURE_NOTIFY_MASK)
+            _lib.XFlush(self.display)
+            self.available = True
+        except Exception as e:
+            print(f"Failed to initialize X11 window tracker: {e}")
+
+    def _drain_events(self):
+        """Apply pending window events to the cached state."""
+        event = _XEvent()
+        while _lib.XPending(self.display):
+            _lib.XNextEvent(self.display, ctypes.byref(event))
+            window = event.xstructure.window
+
+            if event.type in (DESTROY_NOTIFY, UNMAP_NOTIFY, REPARENT_NOTIFY) and window == self.window:
+                self._forget()
+            elif event.type == MAP_NOTIFY and self.window is None:
+                # Something new appeared, it may be the game window
+                self._needs_scan = True
+            elif event.type == CONFIGURE_NOTIFY and self.window is not None:
+                # Moves of the window or its frame, re-read lazily
+                self._geometry = None
+
+    def _forget(self):
+        """Drop the cached window."""
+        self.window = None
+        self._geometry = None
+        self._needs_scan = True
+
+    def _window_text(self, window: int) -> str:
+        """Lowercased title and class of a window."""
+        parts = []
+
+        name = ctypes.c_void_p()
+        if _lib.XFetchName(self.display, window, ctypes.byref(name)) and name.value:
+            parts.append(ctypes.string_at(name.value).decode(errors="replace"))
+            _lib.XFree(name)
+
+        hint = _XClassHint()
+        if _lib.XGetClassHint(self.display, window, ctypes.byref(hint)):
+            parts += [(value or b"").decode(errors="replace") for value in (hint.res_name, hint.res_class)]
+            if hint.res_name:
+                _lib.XFree(ctypes.cast(hint.res_name, ctypes.c_void_p))
+            if hint.res_class:
+                _lib.XFree(ctypes.cast(hint.res_class, ctypes.c_void_p))
+
+        return " ".join(parts).lower()
+
+    def _children(self, window: int) -> list:
+        """Direct children of a window, bottom to top."""
+        root, parent = ctypes.c_ulong(), ctypes.c_ulong()
+        children = ctypes.POINTER(ctypes.c_ulong)()
+        count = ctypes.c_uint()
+        if not _lib.XQueryTree(self.display, window, ctypes.byref(root), ctypes.byref(parent),
+                               ctypes.byref(children), ctypes.byref(count)):
+            return []
+        result = [children[i] for i in range(count.value)]
+        if children:
+            _lib.XFree(children)
+        return result
+
+    def _is_viewable(self, window: int) -> bool:
+        """Whether a window is mapped and visible."""
+        attrs = _XWindowAttributes()
+        return bool(_lib.XGetWindowAttributes(self.display, window, ctypes.byref(attrs))) and attrs.map_state == IS_VIEWABLE
+
+    def _scan(self) -> Optional[int]:
+        """Search the window tree for the game window, preferring a 'balatro' title over a LOVE class."""
+        fallback = None
+        level = [self.root]
+        for _ in range(MAX_SEARCH_DEPTH):
+            next_level = []
+            # Topmost windows first
+            for parent in level:
+                for window in reversed(self._children(parent)):
+                    if not self._is_viewable(window):
+                        continue
+                    text = self._window_text(window)
+                    if "balatro" in text:
+                        return window
+                    if fallback is None and "love" in text.split():
+                        fallback = window
+                    next_level.append(window)
+            level = next_level
+        return fallback
+
+    def _read_geometry(self) -> Optional[Tuple[int, int, int, int]]:
+        """Window rectangle in root coordinates."""
+        attrs = _XWindowAttributes()
+        if not _lib.XGetWindowAttributes(self.display, self.window, ctypes.byref(attrs)):
+            return None
+        x, y, child = ctypes.c_int(), ctypes.c_int(), ctypes.c_ulong()
+        _lib.XTranslateCoordinates(self.display, self.window, self.root, 0, 0,
+                                   ctypes.byref(x), ctypes.byref(y), ctypes.byref(child))
+        return x.value, y.value, attrs.width, attrs.height
+
+    def find_window(self) -> Optional[int]:
+        """
+        Get the Balatro window id, scanning only after window events invalidated the cache.
+
+        Returns:
+            Optional[int]: X window id, or None if the game window is not mapped
+        """
+        if not self.available:
+            return None
+
+        with self._lock:
+            _x11.take_x_error(self.display)
+            self._drain_events()
+            if self.window is None and self._needs_scan:
+                self._needs_scan = False
+                self.window = self._scan()
+                if self.window is not None:
+                    # Reparented windows report their own destroy/unmap to the frame, not the root
+                    _lib.XSelectInput(self.display, self.window, STRUCTURE_NOTIFY_MASK)
+            return self.window
+
+    def geometry(self) -> Optional[Tuple[int, int, int, int]]:
+        """
+        Get the (x, y, width, height) of the Balatro window.
+
+        Returns:
+            Optional[Tuple[int, int, int, int]]: Window rectangle in screen pixels, or None
+        """
+        if self.find_window() is None:
+            return None
+
+        with self._lock:
+            if self._geometry is None:
+                self._geometry = self._read_geometry()
+            return self._geometry
+
+    def _has_focus(self) -> bool:
+        """Whether the input focus is on the game window or one of its descendants."""
+        focus, revert = ctypes.c_ulong(), ctypes.c_int()
+        _lib.XGetInputFocus(self.display, ctypes.byref(focus), ctypes.byref(revert))
+
+        window = focus.value
+        while window and window != self.root:
+            if window == self.window:
+                return True
+            root, parent = ctypes.c_ulong(), ctypes.c_ulong()
+            children = ctypes.POINTER(ctypes.c_ulong)()
+            count = ctypes.c_uint()
+            if not _lib.XQueryTree(self.display, window, ctypes.byref(root), ctypes.byref(parent),
+                                   ctypes.byref(children), ctypes.byref(count)):
+                return False
+            if children:
+                _lib.XFree(children)
+            window = parent.value
+        return False
+
+    def focus(self) -> bool:
+        """
+        Give the game window input focus unless it already has it.
+
+        Returns:
+            bool: True if the window has focus afterwards
+        """
+        if self.find_window() is None:
+            return False
+
+        with self._lock:
+            if self._has_focus():
+                return True
+
+            _x11.take_x_error(self.display)
+            _lib.XRaiseWindow(self.display, self.window)
+            _lib.XSetInputFocus(self.display, self.window, REVERT_TO_PARENT, CURRENT_TIME)
+            _lib.XSync(self.display, 0)
+            if _x11.take_x_error(self.display) is not None:
+                # The window went away between the lookup and the request
+                self._forget()
+                return False
+            return True
+
+    def invalidate(self):
+        """Forget the cached window, e.g. after the game was restarted."""
+        with self._lock:
+            self._forget()
@@ -16,27 +16,57 @@ print("X11 initialization complete for API server")
 
 # API controllers (import after X11 initialization)
 from api.controllers import (
+    act_controller,
+    actions_controller,
+    diagnostics_controller,
     game_controller,
     gamepad_controller,
     mouse_controller,
-    screenshot_controller
+    screenshot_controller,
+    sim_controller,
+    state_controller
 )
 
 # API models
 from api.models.requests import (
+    ActRequest,
     GamepadButtonsRequest,
+    GamepadSequenceRequest,
+    LatencyProbeRequest,
     MouseClickRequest,
     MouseMoveRequest,
     MouseDragRequest,
-    AutoStartRequest
+    MouseGesturesRequest,
+    AutoStartRequest,
+    GameActionRequest,
+    ScreenshotRequest,
+    ScreenWaitRequest,
+    StreamRequest
 )
 
+from api.utils.frame_buffer import frame_buffer
+from api.utils.loop_monitor import loop_monitor
+from api.utils.mod_client import mod_client
+
 import time
+import contextlib
 import uvicorn
-from fastapi import FastAPI
+from typing import Annotated, Optional, Literal
+from fastapi import FastAPI, Header, Query, WebSocket
 
 def create_fastapi_app():
 
+    # Run the background frame capture and loop lag sampling for the lifetime of the app
+    @contextlib.asynccontextmanager
+    async def lifespan(app: FastAPI):
+        frame_buffer.start()
+        loop_monitor.start()
+        mod_client.start()
+        yield
+        mod_client.stop()
+        await loop_monitor.stop()
+        frame_buffer.stop()
+
     # Create main application
     app = FastAPI(
         title="Balatro Game Control REST API",
@@ -47,7 +77,8 @@ def create_fastapi_app():
         """,
         version="1.0.0",
         docs_url="/docs",
-        redoc_url="/redoc"
+        redoc_url="/redoc",
+        lifespan=lifespan
     )
 
     # Game Management Endpoints
@@ -66,6 +97,12 @@ def create_fastapi_app():
         """Configure and trigger auto-start with specific deck, stake, and seed."""
         return await game_controller.auto_start_game(request)
 
+    @app.post("/game/action", tags=["Game Management"], summary="Run Game Action")
+    async def game_action(request: GameActionRequest):
+        """Run a game action (select blind, highlight cards, play, discard, buy, sell, use, reroll, next round...)
+        directly in the mod, without input emulation. Indices are 1-based, as listed by /ui_elements."""
+        return await game_controller.game_action(request)
+
     @app.get("/mod_status", tags=["Game Management"], summary="Get Mod Status")
     async def get_mod_status():
         """Get current mod status."""
@@ -74,13 +111,26 @@ def create_fastapi_app():
     # Gamepad Control Endpoints
     @app.post("/gamepad/buttons", tags=["Gamepad Control"], summary="Press Gamepad Buttons")
     async def press_gamepad_button(request: GamepadButtonsRequest):
-        """Press one or more gamepad buttons. Valid buttons: A, B, X, Y, LB, RB, LT, RT, START, BACK, SELECT, UP, DOWN, LEFT, RIGHT"""
+        """Press one or more gamepad buttons. Valid buttons: A, B, X, Y, LB, RB, LT, RT, START, BACK, SELECT, UP, DOWN, LEFT, RIGHT.
+        After each press waits the per-press delay and, in settle mode, until the screen stops changing. With wait=false returns a job id."""
         return await gamepad_controller.press_gamepad_button(request)
 
+    @app.post("/gamepad/sequence", tags=["Gamepad Control"], summary="Run Gamepad Sequence")
+    async def run_gamepad_sequence(request: GamepadSequenceRequest):
+        """Run a script of steps in one request: chords (buttons emitted together), tap/hold/release,
+        repeat counts, per-step delays and LT/RT analog values. Returns per-step timings."""
+        return await gamepad_controller.run_gamepad_sequence(request)
+
+    @app.get("/gamepad/jobs/{job_id}", tags=["Gamepad Control"], summary="Get Gamepad Job")
+    async def get_gamepad_job(job_id: str):
+        """Get the status and result of a queued gamepad button sequence."""
+        return await gamepad_controller.get_gamepad_job(job_id)
+
     # Mouse Control Endpoints
     @app.post("/mouse/click", tags=["Mouse Control"], summary="Click at Coordinates")
     async def mouse_click(request: MouseClickRequest):
-        """Click at specific coordinates using pixel positioning."""
+        """Click at specific coordinates, in screen pixels or in the pixels (or 0-1 values) of a served frame
+        given by image_id, which the server maps back to the screen."""
         return await mouse_controller.mouse_click(request)
 
     @app.post("/mouse/move", tags=["Mouse Control"], summary="Move Mouse Cursor")
@@ -93,21 +143,115 @@ def create_fastapi_app():
         """Drag from start coordinates to end coordinates using pixel positioning."""
         return await mouse_controller.mouse_drag(request)
 
+    @app.post("/mouse/gestures", tags=["Mouse Control"], summary="Perform Mouse Gestures")
+    async def mouse_gestures(request: MouseGesturesRequest):
+        """Perform an ordered batch of clicks, moves, drags and waits back to back, with per-gesture button,
+        hold time and delay. Returns per-gesture timings."""
+        return await mouse_controller.mouse_gestures(request)
+
     @app.get("/mouse/position", tags=["Mouse Control"], summary="Get Mouse Position")
     async def get_mouse_position():
         """Get current mouse position in pixel coordinates."""
         return await mouse_controller.get_mouse_position()
 
+    # Act-and-Observe Endpoints
+    @app.post("/act", tags=["Act"], summary="Act and Observe")
+    async def act(request: ActRequest):
+        """Run one gamepad or mouse action, wait for the screen to change or settle, and return the
+        resulting frame together with the action result and whether anything changed."""
+        return await act_controller.act(request)
+
+    # Game State Endpoints
+    @app.get("/game_state", tags=["Game State"], summary="Get Game State")
+    async def get_game_state(raw: bool = Query(False)):
+        """Exact game state exported by the mod (run parameters, jokers, shop, hand, focused element), in the
+        agents' GameState schema. `raw=true` also returns the mod snapshot."""
+        return await state_controller.get_game_state(raw)
+
+    @app.get("/ui_elements", tags=["Game State"], summary="Get UI Element Positions")
+    async def get_ui_elements(
+        query: Optional[str] = Query(None),
+        kind: Optional[Literal["card", "button"]] = Query(None),
+        area: Optional[str] = Query(None),
+    ):
+        """Screen pixel boxes of the cards and enabled buttons laid out in the current frame, read from the mod.
+        `query` ("hand card 3", "joker 1", "Play Hand button") returns the matching element and its click point (`x`, `y`)."""
+        return await state_controller.get_ui_elements(query, kind, area)
+
+    # Action Journal Endpoints
+    @app.get("/actions", tags=["Actions"], summary="List Recent Actions")
+    async def get_actions(since: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=1000)):
+        """List journaled input actions newer than action id `since`, with timings and the frame ids before and after each one."""
+        return await actions_controller.get_actions(since, limit)
+
     # Screenshot Endpoints
     @app.get("/screenshot", tags=["Screenshot"], summary="Take Screenshot")
-    async def get_screenshot():
-        """Take a screenshot of the current screen."""
-        return await screenshot_controller.get_screenshot()
+    async def get_screenshot(request: Annotated[ScreenshotRequest, Query()], if_none_match: Optional[str] = Header(None)):
+        """Take a screenshot of the current screen. Supports png/jpeg/webp/raw encoding, downscaling and region crops.
+        Returns an ETag and answers 304 Not Modified when If-None-Match matches the current frame."""
+        return await screenshot_controller.get_screenshot(request, if_none_match)
 
     @app.get("/screenshot_with_cursor", tags=["Screenshot"], summary="Take Screenshot with Cursor")
-    async def get_screenshot_with_cursor():
-        """Take screenshot with visible cursor position marked."""
-        return await screenshot_controller.get_screenshot_with_cursor()
+    async def get_screenshot_with_cursor(request: Annotated[ScreenshotRequest, Query()], if_none_match: Optional[str] = Header(None)):
+        """Take screenshot with visible cursor position marked. Supports ETag / If-None-Match like /screenshot."""
+        return await screenshot_controller.get_screenshot_with_cursor(request, if_none_match)
+
+    @app.get("/screenshot/wait", tags=["Screenshot"], summary="Wait for Screen Change")
+    async def wait_for_screen_change(request: Annotated[ScreenWaitRequest, Query()]):
+        """Long-poll until the screen changes (mode=changed) or settles (mode=stable) relative to since_frame."""
+        return await screenshot_controller.wait_for_screen_change(request)
+
+    @app.get("/screenshot/regions", tags=["Screenshot"], summary="List Screenshot Regions")
+    async def get_screenshot_regions():
+        """List named regions accepted by the screenshot `region` parameter, in screen pixels."""
+        return await screenshot_controller.get_regions()
+
+    # Streaming Endpoints
+    @app.get("/stream", tags=["Streaming"], summary="Stream Frames (MJPEG)")
+    async def stream_mjpeg(request: Annotated[StreamRequest, Query()]):
+        """Push changed frames as multipart/x-mixed-replace at the requested fps, resolution and codec."""
+        return await screenshot_controller.stream_mjpeg(request)
+
+    @app.websocket("/stream/ws")
+    async def stream_websocket(websocket: WebSocket, request: Annotated[StreamRequest, Query()]):
+        """Push changed frames over a WebSocket: a JSON metadata message followed by the encoded image bytes."""
+        await screenshot_controller.stream_websocket(websocket, request)
+
+    # Lockstep Simulation Endpoints
+    @app.post("/sim/lockstep", tags=["Simulation"], summary="Enable or Disable Lockstep")
+    async def set_lockstep(enabled: bool = Query(True), dt: Optional[float] = Query(None, gt=0, le=1)):
+        """Hold the game loop so it only advances on /sim/step requests, by `dt` seconds of game time per frame
+        (default 1/60). `enabled=false` lets the game run at wall-clock speed again."""
+        return await sim_controller.set_lockstep(enabled, dt)
+
+    @app.get("/sim/status", tags=["Simulation"], summary="Get Frame Counter")
+    async def get_sim_status():
+        """Game frame counter and lockstep mode."""
+        return await sim_controller.get_sim_status()
+
+    @app.post("/sim/step", tags=["Simulation"], summary="Advance Frames")
+    async def sim_step(
+        frames: int = Query(1, ge=1, le=100000),
+        timeout_ms: int = Query(10000, ge=100, le=600000),
+    ):
+        """Advance the game by `frames` updates (in lockstep) or wait for them to run (otherwise) and return the frame counter."""
+        return await sim_controller.step(frames, timeout_ms)
+
+    @app.post("/sim/step_until_idle", tags=["Simulation"], summary="Advance Until Idle")
+    async def sim_step_until_idle(
+        max_frames: int = Query(600, ge=1, le=100000),
+        timeout_ms: int = Query(10000, ge=100, le=600000),
+    ):
+        """Advance the game until its event queues are empty and no animation holds input, at most `max_frames`.
+        `idle` is false if the limit was reached first."""
+        return await sim_controller.step_until_idle(max_frames, timeout_ms)
+
+    # Diagnostics Endpoints
+    @app.get("/diagnostics/latency", tags=["Diagnostics"], summary="Measure Input Latency")
+    async def measure_input_latency(request: Annotated[LatencyProbeRequest, Query()]):
+        """Inject harmless inputs (gamepad presses, pointer moves) and report input-to-photon latency
+        percentiles over N trials for the uinput, XTest and pyautogui paths."""
+        return await diagnostics_controller.measure_latency(request)
 
     # Enhanced Health Check Endpoint
     @app.get("/health", tags=["System"], summary="Health Check")
@@ -118,7 +262,8 @@ def create_fastapi_app():
             "timestamp": time.time(),
             "services": {
                 "rest_api": "running"
-            }
+            },
+            "event_loop_lag_ms": loop_monitor.stats()
         }
     
     return app
@@ -22,14 +22,20 @@ from fastapi import FastAPI
 # MCP tools
 from mcp_server.tools.gamepad_tools import (
     press_buttons as _press_buttons,
+    press_buttons_and_get_screen as _press_buttons_and_get_screen,
     get_screen as _get_screen,
 )
 from mcp_server.tools.mouse_tools import (
     mouse_click as _mouse_click,
     mouse_drag as _mouse_drag, 
+    click_many as _click_many,
+    find_ui_element as _find_ui_element,
     locate_element as _locate_element,
     get_screen_with_cursor as _get_screen_with_cursor,
-    get_screen_dimensions as _get_screen_dimensions,
+)
+from mcp_server.tools.game_tools import (
+    game_action as _game_action,
+    get_game_state as _get_game_state,
 )
 
 # Initialize MCP server
@@ -65,24 +71,57 @@ def press_buttons(sequence: str) -> dict:
     return _press_buttons(sequence)
 
 @gamepad_mcp.tool()
-def get_screen():
+def press_buttons_and_get_screen(sequence: str, settle_ms: int = 300) -> dict:
+    """
+    Press a sequence of buttons and return the game screen once it has settled.
+    
+    Combines press_buttons and get_screen in one call and waits for animations to
+    finish instead of sleeping a fixed time.
+    
+    Parameters
+    ----------
+    sequence : str
+        Space-separated string of button names to press in order.
+        Valid buttons: A, B, X, Y, LEFT, RIGHT, UP, DOWN, START, SELECT, RB, RT, LB, LT.
+    settle_ms : int, optional
+        Milliseconds the screen must stay unchanged before it is captured. Default is 300.
+        
+    Returns
+    -------
+    dict
+        Dictionary containing the action result and the resulting screen.
+        Keys include:
+        - 'status': str, execution status ('success' or 'error')
+        - 'changed': bool, whether the screen changed after the presses
+        - 'screenshot': str, base64 encoded PNG data URL of the settled screen
+        - 'frame_id': int, id of the returned frame
+    """
+    return _press_buttons_and_get_screen(sequence, settle_ms)
+
+@gamepad_mcp.tool()
+def get_screen(if_none_match: str = None):
     """
     Capture and return a screenshot of the current Balatro game state.
     
     This function takes a screenshot of the game window and returns it as base64 encoded data.
     Use this to analyze the current game state before making decisions.
+    
+    Parameters
+    ----------
+    if_none_match : str, optional
+        The 'etag' of a previous screenshot. If the screen has not changed since,
+        no image is returned and 'unchanged' is True.
         
     Returns
     -------
     dict
         Dictionary containing the screenshot data and metadata.
         Keys include:
-        - 'image': str, base64 encoded PNG image data
-        - 'width': int, screenshot width in pixels
-        - 'height': int, screenshot height in pixels
-        - 'timestamp': str, when the screenshot was taken
+        - 'screenshot': str, base64 encoded PNG data URL (absent when unchanged)
+        - 'etag': str, tag identifying this screen content
+        - 'unchanged': bool, present and True when the screen matches if_none_match
     """
-    return _get_screen()
+    return _get_screen(if_none_match=if_none_match)
 
 mouse_mcp = FastMCP(
     name="BalatroMouseMCP",
@@ -130,32 +169,34 @@ mouse_mcp = FastMCP(
 #     return _locate_element(description)
 
 @mouse_mcp.tool()
-def mouse_click(x: int, y: int) -> dict:
-    f"""
+def mouse_click(x: int, y: int, image_id: int = None) -> dict:
+    """
     Click at a specific pixel coordinate on the screen.
-    The resolution of the screenshot is {_get_screen_dimensions()}.
+    
+    Coordinates are pixels of the screenshot returned by get_screen. Pass its
+    'image_id' so the server maps them back to the screen, even when the
+    screenshot was downscaled.
 
     Parameters
     ----------
     x : int
-        X-coordinate in pixels from the left edge of the screen.
-        Must be within screen bounds (0 to screen_width-1).
+        X-coordinate in pixels from the left edge of the screenshot.
     y : int
-        Y-coordinate in pixels from the top edge of the screen.
-        Must be within screen bounds (0 to screen_height-1).
+        Y-coordinate in pixels from the top edge of the screenshot.
+    image_id : int, optional
+        'image_id' of the screenshot the coordinates were read from.
+        Without it the coordinates are taken as full-resolution screen pixels.
         
     Returns
     -------
     dict
         Click execution result with the following structure:
-        {{
+        {
             "status": "success" | "error",
-            "x": int,  # Actual x-coordinate clicked
-            "y": int,  # Actual y-coordinate clicked
-            "message": str  # Descriptive message about the click result
-        }}
+            "message": str  # Descriptive message with the screen pixels clicked
+        }
     """
-    return _mouse_click(x, y)
+    return _mouse_click(x, y, image_id)
 
 @mouse_mcp.tool()
 def mouse_drag(start_x: int, start_y: int, end_x: int, end_y: int, duration: float = 0.5, button: str = "left") -> dict:
@@ -202,35 +243,171 @@ def mouse_drag(start_x: int, start_y: int, end_x: int, end_y: int, duration: flo
     return _mouse_drag(start_x, start_y, end_x, end_y, duration, button)
 
 @mouse_mcp.tool()
-def get_screen():
+def click_many(points: list[list[int]], delay: float = 0.1, image_id: int = None) -> dict:
+    """
+    Click several pixel coordinates in order with a single call.
+    
+    Use it to select multiple cards before playing or discarding them instead of
+    calling mouse_click once per card.
+    
+    Parameters
+    ----------
+    points : list[list[int]]
+        [x, y] pixel coordinates to click, in order. At most 100 points.
+    delay : float, optional
+        Seconds to wait after each click so the game can register it. Default is 0.1.
+    image_id : int, optional
+        'image_id' of the screenshot the coordinates were read from.
+        Without it the coordinates are taken as full-resolution screen pixels.
+        
+    Returns
+    -------
+    dict
+        Dictionary containing the execution result.
+        Keys include:
+        - 'status': str, execution status ('success' or 'error')
+        - 'gestures': list, per-click timings ('start_ms', 'gesture_ms', 'wait_ms')
+        - 'total_ms': float, time taken by the whole batch
+        - 'message': str, descriptive message about the execution
+    """
+    return _click_many(points, delay, image_id=image_id)
+
+@mouse_mcp.tool()
+def find_ui_element(query: str = None) -> dict:
+    """
+    Find the exact click point of a card or button, read from the game itself.
+    
+    Prefer it over reading coordinates from a screenshot: the position comes
+    from the game's own layout, so no vision is needed. Click the returned
+    'x' and 'y' with mouse_click without a image_id.
+
+    Parameters
+    ----------
+    query : str, optional
+        The element to find, by area and 1-based position or by label.
+        Examples: "hand card 3", "joker 1", "shop 2", "voucher 1",
+        "Play Hand button", "Discard", "Reroll", "Next Round".
+        Without a query every card and enabled button is listed.
+        
+    Returns
+    -------
+    dict
+        Dictionary containing the result.
+        Keys include:
+        - 'status': str, 'success' or 'error'
+        - 'x', 'y': int, screen pixel click point of the matched element
+        - 'element': dict, the matched element ('label', 'kind', 'area', 'index', box 'x', 'y', 'w', 'h')
+        - 'elements': list, every element when no query is given
+        - 'message': str, error details, including the available labels when nothing matches
+    """
+    return _find_ui_element(query)
+
+@mouse_mcp.tool()
+def get_screen(if_none_match: str = None, scale: float = None):
     """
     Capture a screenshot with the current mouse cursor information.
+    
+    Parameters
+    ----------
+    if_none_match : str, optional
+        The 'etag' of a previous screenshot. If neither the screen nor the cursor
+        changed since, no image is returned and 'unchanged' is True.
+    scale : float, optional
+        Downscale factor in (0, 1] for a smaller image. Click with the returned
+        'image_id' to use the pixels of the smaller image.
         
     Returns
     -------
     dict
         Dictionary containing the screenshot with cursor and metadata.
         Keys include:
-        - 'image': str, base64 encoded PNG image with cursor overlay
-        - 'width': int, screenshot width in pixels
-        - 'height': int, screenshot height in pixels
-        - 'cursor_x': int, current cursor x-position in pixels
-        - 'cursor_y': int, current cursor y-position in pixels
-        - 'timestamp': str, when the screenshot was taken
+        - 'screenshot': str, base64 encoded PNG data URL with the cursor overlay (absent when unchanged)
+        - 'mouse_info': str, cursor position and screen resolution in pixels
+        - 'etag': str, tag identifying this screen content and cursor position
+        - 'image_id': int, id to pass to mouse_click with coordinates from this screenshot
+        - 'unchanged': bool, present and True when the screen matches if_none_match
+    """
+    return _get_screen_with_cursor(if_none_match=if_none_match, scale=scale)
+
+game_mcp = FastMCP(
+    name="BalatroGameMCP",
+)
+
+# Game Action Tools
+@game_mcp.tool()
+def game_action(action: str, index: int = None, indices: list[int] = None, area: str = None) -> dict:
+    """
+    Run a game action directly in the game, without pressing buttons or clicking.
+    
+    Each action is checked the same way the game enables its button, so an
+    action that is not possible right now returns an error explaining why.
+    Card positions are 1-based, left to right, as in get_game_state.
+
+    Parameters
+    ----------
+    action : str
+        One of:
+        - "select_blind", "skip_blind": on the blind selection screen
+        - "highlight": select exactly the hand cards in 'indices' (at most 5)
+        - "play", "discard": play or discard the highlighted cards
+        - "sort_rank", "sort_suit": sort the hand
+        - "cash_out": collect the round reward
+        - "buy": buy shop card 'index' ('area' "shop_vouchers" to redeem a voucher, "shop_booster" to open a pack)
+        - "sell": sell joker 'index' ('area' "consumables" to sell a consumable)
+        - "use": use consumable 'index' ('area' "pack" to pick a card from an opened pack)
+        - "reroll": reroll the shop
+        - "next_round": leave the shop
+        - "skip_pack": skip an opened booster pack
+    index : int, optional
+        1-based card position for "buy", "sell" and "use".
+    indices : list[int], optional
+        1-based hand card positions for "highlight". Example: [1, 3, 4]
+    area : str, optional
+        Card area when not the action's default: "jokers", "consumables",
+        "shop_jokers", "shop_vouchers", "shop_booster" or "pack".
+        
+    Returns
+    -------
+    dict
+        Dictionary containing the execution result.
+        Keys include:
+        - 'status': str, execution status ('success' or 'error')
+        - 'action': str, the action run
+        - 'state': str, game state name right after the action (e.g. "SELECTING_HAND", "SHOP")
+        - 'message': str, why the action failed
+    """
+    return _game_action(action, index=index, indices=indices, area=area)
+
+@game_mcp.tool()
+def get_game_state() -> dict:
+    """
+    Get the exact game state, read from the game instead of a screenshot.
+    
+    Returns
+    -------
+    dict
+        Dictionary containing the game state.
+        Keys include:
+        - 'game_state': dict, run parameters (hands, discards, money, ante, round, blind, scores),
+          jokers, shop items, hand cards in order and the highlighted element
+        - 'state': str, game state name (e.g. "BLIND_SELECT", "SELECTING_HAND", "SHOP")
+        - 'message': str, error details if the state is not available
     """
-    return _get_screen()
+    return _get_game_state()
 
 def create_fastapi_app() -> FastAPI:
     # Create individual MCP apps
     gamepad_mcp_app = gamepad_mcp.http_app()
     mouse_mcp_app = mouse_mcp.http_app()
+    game_mcp_app = game_mcp.http_app()
 
     # Create combined MCP application
     @contextlib.asynccontextmanager
     async def lifespan(app: FastAPI):
         async with gamepad_mcp_app.lifespan(app):
             async with mouse_mcp_app.lifespan(app):
-                yield
+                async with game_mcp_app.lifespan(app):
+                    yield
 
     app = FastAPI(
         title="Balatro MCP Server",
@@ -241,6 +418,7 @@ def create_fastapi_app() -> FastAPI:
         - Gamepad control
         - Mouse interaction
         - Screenshot capture
+        - Direct game actions
         """,
         version="1.0.0",
         lifespan=lifespan
@@ -249,6 +427,7 @@ def create_fastapi_app() -> FastAPI:
     # Mount the MCP servers
     app.mount("/gamepad", gamepad_mcp_app)
     app.mount("/mouse", mouse_mcp_app)
+    app.mount("/game", game_mcp_app)
 
     # Health check for MCP server
     @app.get("/health")
@@ -258,7 +437,8 @@ def create_fastapi_app() -> FastAPI:
             "status": "healthy",
             "services": {
                 "gamepad_mcp": "running",
-                "mouse_mcp": "running"
+                "mouse_mcp": "running",
+                "game_mcp": "running"
             }
         }
     
@@ -0,0 +1,83 @@
+"""
+Game action tools for MCP server integration.
+
+These call the game's own functions through the BalatroLogger mod instead of
+emulating gamepad or mouse input.
+"""
+import requests
+from mcp_server.tools.http_utils import post_action
+
+FASTAPI_URL = "http://localhost:8000"
+
+
+def game_action(action: str, index: int = None, indices: list = None, area: str = None) -> dict:
+    """
+    Run a game action directly in the game.
+
+    Args:
+        action (str): One of select_blind, skip_blind, highlight, play, discard, sort_rank, sort_suit,
+                      cash_out, buy, sell, use, reroll, next_round, skip_pack
+        index (int): 1-based card for buy, sell and use
+        indices (list): 1-based hand cards for highlight
+        area (str): Card area for buy, sell and use when not the default one
+
+    Returns:
+        dict: A dictionary with the action and the resulting game state name.
+              If the action is not possible now, the error explains why.
+    """
+    try:
+        payload = {"action": action}
+        for name, value in (("index", index), ("indices", indices), ("area", area)):
+            if value is not None:
+                payload[name] = value
+
+        response = post_action(f"{FASTAPI_URL}/game/action", payload, timeout=10)
+
+        if response.status_code == 200:
+            return response.json()
+        else:
+            return {
+                "status": "error",
+                "message": f"HTTP {response.status_code}: {response.text}"
+            }
+
+    except requests.RequestException as e:
+        return {
+            "status": "error",
+            "message": f"Request failed: {str(e)}"
+        }
+    except Exception as e:
+        return {
+            "status": "error",
+            "message": f"Unexpected error: {str(e)}"
+        }
+
+
+def get_game_state() -> dict:
+    """
+    Get the current game state read from the game.
+
+    Returns:
+        dict: Run parameters, jokers, shop items, hand and highlighted element in the GameState schema
+    """
+    try:
+        response = requests.get(f"{FASTAPI_URL}/game_state", timeout=10)
+
+        if response.status_code == 200:
+            return response.json()
+        else:
+            return {
+                "status": "error",
+                "message": f"HTTP {response.status_code}: {response.text}"
+            }
+
+    except requests.RequestException as e:
+        return {
+            "status": "error",
+            "message": f"Request failed: {str(e)}"
+        }
+    except Exception as e:
+        return {
+            "status": "error",
+            "message": f"Unexpected error: {str(e)}"
+        }
@@ -3,11 +3,15 @@ Gamepad tools for MCP server integration.
 """
 from uuid import uuid4
 import requests
+from mcp_server.tools.http_utils import post_action
 from fastmcp.utilities.types import Image
 import base64
 
 FASTAPI_URL = "http://localhost:8000"
 
+# Maximum wait for the screen to settle after each press
+SETTLE_TIMEOUT_MS = 1000
+
 
 def press_buttons(sequence: str) -> dict:
     """
@@ -27,10 +31,14 @@ def press_buttons(sequence: str) -> dict:
         payload = {
             "step_id": step_id,
             "buttons": sequence,
-            "duration": 0.1
+            "duration": 0.1,
+            "wait_mode": "settle",
+            "settle_timeout_ms": SETTLE_TIMEOUT_MS
         }
 
-        response = requests.post(f"{FASTAPI_URL}/gamepad/buttons", json=payload, timeout=10)
+        # Each press may take up to its settle timeout, so the client timeout grows with the sequence
+        timeout = 10 + len(sequence.split()) * (0.1 + SETTLE_TIMEOUT_MS / 1000)
+        response = post_action(f"{FASTAPI_URL}/gamepad/buttons", payload, timeout)
         
         if response.status_code == 200:
             return response.json()
@@ -52,23 +60,92 @@ def press_buttons(sequence: str) -> dict:
         }
 
 
-def get_screen() -> Image:
+def press_buttons_and_get_screen(sequence: str, settle_ms: int = 300, format: str = "png") -> dict:
+    """
+    Press a sequence of buttons and return the screen once it has settled, in one request.
+    
+    Args:
+        sequence (str): Space-separated buttons, as for press_buttons.
+        settle_ms (int): Time the screen must stay unchanged after the last press.
+        format (str): Image encoding requested from the API ('png', 'jpeg' or 'webp').
+    
+    Returns:
+        dict: The press result, whether the screen changed and the resulting screenshot.
+    """
+    try:
+        payload = {
+            "gamepad": {
+                "step_id": str(uuid4()),
+                "buttons": sequence,
+                "duration": 0.1,
+                "wait_mode": "delay"
+            },
+            "settle": "stable",
+            "settle_ms": settle_ms,
+            "timeout_ms": 3000,
+            "frame": {"format": format}
+        }
+
+        timeout = 15 + len(sequence.split()) * 0.2
+        response = post_action(f"{FASTAPI_URL}/act", payload, timeout)
+        
+        if response.status_code == 200:
+            return response.json()
+        else:
+            return {
+                "status": "error",
+                "message": f"HTTP {response.status_code}: {response.text}"
+            }
+            
+    except requests.RequestException as e:
+        return {
+            "status": "error",
+            "message": f"Request failed: {str(e)}"
+        }
+    except Exception as e:
+        return {
+            "status": "error",
+            "message": f"Unexpected error: {str(e)}"
+        }
+
+
+def get_screen(format: str = "png", quality: int = 85, scale: float = None, if_none_match: str = None) -> Image:
     """
     Get a screenshot of the current state of the Balatro game.
     
+    Args:
+        format (str): Image encoding requested from the API ('png', 'jpeg' or 'webp').
+        quality (int): Quality for lossy formats (1-100).
+        scale (float): Optional downscale factor (0-1].
+        if_none_match (str): ETag of a previous screenshot; if the screen is unchanged no image is returned.
+    
     Returns:
         ImageContent: A screenshot of the game showing the current state.
     """
     try:
-        response = requests.get(f"{FASTAPI_URL}/screenshot", timeout=10)
+        params = {"format": format, "quality": quality}
+        if scale is not None:
+            params["scale"] = scale
+        headers = {"If-None-Match": if_none_match} if if_none_match else {}
+
+        response = requests.get(f"{FASTAPI_URL}/screenshot", params=params, headers=headers, timeout=10)
+
+        if response.status_code == 304:
+            return {
+                "unchanged": True,
+                "etag": response.headers.get("ETag"),
+                "message": "Screen unchanged since the screenshot with this etag"
+            }
 
         if response.status_code != 200:
             raise RuntimeError(f"Screenshot backend error: HTTP {response.status_code} - {response.text}")
 
+        media_type = response.headers.get("content-type", "image/png")
         image_base64 = base64.b64encode(response.content).decode('utf-8')
 
         return {
-            "screenshot": f"data:image/png;base64,{image_base64}"
+            "screenshot": f"data:{media_type};base64,{image_base64}",
+            "etag": response.headers.get("ETag")
         }
         
     except requests.RequestException as e:
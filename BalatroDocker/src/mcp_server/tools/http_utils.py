@@ -0,0 +1,32 @@
+"""
+HTTP helpers shared by the MCP tools.
+"""
+from uuid import uuid4
+import requests
+
+
+def post_action(url: str, payload: dict, timeout: float, retries: int = 1) -> requests.Response:
+    """
+    Post an input action with a step_id, retrying timed-out attempts.
+    
+    The API journals actions by step_id, so a retry of a request that timed out
+    on the client waits for (or replays) the original instead of repeating it.
+    
+    Args:
+        url: Endpoint URL
+        payload: JSON body, a step_id is added if missing
+        timeout: Per-attempt timeout in seconds
+        retries: Extra attempts after a timeout
+        
+    Returns:
+        requests.Response: Response of the first attempt that completed
+    """
+    payload = dict(payload)
+    payload.setdefault("step_id", str(uuid4()))
+
+    for attempt in range(retries + 1):
+        try:
+            return requests.post(url, json=payload, timeout=timeout)
+        except requests.Timeout:
+            if attempt == retries:
+                raise
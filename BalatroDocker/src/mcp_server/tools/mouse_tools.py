@@ -11,53 +11,49 @@ import io
 import base64
 import traceback
 
+from api.utils.shared_frames import SharedFrameReader, get_shared_frame_path
+from mcp_server.tools.http_utils import post_action
+
 FASTAPI_URL = "http://localhost:8000"
 
+# Frames older than this are considered stale and fetched over HTTP instead
+SHARED_FRAME_MAX_AGE_MS = 500
 
-def get_screen_dimensions() -> dict:
-    """
-    Get current screen dimensions.
-    
-    Returns:
-        dict: Dictionary containing screen width and height
-    """
-    try:
-        response = requests.get(f"{FASTAPI_URL}/mouse/position", timeout=10)
-        
-        if response.status_code == 200:
-            data = response.json()
-            return data.get("screen_size", {"width": 1920, "height": 1080})
-        else:
-            # Fallback dimensions if request fails
-            return {"width": 1920, "height": 1080}
-    except Exception:
-        # Fallback dimensions if request fails
-        return {"width": 1920, "height": 1080}
+_shared_frame_path = get_shared_frame_path()
+shared_frame_reader = SharedFrameReader(_shared_frame_path) if _shared_frame_path else None
 
 
-def mouse_click(x: int, y: int) -> dict:
+def mouse_click(x: int, y: int, image_id: int = None) -> dict:
     """
     Click at a specific coordinate on the screen using pixel coordinates.
     
     Args:
         x (int): X coordinate in pixels
         y (int): Y coordinate in pixels
+        image_id (int): Screenshot the coordinates refer to; None means screen pixels
     
     Returns:
         dict: Status of the click operation
     """
-    # Sometimes click fails so it is ensure to double click
-    # There is no error in the game
-    clicks = 2
     try:
         payload = {
             "x": x,
             "y": y,
             "button": "left",
-            "clicks": clicks
+            "clicks": 1,
+            # The game reports the clicks it receives
+            "ack": True
         }
+        if image_id is not None:
+            # Pixels of a possibly downscaled screenshot, mapped back to the screen by the API
+            payload.update({"coordinates": "frame", "image_id": image_id})
         
-        response = requests.post(f"{FASTAPI_URL}/mouse/click", json=payload, timeout=10)
+        response = post_action(f"{FASTAPI_URL}/mouse/click", payload, timeout=10)
+
+        # Sometimes a click is missed without any error, click again only if the game did not see it
+        # (or cannot tell, when the mod is not connected)
+        if response.status_code == 200 and not (response.json().get("ack") or {}).get("acknowledged"):
+            response = post_action(f"{FASTAPI_URL}/mouse/click", payload, timeout=10)
         
         if response.status_code == 200:
             return response.json()
@@ -103,7 +99,51 @@ def mouse_drag(start_x: int, start_y: int, end_x: int, end_y: int, duration: flo
             "button": button
         }
         
-        response = requests.post(f"{FASTAPI_URL}/mouse/drag", json=payload, timeout=15)
+        response = post_action(f"{FASTAPI_URL}/mouse/drag", payload, timeout=15)
+        
+        if response.status_code == 200:
+            return response.json()
+        else:
+            return {
+                "status": "error",
+                "message": f"HTTP {response.status_code}: {response.text}"
+            }
+    except requests.RequestException as e:
+        return {
+            "status": "error",
+            "message": f"Request failed: {str(e)}"
+        }
+    except Exception as e:
+        return {
+            "status": "error",
+            "message": f"Unexpected error: {str(e)}"
+        }
+
+
+def click_many(points: list, delay: float = 0.1, hold: float = None, image_id: int = None) -> dict:
+    """
+    Click several positions in order with a single request.
+    
+    Args:
+        points (list): [x, y] pixel coordinates to click, in order
+        delay (float): Seconds to wait after each click (default: 0.1)
+        hold (float): Seconds each click is held, None uses the server default
+        image_id (int): Screenshot the coordinates refer to; None means screen pixels
+    
+    Returns:
+        dict: Status of the gestures with per-click timings
+    """
+    try:
+        gestures = [
+            {"type": "click", "x": int(x), "y": int(y), "button": "left", "hold": hold, "delay": delay}
+            for x, y in points
+        ]
+        payload = {"gestures": gestures}
+        if image_id is not None:
+            payload.update({"coordinates": "frame", "image_id": image_id})
+        timeout = 10 + len(gestures) * (delay + (hold or 0))
+        
+        response = post_action(f"{FASTAPI_URL}/mouse/gestures", payload, timeout=timeout)
         
         if response.status_code == 200:
             return response.json()
@@ -151,34 +191,86 @@ def get_mouse_position() -> dict:
             "message": f"Unexpected error: {str(e)}"
         }
 
-def get_screen_with_cursor() -> dict:
+def find_ui_element(query: str = None) -> dict:
+    """
+    Resolve a UI element to its click point using the geometry exported by the game mod.
+    
+    Args:
+        query (str): Element such as "hand card 3", "joker 1" or "Play Hand button"; None lists all elements
+    
+    Returns:
+        dict: The matching element with its screen pixel click point ("x", "y"), or all elements
+    """
+    try:
+        params = {"query": query} if query else {}
+        response = requests.get(f"{FASTAPI_URL}/ui_elements", params=params, timeout=10)
+        
+        if response.status_code == 200:
+            return response.json()
+        else:
+            return {
+                "status": "error",
+                "message": f"HTTP {response.status_code}: {response.text}"
+            }
+    except requests.RequestException as e:
+        return {
+            "status": "error",
+            "message": f"Request failed: {str(e)}"
+        }
+    except Exception as e:
+        return {
+            "status": "error",
+            "message": f"Unexpected error: {str(e)}"
+        }
+
+def get_screen_with_cursor(if_none_match: str = None, scale: float = None) -> dict:
     """
     Get a screenshot with the current mouse cursor position highlighted.
     
+    Args:
+        if_none_match (str): ETag of a previous screenshot; if screen and cursor are unchanged no image is returned.
+        scale (float): Optional downscale factor (0-1]; click with the returned image_id to use its pixels.
+    
     Returns:
         dict: Dictionary containing the screenshot with cursor and mouse position
     """
     try:
-        # Get the screenshot with cursor
-        screenshot_response = requests.get(f"{FASTAPI_URL}/screenshot_with_cursor", timeout=10)
+        # The cursor position and screen size come back in the response headers
+        request_headers = {"If-None-Match": if_none_match} if if_none_match else {}
+        params = {"scale": scale} if scale is not None else {}
+        screenshot_response = requests.get(f"{FASTAPI_URL}/screenshot_with_cursor", params=params,
+                                           headers=request_headers, timeout=10)
 
-        if screenshot_response.status_code != 200:
+        if screenshot_response.status_code not in (200, 304):
             raise RuntimeError(f"Screenshot backend error: HTTP {screenshot_response.status_code} - {screenshot_response.text}")
 
-        # Get the current mouse position
-        mouse_pos = get_mouse_position()
-
-        if mouse_pos.get("status") == "error":
+        headers = screenshot_response.headers
+        if "X-Cursor-X" in headers:
+            mouse_x, mouse_y = int(headers["X-Cursor-X"]), int(headers["X-Cursor-Y"])
+            screen_width, screen_height = int(headers["X-Screen-Width"]), int(headers["X-Screen-Height"])
+            mouse_info = f"Mouse at pixel coordinates ({mouse_x}, {mouse_y}). Screen resolution: {screen_width}x{screen_height} pixels."
+        else:
             mouse_info = "Error retrieving mouse info"
-        elif mouse_pos.get("status") == "success":
-            mouse_info = mouse_pos.get("coordinate_info")
+
+        if screenshot_response.status_code == 304:
+            return {
+                "unchanged": True,
+                "etag": headers.get("ETag"),
+                "mouse_info": mouse_info,
+                "message": "Screen unchanged since the screenshot with this etag"
+            }
 
         # Convert the image data to base64 for LangChain compatibility
+        media_type = headers.get("content-type", "image/png")
         image_base64 = base64.b64encode(screenshot_response.content).decode('utf-8')
 
         return {
-            "screenshot": f"data:image/png;base64,{image_base64}",
-            "mouse_info": mouse_info
+            "screenshot": f"data:{media_type};base64,{image_base64}",
+            "mouse_info": mouse_info,
+            "etag": headers.get("ETag"),
+            "image_id": int(headers["X-Image-Id"]) if "X-Image-Id" in headers else None,
+            "crop_origin": headers.get("X-Crop-Origin"),
+            "scale": headers.get("X-Scale")
         }
         
     except requests.RequestException as e:
@@ -231,17 +323,22 @@ def locate_element(description: str) -> dict:
         task_prompt = "<OPEN_VOCABULARY_DETECTION>"
         prompt = task_prompt + " " + description
 
-        # Get screenshot
-        screenshot_response = requests.get(f"{FASTAPI_URL}/screenshot", timeout=10)
-        
-        if screenshot_response.status_code != 200:
-            return {
-                "status": "error",
-                "message": f"Failed to get screenshot: HTTP {screenshot_response.status_code}"
-            }
-        
-        # Load image
-        image = Image.open(io.BytesIO(screenshot_response.content)).convert("RGB")
+        # Raw pixels straight from the API's shared frame, no HTTP or PNG round trip
+        shared_frame = shared_frame_reader.read(SHARED_FRAME_MAX_AGE_MS) if shared_frame_reader else None
+        if shared_frame is not None:
+            image = shared_frame.image
+        else:
+            # Get screenshot
+            screenshot_response = requests.get(f"{FASTAPI_URL}/screenshot", timeout=10)
+            
+            if screenshot_response.status_code != 200:
+                return {
+                    "status": "error",
+                    "message": f"Failed to get screenshot: HTTP {screenshot_response.status_code}"
+                }
+            
+            # Load image
+            image = Image.open(io.BytesIO(screenshot_response.content)).convert("RGB")
 
         # Get device info for tensor operations
         device = "cuda:0" if torch.cuda.is_available() else "cpu"
@@ -0,0 +1,7 @@
+"""
+Shared pytest setup: the API packages are imported from BalatroDocker/src, as the server runs them.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
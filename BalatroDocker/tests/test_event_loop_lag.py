@@ -0,0 +1,73 @@
+"""
+Event loop responsiveness while the capture and encode path is saturated.
+
+Captures and encodes run in the threadpool, so the event loop keeps serving
+other requests. scripts/event_loop_lag.py measures the same against a live
+server.
+"""
+import asyncio
+import time
+
+import pytest
+from fastapi.concurrency import run_in_threadpool
+from PIL import Image
+
+from api.utils import frame_buffer as frame_buffer_module
+from api.utils.frame_buffer import FrameBuffer
+from api.utils.image_processing import encode_image, resize_image
+from api.utils.loop_monitor import EventLoopMonitor
+
+SCREEN_SIZE = (1920, 1080)
+CONCURRENT_CLIENTS = 8
+SATURATION_SECONDS = 1.5
+MONITOR_INTERVAL = 0.01
+# Several times the 10 ms sampling interval, far below one blocking capture and encode
+MAX_LAG_MS = 100
+
+
+@pytest.fixture
+def frame_buffer(monkeypatch):
+    """Frame buffer capturing a noisy full-screen image without an X server."""
+    screen = Image.effect_noise(SCREEN_SIZE, 64).convert("RGB")
+
+    def capture_screen(region=None):
+        return screen.copy(), "fake"
+
+    monkeypatch.setattr(frame_buffer_module, "capture_screen", capture_screen)
+    return FrameBuffer(capacity=8, fps=0)
+
+
+async def _serve_screenshots(buffer: FrameBuffer, deadline: float) -> int:
+    """Capture and encode frames like /screenshot does until the deadline, return how many were served."""
+    served = 0
+    while time.perf_counter() < deadline:
+        frame = await run_in_threadpool(buffer.capture)
+        image = await run_in_threadpool(resize_image, frame.image, 0.5)
+        await run_in_threadpool(encode_image, image, "png" if served % 2 else "jpeg")
+        served += 1
+    return served
+
+
+@pytest.mark.asyncio
+async def test_monitor_detects_blocking_work():
+    monitor = EventLoopMonitor(interval=MONITOR_INTERVAL)
+    monitor.start()
+    await asyncio.sleep(MONITOR_INTERVAL * 2)
+    time.sleep(0.2)  # Blocks the event loop
+    await asyncio.sleep(MONITOR_INTERVAL * 2)
+    await monitor.stop()
+
+    assert monitor.stats()["max_ms"] >= 150
+
+
+@pytest.mark.asyncio
+async def test_lag_stays_bounded_while_capturing_and_encoding(frame_buffer):
+    monitor = EventLoopMonitor(interval=MONITOR_INTERVAL, window=1000)
+    monitor.start()
+
+    deadline = time.perf_counter() + SATURATION_SECONDS
+    served = await asyncio.gather(*(_serve_screenshots(frame_buffer, deadline) for _ in range(CONCURRENT_CLIENTS)))
+    await monitor.stop()
+
+    assert sum(served) >= CONCURRENT_CLIENTS
+    assert monitor.stats()["max_ms"] < MAX_LAG_MS
@@ -5,15 +5,18 @@ from langgraph.prebuilt import ToolNode
 from langchain_openai import AzureChatOpenAI
 import os
 import json
-import time
+import asyncio
 from dotenv import load_dotenv
 from langchain_core.messages import HumanMessage, SystemMessage, AIMessage
 from .models import PlannerResponse, GameState, AgentState
 from .prompts import visualizer_system_prompt, worker_system_prompt, planner_system_prompt
+from api import APIClient
 from typing import Literal
 
 load_dotenv()
 
+api_client = APIClient()
+
 async def get_tools(server_name: str="gamepad"):
     client = MultiServerMCPClient({
         "mouse": {"transport":"streamable_http", "url":"http://localhost:8001/mouse/mcp"},
@@ -57,6 +60,16 @@ async def visualizer_node(state: AgentState, screenshot_tool, llm):
     data = json.loads(res) if isinstance(res, str) else res
     img = data.get("screenshot", "")
 
+    # Exact state from the game mod when available, the vision model otherwise
+    exported = await asyncio.to_thread(api_client.get_game_state)
+    if exported.get("status") == "success":
+        json_state = GameState(**exported["game_state"]).model_dump_json(indent=2)
+        game_states.append(json_state)
+        return {
+            "game_states": game_states,
+            "last_screenshot": img
+        }
+
     messages = [SystemMessage(content=visualizer_system_prompt)]
 
     if len(game_states) > 0:
@@ -148,7 +161,10 @@ async def tool_node(state:AgentState, toolnode:ToolNode) -> dict:
     # El ToolNode busca automáticamente el último AIMessage con tool_calls
     tool_msgs = await toolnode.ainvoke(messages)
 
-    time.sleep(2)
+    # Wait for the game to finish animating instead of a fixed delay
+    wait_result = await asyncio.to_thread(api_client.wait_for_screen, "stable")
+    if wait_result.get("status") == "error":
+        await asyncio.sleep(2)
     
     return {"messages": messages + tool_msgs}
 
@@ -56,10 +56,11 @@ class APIClient:
                 "duration": 0.1
             }
 
+            # Each press may wait up to a second for the screen to settle
             response = requests.post(
                 f"{self.base_url}/gamepad/buttons",
                 json=payload,
-                timeout=10
+                timeout=10 + len(button_sequence.split()) * 1.1
             )
 
             if response.status_code == 200:
@@ -75,3 +76,46 @@ class APIClient:
         except Exception as e:
             error_msg = f"Error: {str(e)}"
             return {"status": "error", "message": error_msg}
+
+    def wait_for_screen(self, mode: str = "stable", since_frame: int = None, timeout_ms: int = 5000, settle_ms: int = 300):
+        """Wait until the screen changes or settles, returning the wait metadata."""
+        try:
+            params = {
+                "mode": mode,
+                "timeout_ms": timeout_ms,
+                "settle_ms": settle_ms,
+                "image": False
+            }
+            if since_frame is not None:
+                params["since_frame"] = since_frame
+
+            response = requests.get(
+                f"{self.base_url}/screenshot/wait",
+                params=params,
+                timeout=timeout_ms / 1000 + 5
+            )
+
+            if response.status_code == 200:
+                return response.json()
+            else:
+                error_msg = f"Error {response.status_code}: {response.text}"
+                return {"status": "error", "message": error_msg}
+
+        except requests.exceptions.RequestException as e:
+            error_msg = f"Connection error: {str(e)}"
+            return {"status": "error", "message": error_msg}
+
+    def get_game_state(self):
+        """Get the exact game state exported by the mod, in the GameState schema."""
+        try:
+            response = requests.get(f"{self.base_url}/game_state", timeout=5)
+
+            if response.status_code == 200:
+                return response.json()
+            else:
+                error_msg = f"Error {response.status_code}: {response.text}"
+                return {"status": "error", "message": error_msg}
+
+        except requests.exceptions.RequestException as e:
+            error_msg = f"Connection error: {str(e)}"
+            return {"status": "error", "message": error_msg}